@@ -1,17 +1,32 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+import asyncio
+import itertools
 import time
 
-from fastapi import Depends, FastAPI, Header, HTTPException, Request
-from fastapi.responses import Response as FastAPIResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response as FastAPIResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from .privacy_engine import DPConfig, DifferentialPrivacyEngine
 from .federated_coordinator import FederatedCoordinator
+from .checkpoint import CheckpointStore
+from .metrics import MetricsMiddleware, exposition, metric
+from .events import TERMINAL_STATUSES, EventBroker, format_sse
+from .state_store import StoreMapping, store_from_env
+from .training_executor import FederatedRoundRunner, SessionExecutor, SessionState, simulated_updates
+from .update_arena import ArenaFullError
+from .update_codec import UpdateAuthError, UpdateFormatError
+from .update_inbox import DuplicateUpdateError, InboxClosed, UpdateInbox, ingest_update
 from .security.rbac import Role, allow, parse_role
 from .security.audit import AuditLogger
-from .compliance.report import generate_markdown, generate_pdf
+from .security.audit_query import GROUP_FIELDS, AuditFilter
+from .security.ratelimit import RATE_DECISIONS, limiter_from_env, parse_limits
+from .compliance.report import ReportCache, generate_markdown, generate_pdf, library_versions
+from .compliance.render_pool import RenderPoolBusy, ReportWorkerPool
 from .data_validation import (
     validate_dataset_size,
     detect_imbalance,
@@ -19,22 +34,14 @@ from .data_validation import (
     check_high_dimensionality,
     validate_schema,
 )
+import hashlib
+import json
 import os
-try:
-    from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-    _HAVE_METRICS = True
-except Exception:  # pragma: no cover - optional
-    Counter = Histogram = generate_latest = CONTENT_TYPE_LATEST = None
-    _HAVE_METRICS = False
-
-# Optional Redis for rate limiting
-try:
-    import redis as _redis  # type: ignore
-    _REDIS_URL = os.environ.get("REDIS_URL")
-    _RATE_BACKEND = os.environ.get("AEGIS_RATE_LIMIT_BACKEND", "memory").lower()
-    _REDIS = _redis.Redis.from_url(_REDIS_URL) if (_REDIS_URL and _RATE_BACKEND == "redis") else None
-except Exception:  # pragma: no cover
-    _REDIS = None
+import socket
+import stat
+import tempfile
+import threading
+import uuid
 
 app = FastAPI(title="Aegis API", version="0.1.0")
 def _mtls_sim_check(x_client_cert: Optional[str]) -> None:
@@ -46,25 +53,17 @@ async def healthz():
     return {"status": "ok"}
 
 # Prometheus metrics (optional)
-if _HAVE_METRICS:
-    REQ_COUNT = Counter("aegis_requests_total", "Total API requests", ["endpoint", "method", "status"])
-    REQ_LATENCY = Histogram("aegis_request_latency_seconds", "Request latency", ["endpoint", "method"])
-else:  # lightweight stubs
-    class _Null:
-        def labels(self, *args, **kwargs):
-            return self
-        def inc(self, *_a, **_k):
-            return None
-        def observe(self, *_a, **_k):
-            return None
-    REQ_COUNT = _Null()
-    REQ_LATENCY = _Null()
+REPORT_QUEUE_DEPTH = metric("Gauge", "aegis_report_queue_depth", "Compliance reports rendering or waiting for a render worker")
+
+# Count, latency, in-flight and response size for every route, labelled by route template
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/metrics")
 async def metrics():
-    if not _HAVE_METRICS:
+    out = exposition()
+    if out is None:
         return {"status": "metrics_disabled"}
-    return FastAPIResponse(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return FastAPIResponse(out[0], media_type=out[1])
 
 
 audit = AuditLogger()
@@ -90,6 +89,8 @@ class StrategyModel(BaseModel):
 class TrainingStartModel(BaseModel):
     session_id: str = Field(..., pattern=r"^[a-zA-Z0-9_-]{1,64}$")
     rounds: int = Field(..., ge=1, le=10000)
+    resume: bool = Field(True, description="Continue from the session's latest checkpoint if one exists")
+    simulate: bool = Field(False, description="Train on synthetic participant data; otherwise rounds without uploads are skipped")
 
 
 class DatasetRegistration(BaseModel):
@@ -106,12 +107,94 @@ class DatasetRegistration(BaseModel):
     }
 
 
-# In-memory stores for Stage 4
-participants: Dict[str, bytes] = {}
+# Shared state (AEGIS_STATE_BACKEND=memory|sqlite|redis) so every worker sees the same
+# participants, sessions, datasets and config; each worker keeps a version-checked cache.
+state_store = store_from_env()
+_STATE_TTL_S = float(os.environ.get("AEGIS_STATE_CACHE_TTL_S", "0"))
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+participants = StoreMapping(state_store, "participants", ttl_s=_STATE_TTL_S, encode=bytes.hex, decode=bytes.fromhex)
+sessions = StoreMapping(state_store, "sessions", ttl_s=_STATE_TTL_S)
+datasets = StoreMapping(state_store, "datasets", ttl_s=_STATE_TTL_S)
+config = StoreMapping(state_store, "config", ttl_s=_STATE_TTL_S)
+# Live round progress goes to its own namespace and is read per key, so rounds don't
+# invalidate the sessions catalog cached by every worker
+_PROGRESS_NS = "session_progress"
 engine = DifferentialPrivacyEngine(DPConfig())
-coordinator = FederatedCoordinator(aggregator="trimmed_mean", auth_keys={})
-sessions: Dict[str, Dict[str, object]] = {}
-datasets: Dict[str, Dict[str, object]] = {}
+# Optional durable global-model checkpoints (enables resume after restart)
+_CHECKPOINT_DIR = os.environ.get("AEGIS_CHECKPOINT_DIR")
+checkpoints: Optional[CheckpointStore] = CheckpointStore(_CHECKPOINT_DIR) if _CHECKPOINT_DIR else None
+coordinator = FederatedCoordinator(aggregator="trimmed_mean", auth_keys={}, checkpoints=checkpoints)
+
+
+def _sync_config() -> None:
+    """Apply DP config and strategy written by any worker to this worker's engine/coordinator."""
+    dp = config.get("dp")
+    if dp and dp != engine.config.to_dict():
+        engine.config = DPConfig.from_dict(dp)
+    strategy = config.get("strategy")
+    if strategy and strategy != coordinator.aggregator:
+        coordinator.aggregator = strategy
+
+
+def _sync_session(st: SessionState) -> None:
+    snap = dict(st.snapshot(), updated_at=time.time(), owner=_WORKER_ID)
+
+    def _merge(cur: Optional[Dict[str, object]]) -> Dict[str, object]:
+        meta = dict(cur or {})
+        # A stop from another worker wins; the executor picks it up before the next round
+        if meta.get("status") == "stopped" and st.status == "running":
+            return meta
+        meta.update(snap)
+        return meta
+
+    cur = sessions.get(st.session_id) or {}
+    if cur.get("status") != st.status or cur.get("owner") != _WORKER_ID or st.status in TERMINAL_STATUSES:
+        sessions.update_key(st.session_id, _merge)
+    if st.status in TERMINAL_STATUSES:
+        state_store.delete(_PROGRESS_NS, st.session_id)
+        inbox.discard(st.session_id)
+    else:
+        state_store.put(_PROGRESS_NS, st.session_id, snap)
+    # Runs on the executor's supervisor thread: publish without touching the engine/coordinator config
+    broker.publish(st.session_id, _session_view(st.session_id, sync=False))
+
+
+def _stopped_elsewhere(session_id: str) -> bool:
+    return (sessions.get(session_id) or {}).get("status") == "stopped"
+
+
+# Status events for /training/events subscribers (fed by the executor)
+broker = EventBroker()
+_SSE_POLL_S = float(os.environ.get("AEGIS_SSE_POLL_S", "1.0"))
+_SSE_HEARTBEAT_S = float(os.environ.get("AEGIS_SSE_HEARTBEAT_S", "15.0"))
+
+# Background session executor: rounds run through a per-session coordinator
+_MODEL_DIM = int(os.environ.get("AEGIS_MODEL_DIM", "16"))
+# Streamed participant uploads (POST /federated/{session_id}/updates) land here
+inbox = UpdateInbox(
+    _MODEL_DIM,
+    max_clients=int(os.environ.get("AEGIS_INBOX_MAX_CLIENTS", "256")),
+    max_uploads_per_client=int(os.environ.get("AEGIS_INBOX_MAX_UPLOADS_PER_CLIENT", "2")),
+)
+_UPLOAD_TIMEOUT_S = float(os.environ.get("AEGIS_UPLOAD_TIMEOUT_S", "60"))
+round_runner = FederatedRoundRunner(
+    keys=lambda: dict(participants),
+    aggregator=lambda: coordinator.aggregator,
+    source=simulated_updates(_MODEL_DIM),
+    dim=_MODEL_DIM,
+    checkpoints=checkpoints,
+    inbox=inbox,
+)
+executor = SessionExecutor(
+    round_runner,
+    max_concurrent_sessions=int(os.environ.get("AEGIS_MAX_CONCURRENT_SESSIONS", "64")),
+    max_workers=int(os.environ.get("AEGIS_EXECUTOR_WORKERS", "4")),
+    on_update=_sync_session,
+    cancelled=_stopped_elsewhere,
+    # Each run starts from the checkpoint of its start round (zeros without resume) and is evicted when it ends
+    on_start=round_runner.begin,
+    on_finish=round_runner.finish,
+)
 
 
 def require_permission(permission: str):
@@ -123,41 +206,26 @@ def require_permission(permission: str):
     return _dep
 
 
-# Simple in-memory rate limiter (Stage 4): limit key per action within window
-_RATE_BUCKET: Dict[str, List[float]] = {}
+# Rate limiting: O(1) sliding-window counters, in memory or via one atomic Redis script
+# (AEGIS_RATE_LIMIT_BACKEND=memory|redis). AEGIS_RATE_LIMITS overrides per-key limits,
+# e.g. "training:start=100/60,report:generate=10/60".
+rate_limit = limiter_from_env()
+_RATE_OVERRIDES = parse_limits(os.environ.get("AEGIS_RATE_LIMITS", ""))
+
 
 def rate_limiter(key_name: str, limit: int = 10, window_s: float = 60.0):
+    limit, window_s = _RATE_OVERRIDES.get(key_name, (limit, window_s))
+
     async def _dep(request: Request) -> None:
         # Allow disabling in certain environments
         if os.environ.get("AEGIS_DISABLE_RATE_LIMIT", "0") == "1":
             return
-        now = time.time()
         # Scope bucket by server port to avoid cross-test/process interference
         port = request.url.port or 0
-        instance_key = f"{key_name}:{port}"
-        # Redis backend (sorted set with timestamps)
-        if _REDIS is not None:
-            zkey = f"aegis:rl:{instance_key}"
-            cutoff = now - window_s
-            try:
-                _REDIS.zremrangebyscore(zkey, 0, cutoff)
-                count = _REDIS.zcard(zkey)
-                if count >= limit:
-                    raise HTTPException(status_code=429, detail="rate limit exceeded")
-                _REDIS.zadd(zkey, {str(now): now})
-                _REDIS.expire(zkey, int(window_s))
-                return
-            except Exception:
-                # Fallback to memory on Redis errors
-                pass
-        bucket = _RATE_BUCKET.setdefault(instance_key, [])
-        # trim old
-        cutoff = now - window_s
-        while bucket and bucket[0] < cutoff:
-            bucket.pop(0)
-        if len(bucket) >= limit:
-            raise HTTPException(status_code=429, detail="rate limit exceeded")
-        bucket.append(now)
+        decision = rate_limit.hit(f"{key_name}:{port}", limit, window_s)
+        RATE_DECISIONS.labels(key_name, "allowed" if decision.allowed else "limited").inc()
+        if not decision.allowed:
+            raise HTTPException(status_code=429, detail="rate limit exceeded", headers={"Retry-After": str(max(1, int(decision.retry_after_s + 0.999)))})
     return _dep
 
 
@@ -170,169 +238,381 @@ async def register_participant(p: Participant, role: Role = Depends(require_perm
     return {"status": "ok", "audit": evt.to_json()}
 
 
-@app.post("/dataset/register")
-async def register_dataset(d: DatasetRegistration, role: Role = Depends(require_permission("dataset:register"))):
+def _reference_schema() -> Optional[List[str]]:
+    """Schema of the first registered dataset that declares one (cross-participant reference)."""
+    for meta in datasets.values():
+        if isinstance(meta, dict) and meta.get("schema"):
+            return list(meta.get("schema", []))
+    return None
+
+
+def _dataset_warnings(d: DatasetRegistration, ref_schema: Optional[List[str]]) -> List[str]:
     warnings: List[str] = []
     warnings += validate_dataset_size(d.num_samples)
     warnings += detect_imbalance(d.class_counts)
     warnings += check_missing_values(d.missing_fraction)
     warnings += check_high_dimensionality(d.num_features)
+    if d.feature_schema and ref_schema:
+        _ok, schema_w = validate_schema({"existing": ref_schema, d.client_id: d.feature_schema})
+        warnings += schema_w
+    return warnings
+
+
+@app.post("/dataset/register")
+async def register_dataset(d: DatasetRegistration, role: Role = Depends(require_permission("dataset:register"))):
     # Cross-participant schema check against first available reference
-    if d.feature_schema and datasets:
-        ref_schema: Optional[List[str]] = None
-        for meta in datasets.values():
-            if isinstance(meta, dict) and meta.get("schema"):
-                ref_schema = list(meta.get("schema", []))  # type: ignore[arg-type]
-                break
-        if ref_schema:
-            _ok, schema_w = validate_schema({"existing": ref_schema, d.client_id: d.feature_schema})
-            warnings += schema_w
+    warnings = _dataset_warnings(d, _reference_schema() if d.feature_schema else None)
     datasets[d.client_id] = d.model_dump(by_alias=True)
     evt = audit.emit(actor=role.value, action="dataset:register", params=d.model_dump(), outcome="ok")
     return {"status": "ok", "warnings": warnings, "audit": evt.to_json()}
 
 
+_BULK_MAX_ITEMS = int(os.environ.get("AEGIS_BULK_MAX_ITEMS", "5000"))
+
+
+class ParticipantBulk(BaseModel):
+    items: List[Participant] = Field(..., min_length=1, max_length=_BULK_MAX_ITEMS)
+
+
+class DatasetBulk(BaseModel):
+    items: List[DatasetRegistration] = Field(..., min_length=1, max_length=_BULK_MAX_ITEMS)
+
+
+def _item_hash(item: Dict[str, object]) -> str:
+    return hashlib.sha256(json.dumps(item, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _reject_bulk(results: List[Dict[str, object]]) -> None:
+    """All-or-nothing: if any item failed validation, nothing is committed."""
+    if any(r.get("status") == "error" for r in results):
+        raise HTTPException(status_code=422, detail={"committed": False, "results": results})
+
+
+def _duplicate_ids(ids: List[str]) -> set:
+    seen: set = set()
+    return {i for i in ids if i in seen or seen.add(i)}  # type: ignore[func-returns-value]
+
+
+@app.post("/participants/bulk")
+async def register_participants_bulk(body: ParticipantBulk, role: Role = Depends(require_permission("participant:register")), _: None = Depends(rate_limiter("participant:register:bulk", limit=10, window_s=60))):
+    dupes = _duplicate_ids([p.client_id for p in body.items])
+    results: List[Dict[str, object]] = []
+    keys: Dict[str, bytes] = {}
+    for i, p in enumerate(body.items):
+        try:
+            key = bytes.fromhex(p.key_hex)
+        except ValueError:
+            results.append({"index": i, "client_id": p.client_id, "status": "error", "error": "key_hex is not valid hex"})
+            continue
+        if p.client_id in dupes:
+            results.append({"index": i, "client_id": p.client_id, "status": "error", "error": "duplicate client_id in request"})
+            continue
+        keys[p.client_id] = key
+        results.append({"index": i, "client_id": p.client_id, "status": "ok", "item_hash": _item_hash(p.model_dump())})
+    _reject_bulk(results)
+    participants.set_many(keys)
+    coordinator.auth_keys.update(keys)
+    item_hashes = {str(r["client_id"]): r["item_hash"] for r in results}
+    evt = audit.emit(actor=role.value, action="participant:register:bulk", params={"count": len(keys), "items": item_hashes}, outcome="ok")
+    return {"status": "ok", "committed": len(keys), "results": results, "audit": evt.to_json()}
+
+
+@app.post("/dataset/register/bulk")
+async def register_datasets_bulk(body: DatasetBulk, role: Role = Depends(require_permission("dataset:register")), _: None = Depends(rate_limiter("dataset:register:bulk", limit=10, window_s=60))):
+    dupes = _duplicate_ids([d.client_id for d in body.items])
+    # One reference lookup per batch; the first schema in the batch serves if none is registered yet
+    ref_schema = _reference_schema() or next((list(d.feature_schema) for d in body.items if d.feature_schema), None)
+    results: List[Dict[str, object]] = []
+    rows: Dict[str, Dict[str, object]] = {}
+    for i, d in enumerate(body.items):
+        if d.client_id in dupes:
+            results.append({"index": i, "client_id": d.client_id, "status": "error", "error": "duplicate client_id in request"})
+            continue
+        rows[d.client_id] = d.model_dump(by_alias=True)
+        results.append({"index": i, "client_id": d.client_id, "status": "ok", "warnings": _dataset_warnings(d, ref_schema), "item_hash": _item_hash(d.model_dump())})
+    _reject_bulk(results)
+    datasets.set_many(rows)
+    item_hashes = {str(r["client_id"]): r["item_hash"] for r in results}
+    evt = audit.emit(actor=role.value, action="dataset:register:bulk", params={"count": len(rows), "items": item_hashes}, outcome="ok")
+    return {"status": "ok", "committed": len(rows), "results": results, "audit": evt.to_json()}
+
+
 @app.post("/dp/config")
 async def set_dp_config(cfg: DPConfigModel, role: Role = Depends(require_permission("dp:configure")), _: None = Depends(rate_limiter("dp:configure", limit=30, window_s=60))):
     engine.config = DPConfig.from_dict(cfg.model_dump())
+    config["dp"] = engine.config.to_dict()
     evt = audit.emit(actor=role.value, action="dp:configure", params=cfg.model_dump(), outcome="ok")
     return {"status": "ok", "audit": evt.to_json()}
 
 
 @app.get("/dp/assess")
 async def dp_assess(steps: int = 1000, role: Role = Depends(require_permission("dp:assess"))):
+    _sync_config()
     res = engine.assess_parameters(steps=steps)
     return res
 
 
 @app.post("/dp/budget/consume")
 async def dp_budget_consume(steps: int, role: Role = Depends(require_permission("dp:budget"))):
-    spent = engine.consume_budget(steps=steps)
+    _sync_config()
+    eps = engine.stepwise_accounting(steps)
+    spent = float(config.update_key("dp_spent", lambda cur: float(cur or 0.0) + eps) or 0.0)
+    engine.spent_epsilon = spent
     return {"spent_epsilon": spent, "delta": engine.config.delta}
 
 
 @app.post("/dp/budget/reset")
 async def dp_budget_reset(role: Role = Depends(require_permission("dp:budget"))):
     engine.reset_budget()
+    config["dp_spent"] = 0.0
     return {"status": "ok"}
 
 
 @app.post("/strategy")
 async def set_strategy(s: StrategyModel, role: Role = Depends(require_permission("strategy:select")), _: None = Depends(rate_limiter("strategy:select", limit=60, window_s=60))):
     coordinator.aggregator = s.strategy
+    config["strategy"] = s.strategy
     evt = audit.emit(actor=role.value, action="strategy:select", params=s.model_dump(), outcome="ok")
     return {"status": "ok", "audit": evt.to_json()}
 
 
 @app.post("/training/start")
 async def start_training(body: TrainingStartModel, role: Role = Depends(require_permission("training:start")), _: None = Depends(rate_limiter("training:start", limit=60, window_s=60))):
-    import time as _t
-    _t0 = _t.perf_counter()
+    start_round = 0
+    resumed_from: Optional[str] = None
+    latest = checkpoints.latest(body.session_id) if (checkpoints is not None and body.resume) else None
+    if latest is not None and latest.round < int(body.rounds):
+        start_round = latest.round
+        resumed_from = latest.checkpoint_id
+    round_duration_s = float(os.environ.get("AEGIS_ROUND_DURATION_S", "3.0"))
+    _sync_config()
     sessions[body.session_id] = {
-        "status": "running",
+        "status": "queued",
         "total_rounds": int(body.rounds),
-        "current_round": 0,
-        "started_at": _t.time(),
-        "round_duration_s": float(os.environ.get("AEGIS_ROUND_DURATION_S", "3.0")),
+        "current_round": start_round,
+        "start_round": start_round,
+        "resumed_from": resumed_from,
+        "round_duration_s": round_duration_s,
+        "simulate": body.simulate,
     }
+    # AEGIS_ROUND_DURATION_S is the minimum round period (the client collection window)
+    st = executor.submit(body.session_id, int(body.rounds), start_round=start_round, min_round_s=round_duration_s, simulate=body.simulate)
     evt = audit.emit(actor=role.value, action="training:start", params=body.model_dump(), outcome="ok")
-    REQ_COUNT.labels("/training/start", "POST", "200").inc()
-    REQ_LATENCY.labels("/training/start", "POST").observe(_t.perf_counter() - _t0)
-    return {"status": "started", "audit": evt.to_json()}
+    return {"status": "started" if st.status == "running" else st.status, "start_round": start_round, "resumed_from": resumed_from, "audit": evt.to_json()}
 
 
 @app.post("/training/stop")
 async def stop_training(session_id: str, role: Role = Depends(require_permission("training:stop")), _: None = Depends(rate_limiter("training:stop", limit=120, window_s=60))):
-    if session_id in sessions:
-        sessions[session_id]["status"] = "stopped"
+    if executor.stop(session_id) is None and session_id in sessions:
+        # Owned by another worker: mark it stopped in the shared store
+        sessions.update_key(session_id, lambda m: dict(m or {}, status="stopped") if (m or {}).get("status") in {"queued", "running"} else m)
     evt = audit.emit(actor=role.value, action="training:stop", params={"session_id": session_id}, outcome="ok")
-    return {"status": sessions.get(session_id, {}).get("status", "unknown"), "audit": evt.to_json()}
+    return {"status": (sessions.get(session_id) or {}).get("status", "unknown"), "audit": evt.to_json()}
 
 
 @app.get("/training/status")
 async def training_status(session_id: str, role: Role = Depends(require_permission("training:status"))):
-    import time as _t
-    meta = sessions.get(session_id)
-    if not meta:
-        return {"session_id": session_id, "status": "unknown", "current_round": 0, "total_rounds": 0, "eta_seconds": 0.0}
-    total_rounds = int(meta.get("total_rounds", int(meta.get("rounds", 0))))
-    started_at = float(meta.get("started_at", _t.time()))
-    round_duration_s = float(meta.get("round_duration_s", 3.0))
-    elapsed = max(0.0, _t.time() - started_at)
-    current_round = min(total_rounds, int(elapsed // max(round_duration_s, 0.1))) if total_rounds > 0 else 0
-    status_val = str(meta.get("status", "running"))
-    if current_round >= total_rounds and total_rounds > 0:
-        status_val = "completed"
-        meta["status"] = status_val
-        meta["current_round"] = total_rounds
-    else:
-        meta["current_round"] = current_round
-    eta = max(0.0, total_rounds * round_duration_s - elapsed)
+    return _session_view(session_id)
+
+
+_EPS_CACHE: Dict[tuple, float] = {}
+_EPS_LOCK = threading.Lock()  # request handlers and the executor's supervisor thread both fill it
+
+
+def _epsilon_estimate(current_round: int) -> Optional[float]:
+    key = (max(1, current_round), tuple(sorted(engine.config.to_dict().items())))
+    with _EPS_LOCK:
+        cached = _EPS_CACHE.get(key)
+    if cached is not None:
+        return cached
     try:
-        steps = max(1, current_round)
-        assess = engine.assess_parameters(steps=steps)
-        eps_est = float(assess.get("epsilon", 0.0))
+        eps = float(engine.assess_parameters(steps=key[0]).get("epsilon", 0.0))
     except Exception:
-        eps_est = None
+        return None
+    with _EPS_LOCK:
+        if len(_EPS_CACHE) > 1024:
+            _EPS_CACHE.clear()
+        _EPS_CACHE[key] = eps
+    return eps
+
+
+def _session_view(session_id: str, *, sync: bool = True) -> Dict[str, object]:
+    st = executor.status(session_id)
+    if st is not None:
+        meta: Dict[str, object] = st.snapshot()
+    else:
+        # Session owned by another worker: use its last published snapshot
+        meta = dict(sessions.get(session_id) or {})
+        progress = state_store.get(_PROGRESS_NS, session_id) if meta else None
+        if progress:
+            status = meta.get("status")
+            meta.update(progress)
+            if status == "stopped":
+                meta["status"] = status
+        if meta.get("status") in {"queued", "running"} and meta.get("updated_at"):
+            meta["eta_seconds"] = max(0.0, float(meta.get("eta_seconds") or 0.0) - (time.time() - float(meta["updated_at"])))  # type: ignore[arg-type]
+    checkpoint_id = meta.get("checkpoint_id")
+    if checkpoint_id is None and checkpoints is not None:
+        latest = checkpoints.latest(session_id)
+        checkpoint_id = latest.checkpoint_id if latest is not None else None
+    if not meta:
+        return {"session_id": session_id, "status": "unknown", "current_round": 0, "total_rounds": 0, "eta_seconds": 0.0, "checkpoint_id": checkpoint_id}
+    current_round = int(meta.get("current_round") or 0)  # type: ignore[call-overload]
+    if sync:
+        _sync_config()
+    eps_est = _epsilon_estimate(current_round)
     # Keep backward compatibility: include old 'status' only response keys as well
     response = {
         "session_id": session_id,
-        "status": status_val,
-        "current_round": int(meta.get("current_round", current_round)),
-        "total_rounds": total_rounds,
-        "eta_seconds": eta,
+        "status": meta.get("status", "unknown"),
+        "current_round": current_round,
+        "total_rounds": meta.get("total_rounds", 0),
+        "eta_seconds": meta.get("eta_seconds", 0.0),
+        "checkpoint_id": checkpoint_id,
+        "last_round_s": meta.get("last_round_s"),
+        "last_round_updates": meta.get("last_round_updates", 0),
     }
+    if meta.get("error"):
+        response["error"] = meta["error"]
     if eps_est is not None:
         response["epsilon_estimate"] = eps_est
     return response
 
 
+def _event_key(view: Dict[str, object]) -> tuple:
+    # ETA drifts with the clock; only push when progress, status or epsilon change
+    return (view.get("status"), view.get("current_round"), view.get("total_rounds"), view.get("epsilon_estimate"), view.get("checkpoint_id"))
+
+
+@app.get("/training/events")
+async def training_events(session_id: str, request: Request, role: Role = Depends(require_permission("training:status"))):
+    """Server-Sent Events stream of status changes; closes once the session reaches a terminal state."""
+
+    async def _stream():
+        with broker.subscribe(session_id) as sub:
+            view = _session_view(session_id)
+            last_key = _event_key(view)
+            yield format_sse(view, id=str(view.get("current_round", 0)))
+            last_sent = time.monotonic()
+            while view.get("status") not in TERMINAL_STATUSES:
+                evt = await sub.get(timeout=_SSE_POLL_S)
+                if await request.is_disconnected():
+                    break
+                # Nothing pushed: the session may be running on another worker, so re-read the store
+                view = evt if evt is not None else _session_view(session_id)
+                key = _event_key(view)
+                if key != last_key:
+                    last_key = key
+                    last_sent = time.monotonic()
+                    yield format_sse(view, id=str(view.get("current_round", 0)))
+                elif time.monotonic() - last_sent >= _SSE_HEARTBEAT_S:
+                    last_sent = time.monotonic()
+                    yield b": keep-alive\n\n"
+
+    return StreamingResponse(_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/federated/{session_id}/updates", status_code=202)
+async def submit_update(session_id: str, request: Request, x_client_cert: Optional[str] = Header(default=None, alias="X-Client-Cert"), role: Role = Depends(require_permission("update:submit")), _: None = Depends(rate_limiter("federated:update", limit=6000, window_s=60))):
+    """Accept one binary (AEGU) model update; the body is verified and decoded as it streams in."""
+    _mtls_sim_check(x_client_cert)
+    st = executor.status(session_id)
+    if st is None or st.status not in {"queued", "running"}:
+        if session_id in sessions:
+            raise HTTPException(status_code=409, detail="session is not accepting updates on this worker")
+        raise HTTPException(status_code=404, detail="unknown session")
+    try:
+        header = await ingest_update(inbox, session_id, request.stream(), participants.get, min_round=st.current_round + 1, timeout_s=_UPLOAD_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=408, detail="upload did not complete in time")
+    except UpdateAuthError as e:
+        audit.emit(actor=role.value, action="federated:update", params={"session_id": session_id}, outcome="denied")
+        raise HTTPException(status_code=401, detail=str(e))
+    except UpdateFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (InboxClosed, DuplicateUpdateError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ArenaFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    params = {"session_id": session_id, "client_id": header["client_id"], "round": header["round"], "bytes": header["bytes"]}
+    evt = audit.emit(actor=role.value, action="federated:update", params=params, outcome="accepted")
+    return dict(params, status="accepted", pending=inbox.pending(session_id), audit=evt.to_json())
+
+
 @app.get("/openapi.json")
 async def openapi():
     return app.openapi()
 
 
-@app.get("/compliance/report")
-async def compliance_report(format: str = "markdown", steps: Optional[int] = None, x_client_cert: Optional[str] = Header(default=None, alias="X-Client-Cert"), role: Role = Depends(require_permission("report:generate")), _: None = Depends(rate_limiter("report:generate", limit=30, window_s=60))):
-    import time as _t
-    _t0 = _t.perf_counter()
-    _mtls_sim_check(x_client_cert)
-    # Estimate epsilon using DP engine for report context
+# Rendered reports are cached per (report inputs, steps, format); when anything the report
+# shows changes, the key changes, so stale entries are simply never looked up again.
+report_cache = ReportCache(max_entries=int(os.environ.get("AEGIS_REPORT_CACHE_SIZE", "32")))
+# Rendering is CPU-bound: keep it off the event loop in a bounded pool (AEGIS_REPORT_POOL=thread|process)
+report_pool = ReportWorkerPool(
+    workers=int(os.environ.get("AEGIS_REPORT_WORKERS", "2")),
+    max_pending=int(os.environ.get("AEGIS_REPORT_MAX_PENDING", "16")),
+    kind=os.environ.get("AEGIS_REPORT_POOL", "thread"),
+    on_depth=REPORT_QUEUE_DEPTH.set,
+)
+# Async report job metadata lives in the shared store so any worker can answer status/download;
+# rendered bodies are files under AEGIS_REPORT_JOB_DIR (shared by the workers of a host)
+report_jobs = StoreMapping(state_store, "report_jobs", ttl_s=_STATE_TTL_S)
+_REPORT_JOB_TTL_S = float(os.environ.get("AEGIS_REPORT_JOB_TTL_S", "3600"))
+_REPORT_JOB_DIR = os.environ.get("AEGIS_REPORT_JOB_DIR") or os.path.join(tempfile.gettempdir(), f"aegis-report-jobs-{getattr(os, 'getuid', lambda: 0)()}")
+_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+
+def _report_job_dir() -> str:
+    """Create the job directory (mode 0700) and refuse one that other users could write into."""
+    os.makedirs(_REPORT_JOB_DIR, mode=0o700, exist_ok=True)
+    st = os.lstat(_REPORT_JOB_DIR)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"report job directory {_REPORT_JOB_DIR} is not a directory")
+    if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        raise PermissionError(f"report job directory {_REPORT_JOB_DIR} must be owned by this user with mode 0700")
+    return _REPORT_JOB_DIR
+
+
+def _report_job_path(job_id: str, fmt: str) -> str:
+    return os.path.join(_REPORT_JOB_DIR, f"{job_id}.{'pdf' if fmt == 'pdf' else 'md'}")
+
+
+def _write_report_job(job_id: str, fmt: str, body: Union[str, bytes]) -> None:
+    _report_job_dir()
+    path = _report_job_path(job_id, fmt)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    # O_EXCL|O_NOFOLLOW: never write through a file or symlink planted at the temp name
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | _NOFOLLOW, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(body.encode("utf-8") if isinstance(body, str) else body)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_report_job(job_id: str, fmt: str) -> bytes:
+    with os.fdopen(os.open(_report_job_path(job_id, fmt), os.O_RDONLY | _NOFOLLOW), "rb") as fh:
+        return fh.read()
+
+
+def _report_steps(steps: Optional[int]) -> int:
+    if steps is not None and int(steps) > 0:
+        return int(steps)
     try:
         # choose steps from the active session with the largest configured rounds, fallback to 1000
-        derived_steps = max((int(meta.get("total_rounds", int(meta.get("rounds", 0)))) for meta in sessions.values()), default=1000)
+        return max((int(meta.get("total_rounds", int(meta.get("rounds", 0)))) for meta in sessions.values()), default=1000)
     except Exception:
-        derived_steps = 1000
-    steps_used = int(steps) if steps is not None and int(steps) > 0 else derived_steps
+        return 1000
+
+
+def _render_report(steps_used: int, fmt: str) -> Union[str, bytes]:
+    """Build the report; runs on a report pool thread, never on the event loop."""
     assess = engine.assess_parameters(steps=steps_used)
-    # Collect versions if available
-    versions: Dict[str, str] = {"aegis_api": app.version}
-    try:
-        import fastapi as _fastapi  # type: ignore
-        versions["fastapi"] = getattr(_fastapi, "__version__", "unknown")
-    except Exception:
-        pass
-    try:
-        import pydantic as _pyd  # type: ignore
-        versions["pydantic"] = getattr(_pyd, "__version__", "unknown")
-    except Exception:
-        pass
-    # Best-effort optional libs
-    try:
-        import flwr as _flwr  # type: ignore
-        versions["flwr"] = getattr(_flwr, "__version__", "unknown")
-    except Exception:
-        pass
-    try:
-        import opacus as _opacus  # type: ignore
-        versions["opacus"] = getattr(_opacus, "__version__", "unknown")
-    except Exception:
-        pass
-    try:
-        import torch as _torch  # type: ignore
-        versions["torch"] = getattr(_torch, "__version__", "unknown")
-    except Exception:
-        pass
     md = generate_markdown(
         dp_config=engine.config,
         participants=participants,
@@ -341,22 +621,145 @@ async def compliance_report(format: str = "markdown", steps: Optional[int] = Non
         epsilon=float(assess.get("epsilon", 0.0)),
         epsilon_steps=steps_used,
         notes=str(assess.get("notes", "")),
-        versions=versions,
+        versions=library_versions(app.version),
     )
+    return report_pool.call(generate_pdf, md, cpu=True) if fmt == "pdf" else md
+
+
+def _report_key(steps_used: int, fmt: str) -> tuple:
+    """Cache key over exactly what the report renders, so round progress does not invalidate it."""
+    inputs = {
+        "dp": engine.config.to_dict(),
+        "strategy": coordinator.aggregator,
+        "participants": len(participants),
+        "sessions": sorted((sid, str(meta.get("status", "unknown")), str(meta.get("rounds", "?"))) for sid, meta in sessions.items()),
+        "version": app.version,
+    }
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+    return (digest, steps_used, fmt)
+
+
+def _weak_etag(etag: str) -> str:
+    # JSON bodies embed a per-request audit event, so they are only semantically equivalent
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2), as If-None-Match requires."""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(t.strip() == "*" or t.strip().removeprefix("W/") == opaque for t in if_none_match.split(","))
+
+
+@app.get("/compliance/report")
+async def compliance_report(format: str = "markdown", steps: Optional[int] = None, x_client_cert: Optional[str] = Header(default=None, alias="X-Client-Cert"), if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"), role: Role = Depends(require_permission("report:generate")), _: None = Depends(rate_limiter("report:generate", limit=30, window_s=60))):
+    _mtls_sim_check(x_client_cert)
+    _sync_config()
+    fmt = "pdf" if format.lower() == "pdf" else "markdown"
+    steps_used = _report_steps(steps)
+    key = _report_key(steps_used, fmt)
+    cached = report_cache.get(key)
+    # Downloads are audited whether or not the report had to be rendered
     evt = audit.emit(actor=role.value, action="report:generate", params={"participants": len(participants)}, outcome="ok")
-    if format.lower() == "pdf":
+    if cached is None:
         try:
-            pdf_bytes = generate_pdf(md)
+            async with report_pool.slot():
+                body = await report_pool.run(_render_report, steps_used, fmt)
+        except RenderPoolBusy as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
         except RuntimeError as e:
-            REQ_COUNT.labels("/compliance/report", "GET", "500").inc()
-            REQ_LATENCY.labels("/compliance/report", "GET").observe(_t.perf_counter() - _t0)
             raise HTTPException(status_code=500, detail=str(e))
-        REQ_COUNT.labels("/compliance/report", "GET", "200").inc()
-        REQ_LATENCY.labels("/compliance/report", "GET").observe(_t.perf_counter() - _t0)
-        return FastAPIResponse(content=pdf_bytes, media_type="application/pdf", headers={"Content-Disposition": "inline; filename=report.pdf"})
-    REQ_COUNT.labels("/compliance/report", "GET", "200").inc()
-    REQ_LATENCY.labels("/compliance/report", "GET").observe(_t.perf_counter() - _t0)
-    return {"markdown": md, "audit": evt.to_json()}
+        etag = report_cache.put(key, body)
+    else:
+        body, etag = cached
+    headers = {"ETag": etag if fmt == "pdf" else _weak_etag(etag), "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return FastAPIResponse(status_code=304, headers=headers)
+    if fmt == "pdf":
+        headers["Content-Disposition"] = "inline; filename=report.pdf"
+        return FastAPIResponse(content=body, media_type="application/pdf", headers=headers)
+    return JSONResponse({"markdown": body, "audit": evt.to_json()}, headers=headers)
+
+
+class ReportJobModel(BaseModel):
+    format: str = Field("markdown", pattern=r"^(markdown|pdf)$")
+    steps: Optional[int] = Field(None, ge=1)
+
+
+def _run_report_job(job_id: str, steps_used: int, fmt: str) -> None:
+    report_jobs.update_key(job_id, lambda m: dict(m or {}, status="running", started_at=time.time()))
+    try:
+        key = _report_key(steps_used, fmt)  # the state this render sees, not the state at submission
+        cached = report_cache.get(key)
+        body = cached[0] if cached is not None else _render_report(steps_used, fmt)
+        etag = report_cache.put(key, body)
+        _write_report_job(job_id, fmt, body)
+        report_jobs.update_key(job_id, lambda m: dict(m or {}, status="done", finished_at=time.time(), etag=etag))
+    except Exception as e:  # surfaced through the job status
+        error = str(e)
+        report_jobs.update_key(job_id, lambda m: dict(m or {}, status="failed", finished_at=time.time(), error=error))
+
+
+def _prune_report_jobs() -> None:
+    cutoff = time.time() - _REPORT_JOB_TTL_S
+    for job_id, meta in list(report_jobs.items()):
+        if float(meta.get("created_at", 0.0)) < cutoff:
+            report_jobs.pop(job_id, None)
+            try:
+                os.remove(_report_job_path(job_id, str(meta.get("format"))))
+            except OSError:
+                pass
+
+
+@app.post("/compliance/report/jobs", status_code=202)
+async def create_report_job(body: ReportJobModel, role: Role = Depends(require_permission("report:generate")), _: None = Depends(rate_limiter("report:generate", limit=30, window_s=60))):
+    _sync_config()
+    steps_used = _report_steps(body.steps)
+    _prune_report_jobs()
+    job_id = uuid.uuid4().hex
+    report_jobs[job_id] = {"status": "queued", "format": body.format, "steps": steps_used, "created_at": time.time(), "owner": _WORKER_ID}
+    try:
+        report_pool.submit(_run_report_job, job_id, steps_used, body.format)
+    except RenderPoolBusy as e:
+        del report_jobs[job_id]
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    location = f"/compliance/report/jobs/{job_id}"
+    evt = audit.emit(actor=role.value, action="report:job", params={"job_id": job_id, "format": body.format, "steps": steps_used}, outcome="ok")
+    return JSONResponse({"job_id": job_id, "status": "queued", "location": location, "audit": evt.to_json()}, status_code=202, headers={"Location": location})
+
+
+@app.get("/compliance/report/jobs/{job_id}")
+async def report_job_status(job_id: str, role: Role = Depends(require_permission("report:generate"))):
+    meta = report_jobs.get(job_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    out = dict(meta, job_id=job_id)
+    if meta.get("status") == "done":
+        out["download"] = f"/compliance/report/jobs/{job_id}/download"
+    return out
+
+
+@app.get("/compliance/report/jobs/{job_id}/download")
+async def report_job_download(job_id: str, if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"), role: Role = Depends(require_permission("report:generate"))):
+    meta = report_jobs.get(job_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    if meta.get("status") != "done":
+        raise HTTPException(status_code=409, detail=f"job is {meta.get('status')}")
+    evt = audit.emit(actor=role.value, action="report:generate", params={"job_id": job_id}, outcome="ok")
+    etag = str(meta["etag"])
+    headers = {"ETag": etag if meta.get("format") == "pdf" else _weak_etag(etag), "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return FastAPIResponse(status_code=304, headers=headers)
+    try:
+        data = await run_in_threadpool(_read_report_job, job_id, str(meta.get("format")))
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="job result is no longer available")
+    if meta.get("format") == "pdf":
+        headers["Content-Disposition"] = f"attachment; filename=report-{job_id}.pdf"
+        return FastAPIResponse(content=data, media_type="application/pdf", headers=headers)
+    return JSONResponse({"markdown": data.decode("utf-8"), "audit": evt.to_json()}, headers=headers)
 
 
 # Phase 5: Compliance & Audit endpoints
@@ -379,12 +782,121 @@ async def compliance_hipaa(role: Role = Depends(require_permission("compliance:h
     return {"phi_at_rest": False, "phi_in_transit_protected": True, "audit": evt.to_json()}
 
 
+def _iso_utc(value: Optional[str], name: str) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"{name} must be an ISO-8601 timestamp")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
 @app.get("/audit/logs")
-async def audit_logs(role: Role = Depends(require_permission("audit:read"))):
-    events = [e.to_json() for e in audit.events()]
-    return {"events": events, "valid_chain": audit.verify_chain()}
+async def audit_logs(
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    format: str = Query("json", pattern=r"^(json|ndjson)$"),
+    role: Role = Depends(require_permission("audit:read")),
+):
+    """Audit events, oldest first. Pass `next_cursor` back as `cursor` for the next page.
+
+    `format=ndjson` streams one event per line, lazily; without an explicit `limit`
+    it streams every matching event.
+    """
+    try:
+        after = int(cursor) if cursor else -1
+    except ValueError:
+        raise HTTPException(status_code=422, detail="invalid cursor")
+    matches = audit.query(after=after, actor=actor, action=action, since=_iso_utc(since, "since"), until=_iso_utc(until, "until"))
+    headers = {"X-Audit-Chain-Valid": "true" if audit.chain_valid else "false"}
+    if format == "ndjson":
+        stream = matches if limit is None else itertools.islice(matches, limit)
+
+        def _lines():
+            for _seq, evt in stream:
+                yield evt.to_json() + "\n"
+
+        return StreamingResponse(_lines(), media_type="application/x-ndjson", headers=headers)
+    page_size = limit or 1000
+    page = await run_in_threadpool(lambda: list(itertools.islice(matches, page_size + 1)))
+    next_cursor = str(page[page_size - 1][0]) if len(page) > page_size else None
+    events = [evt.to_json() for _seq, evt in page[:page_size]]
+    return JSONResponse({"events": events, "valid_chain": audit.chain_valid, "next_cursor": next_cursor}, headers=headers)
+
+
+@app.get("/audit/query")
+async def audit_query(
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    outcome: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    group_by: Optional[str] = None,
+    count: bool = False,
+    limit: int = Query(100, ge=0, le=10000),
+    cursor: Optional[str] = None,
+    role: Role = Depends(require_permission("audit:read")),
+):
+    """Filtered events, counts and group-by counts over the whole durable log.
+
+    `group_by` is a comma-separated subset of actor, action, outcome, day and hour;
+    groups come back largest first. `limit=0` returns only the aggregates.
+    """
+    fields = tuple(g.strip() for g in group_by.split(",") if g.strip()) if group_by else ()
+    unknown = [g for g in fields if g not in GROUP_FIELDS]
+    if unknown or len(set(fields)) != len(fields):
+        raise HTTPException(status_code=422, detail=f"group_by must be distinct fields of {', '.join(GROUP_FIELDS)}")
+    flt = AuditFilter(actor=actor, action=action, outcome=outcome, since=_iso_utc(since, "since"), until=_iso_utc(until, "until"))
+    try:
+        res = await run_in_threadpool(audit.search, flt, limit=limit, cursor=cursor, count=count, group_by=fields)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="invalid cursor")
+    body: Dict[str, object] = {
+        "backend": res.backend,
+        # Same compact layout as AuditEvent.to_json, without rejecting archive lines that carry extra keys
+        "events": [json.dumps(rec, separators=(",", ":")) for rec in res.events],
+        "next_cursor": res.next_cursor,
+    }
+    if res.count is not None:
+        body["count"] = res.count
+    if res.groups is not None:
+        body["groups"] = res.groups
+    headers = {"X-Audit-Chain-Valid": "true" if audit.chain_valid else "false"}
+    return JSONResponse(body, headers=headers)
 
 
 @app.get("/audit/checksum")
 async def audit_checksum(role: Role = Depends(require_permission("audit:read"))):
-    return {"checksum": audit.checksum(), "count": len(audit.events())}
+    return {"checksum": audit.checksum(), "count": audit.count(), "merkle_root": audit.merkle_root()}
+
+
+@app.get("/audit/proof")
+async def audit_proof(index: int = Query(..., ge=0), tree_size: Optional[int] = Query(None, ge=1), role: Role = Depends(require_permission("audit:read"))):
+    """RFC 6962 inclusion proof for one event; `leaf_hash` is SHA256(0x00 || event JSON)."""
+
+    def _proof() -> Dict[str, Any]:
+        # Old leaves and events are read back from the durable sinks: keep that off the event loop
+        return dict(audit.inclusion_proof(index, tree_size), event=audit.event(index).to_json())
+
+    try:
+        return await run_in_threadpool(_proof)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="no such event in this tree size")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/audit/consistency")
+async def audit_consistency(first: int = Query(..., ge=0), second: Optional[int] = Query(None, ge=0), role: Role = Depends(require_permission("audit:read"))):
+    """RFC 6962 consistency proof: the log at `first` events is a prefix of the log at `second`."""
+    try:
+        return await run_in_threadpool(audit.consistency_proof, first, second)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,339 @@
+"""
+Global-model checkpoint store.
+
+Persists each round's aggregated model so a coordinator restart can resume a
+training session from its last committed round instead of re-running it.
+
+Layout on disk (all paths relative to the store root)::
+
+    objects/<aa>/<sha256>               raw little-endian tensor bytes (one chunk)
+    objects/<aa>/<sha256>.blob          a whole tensor (only while its checkpoint is latest)
+    sessions/<session_id>/<round>.json  small JSON header: shapes, dtypes, chunk ids, blob id
+    sessions/<session_id>/LATEST        name of the most recent header file
+
+Tensor data is split into fixed-size chunks addressed by their SHA-256, so
+chunks that do not change between rounds (frozen layers, converged weights)
+are written once and shared by every checkpoint that references them. The
+default 2 MiB chunk keeps that granularity useful: a round that changes one
+region of a large vector rewrites only the chunks covering it.
+
+Chunks are for deduplication; loading maps one file per tensor. A tensor larger
+than a chunk is also written whole, as a content-addressed blob, and loading
+memory-maps that blob read-only: a zero-copy view of the page cache, however
+large the tensor. Only a session's latest checkpoint keeps its blobs. They are
+pruned once `LATEST` moves on, so the extra disk space is one copy of the
+current model. An older checkpoint, whose blobs are gone, is assembled from its
+chunks with one copy into a private (read-only) array.
+
+Every file is fsynced, and so is its directory, before `LATEST` is flipped. A
+crash therefore leaves either the previous checkpoint current or a complete
+new one.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Union
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+
+DEFAULT_CHUNK_BYTES = 2 * 1024 * 1024
+_FORMAT_VERSION = 1
+_SESSION_RE = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+TensorLike = Union[Sequence[float], "np.ndarray"]
+
+
+@dataclass
+class TensorSpec:
+    name: str
+    dtype: str
+    shape: List[int]
+    chunks: List[str]
+    blob: Optional[str] = None  # whole-tensor object, for tensors stored in more than one chunk
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"name": self.name, "dtype": self.dtype, "shape": list(self.shape), "chunks": list(self.chunks)}
+        if self.blob is not None:
+            d["blob"] = self.blob
+        return d
+
+    @staticmethod
+    def from_dict(d: Mapping[str, Any]) -> "TensorSpec":
+        blob = d.get("blob")
+        return TensorSpec(
+            name=str(d["name"]),
+            dtype=str(d["dtype"]),
+            shape=[int(s) for s in d["shape"]],
+            chunks=[str(c) for c in d["chunks"]],
+            blob=str(blob) if blob is not None else None,
+        )
+
+
+@dataclass
+class CheckpointInfo:
+    checkpoint_id: str
+    session_id: str
+    round: int
+    created_at: float
+    tensors: List[TensorSpec] = field(default_factory=list)
+    bytes_written: int = 0  # new chunk data
+    bytes_deduplicated: int = 0  # chunk data already in the store
+    bytes_blob: int = 0  # whole-tensor blobs written for zero-copy loading
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": _FORMAT_VERSION,
+            "checkpoint_id": self.checkpoint_id,
+            "session_id": self.session_id,
+            "round": self.round,
+            "created_at": self.created_at,
+            "tensors": [t.to_dict() for t in self.tensors],
+        }
+
+    @staticmethod
+    def from_dict(d: Mapping[str, Any]) -> "CheckpointInfo":
+        return CheckpointInfo(
+            checkpoint_id=str(d["checkpoint_id"]),
+            session_id=str(d["session_id"]),
+            round=int(d["round"]),
+            created_at=float(d.get("created_at", 0.0)),
+            tensors=[TensorSpec.from_dict(t) for t in d.get("tensors", [])],
+        )
+
+
+@dataclass
+class Checkpoint:
+    info: CheckpointInfo
+    tensors: Dict[str, np.ndarray]
+
+    def flat(self) -> np.ndarray:
+        """Return all tensors as one 1-D array (zero-copy when there is a single tensor)."""
+        arrays = [t.reshape(-1) for t in self.tensors.values()]
+        if len(arrays) == 1:
+            return arrays[0]
+        if not arrays:
+            return np.empty((0,), dtype="float64")
+        return np.concatenate(arrays)
+
+
+def _fsync_dir(d: str) -> None:
+    try:
+        fd = os.open(d, os.O_RDONLY)
+    except OSError:  # pragma: no cover - platforms that cannot open directories
+        return
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover - e.g. filesystems without directory fsync
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, data: Union[bytes, memoryview], *, sync_dir: bool = True) -> None:
+    """Write `path` via a synced temp file and rename; `sync_dir=False` leaves the directory to the caller."""
+    d = os.path.dirname(path)
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if sync_dir:
+        _fsync_dir(d)
+
+
+class CheckpointStore:
+    """Content-addressed, memory-mapped checkpoint store for global models."""
+
+    def __init__(self, root: str, *, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> None:
+        if chunk_bytes <= 0:
+            raise ValueError("chunk_bytes must be positive")
+        self.root = root
+        self.chunk_bytes = int(chunk_bytes)
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "sessions"), exist_ok=True)
+
+    # Paths
+    def _object_path(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + suffix)
+
+    def _session_dir(self, session_id: str) -> str:
+        if not _SESSION_RE.match(session_id):
+            raise ValueError(f"invalid session_id: {session_id!r}")
+        return os.path.join(self.root, "sessions", session_id)
+
+    # Write path
+    def _put_object(self, data: memoryview, dirty: Set[str], suffix: str = "") -> tuple[str, bool]:
+        """Store `data` under its SHA-256 unless present; `dirty` collects directories to fsync."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, suffix)
+        if os.path.exists(path):
+            return digest, False
+        _atomic_write(path, data, sync_dir=False)
+        dirty.add(os.path.dirname(path))
+        return digest, True
+
+    def save(self, session_id: str, round: int, tensors: Union[TensorLike, Mapping[str, TensorLike]]) -> CheckpointInfo:
+        """Persist one round's aggregate and mark it as the session's latest checkpoint.
+
+        `tensors` is either a flat parameter vector (stored as tensor "flat") or a
+        mapping of tensor name to array.
+        """
+        if isinstance(tensors, Mapping):
+            named = {str(k): np.ascontiguousarray(v) for k, v in tensors.items()}
+        else:
+            named = {"flat": np.ascontiguousarray(tensors, dtype="float64")}
+        specs: List[TensorSpec] = []
+        written = deduped = blob_bytes = 0
+        dirty: Set[str] = set()
+        for name, arr in named.items():
+            arr = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+            raw = arr.reshape(-1).data.cast("B")
+            step = max(arr.itemsize, self.chunk_bytes - self.chunk_bytes % max(arr.itemsize, 1))
+            chunk_ids: List[str] = []
+            for off in range(0, len(raw), step):
+                piece = raw[off: off + step]
+                digest, is_new = self._put_object(piece, dirty)
+                chunk_ids.append(digest)
+                if is_new:
+                    written += len(piece)
+                else:
+                    deduped += len(piece)
+            blob: Optional[str] = None
+            if len(chunk_ids) > 1:
+                blob, is_new = self._put_object(raw, dirty, ".blob")
+                blob_bytes += len(raw) if is_new else 0
+            specs.append(TensorSpec(name=name, dtype=arr.dtype.str, shape=list(arr.shape), chunks=chunk_ids, blob=blob))
+        for d in sorted(dirty):
+            _fsync_dir(d)
+
+        body = json.dumps([s.to_dict() for s in specs], separators=(",", ":"), sort_keys=True).encode()
+        ckpt_id = f"{session_id}-r{int(round):06d}-{hashlib.sha256(body).hexdigest()[:12]}"
+        info = CheckpointInfo(
+            checkpoint_id=ckpt_id,
+            session_id=session_id,
+            round=int(round),
+            created_at=time.time(),
+            tensors=specs,
+            bytes_written=written,
+            bytes_deduplicated=deduped,
+            bytes_blob=blob_bytes,
+        )
+        sdir = self._session_dir(session_id)
+        header_name = f"{int(round):08d}.json"
+        previous = self.latest(session_id)
+        _atomic_write(os.path.join(sdir, header_name), json.dumps(info.to_dict(), separators=(",", ":")).encode())
+        # LATEST is flipped last so a crash mid-save leaves the previous checkpoint current.
+        _atomic_write(os.path.join(sdir, "LATEST"), header_name.encode())
+        if previous is not None:
+            self._prune_blobs(previous, keep={s.blob for s in specs})
+        return info
+
+    def _prune_blobs(self, info: CheckpointInfo, keep: Set[Optional[str]]) -> None:
+        """Drop the whole-tensor blobs of a checkpoint that is no longer latest (its chunks stay).
+
+        A reader that finds a blob gone falls back to the chunks. That includes another
+        session whose latest checkpoint has the same content.
+        """
+        for spec in info.tensors:
+            if spec.blob is not None and spec.blob not in keep:
+                try:
+                    os.unlink(self._object_path(spec.blob, ".blob"))
+                except OSError:
+                    pass
+
+    # Read path
+    def _read_header(self, path: str) -> CheckpointInfo:
+        with open(path, "r", encoding="utf-8") as fh:
+            return CheckpointInfo.from_dict(json.load(fh))
+
+    def latest(self, session_id: str) -> Optional[CheckpointInfo]:
+        sdir = self._session_dir(session_id)
+        try:
+            with open(os.path.join(sdir, "LATEST"), "r", encoding="utf-8") as fh:
+                name = fh.read().strip()
+            return self._read_header(os.path.join(sdir, name))
+        except FileNotFoundError:
+            return None
+
+    def at_round(self, session_id: str, round: int) -> Optional[CheckpointInfo]:
+        """Checkpoint committed for one round of a session, or None."""
+        try:
+            return self._read_header(os.path.join(self._session_dir(session_id), f"{int(round):08d}.json"))
+        except FileNotFoundError:
+            return None
+
+    def list(self, session_id: str) -> List[CheckpointInfo]:
+        sdir = self._session_dir(session_id)
+        if not os.path.isdir(sdir):
+            return []
+        names = sorted(n for n in os.listdir(sdir) if n.endswith(".json"))
+        return [self._read_header(os.path.join(sdir, n)) for n in names]
+
+    def _find(self, checkpoint_id: str) -> CheckpointInfo:
+        m = re.match(r"^(?P<sid>[a-zA-Z0-9_-]{1,64})-r(?P<round>\d+)-[0-9a-f]{12}$", checkpoint_id)
+        if not m:
+            raise KeyError(checkpoint_id)
+        path = os.path.join(self._session_dir(m.group("sid")), f"{int(m.group('round')):08d}.json")
+        try:
+            info = self._read_header(path)
+        except FileNotFoundError:
+            raise KeyError(checkpoint_id) from None
+        if info.checkpoint_id != checkpoint_id:
+            raise KeyError(checkpoint_id)
+        return info
+
+    def _map_tensor(self, spec: TensorSpec) -> np.ndarray:
+        dtype = np.dtype(spec.dtype)
+        if spec.blob is not None:
+            try:
+                return np.memmap(self._object_path(spec.blob, ".blob"), dtype=dtype, mode="r").reshape(spec.shape)
+            except FileNotFoundError:
+                pass  # pruned: no longer the latest checkpoint
+        parts: List[np.ndarray] = []
+        for digest in spec.chunks:
+            parts.append(np.memmap(self._object_path(digest), dtype=dtype, mode="r"))
+        if len(parts) == 1:
+            flat = parts[0]
+        elif not parts:
+            flat = np.empty((0,), dtype=dtype)
+        else:
+            # Chunks live in separate files, so assembling them is one copy, not a view
+            flat = np.concatenate(parts)
+            flat.flags.writeable = False
+        return flat.reshape(spec.shape)
+
+    def load(self, checkpoint_id: str) -> Checkpoint:
+        info = self._find(checkpoint_id)
+        return Checkpoint(info=info, tensors={s.name: self._map_tensor(s) for s in info.tensors})
+
+    def resume(self, session_id: str) -> Optional[Checkpoint]:
+        """Load the latest checkpoint of a session, or None if it has none."""
+        info = self.latest(session_id)
+        if info is None:
+            return None
+        return Checkpoint(info=info, tensors={s.name: self._map_tensor(s) for s in info.tensors})
+
+
+__all__ = [
+    "DEFAULT_CHUNK_BYTES",
+    "TensorSpec",
+    "CheckpointInfo",
+    "Checkpoint",
+    "CheckpointStore",
+]
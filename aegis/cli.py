@@ -118,68 +118,120 @@ def audit() -> None:
 
 @audit.command("verify-jsonl")
 @click.argument("path", type=click.Path(exists=True, readable=True, dir_okay=False))
-def audit_verify_jsonl(path: str) -> None:
+@click.option("--workers", type=int, default=1, show_default=True, help="Verifier processes (byte-range chunks)")
+@click.option("--hmac-key-env", default="AEGIS_AUDIT_HMAC_KEY", help="Env var name for the checkpoint HMAC key")
+@click.option("--checkpoint", default=None, help="Checkpoint file (default: PATH.checkpoint)")
+@click.option("--since-checkpoint", is_flag=True, help="Verify only what was appended after the checkpoint")
+def audit_verify_jsonl(path: str, workers: int, hmac_key_env: str, checkpoint: Optional[str], since_checkpoint: bool) -> None:
     """Verify a JSONL hash-chained audit log file."""
-    from .tools.audit_verify import verify_jsonl
+    from .tools.audit_verify import verify_resumable
 
-    res = verify_jsonl(path)
+    res = verify_resumable(
+        "jsonl", path, workers=workers, hmac_key_env=hmac_key_env, checkpoint_path=checkpoint, since_checkpoint=since_checkpoint
+    )
     if not res.ok:
         click.echo(
             f"FAIL - checked={res.checked} idx={res.failed_index} msg={res.message}",
             err=True,
         )
         raise SystemExit(1)
-    click.echo(f"OK - checked={res.checked}")
+    click.echo(f"OK - checked={res.checked} throughput={res.mb_per_s:.1f}MB/s")
 
 
 @audit.command("verify-sqlite")
 @click.argument("db", type=click.Path(exists=True, readable=True, dir_okay=False))
 @click.option("--hmac-key-env", default="AEGIS_AUDIT_HMAC_KEY", help="Env var name for HMAC key")
-def audit_verify_sqlite(db: str, hmac_key_env: str) -> None:
+@click.option("--workers", type=int, default=1, show_default=True, help="Verifier processes (id-range chunks)")
+@click.option("--checkpoint", default=None, help="Checkpoint file (default: DB.checkpoint)")
+@click.option("--since-checkpoint", is_flag=True, help="Verify only what was appended after the checkpoint")
+def audit_verify_sqlite(db: str, hmac_key_env: str, workers: int, checkpoint: Optional[str], since_checkpoint: bool) -> None:
     """Verify a SQLite+HMAC audit log database."""
-    from .tools.audit_verify import verify_sqlite
+    from .tools.audit_verify import verify_resumable
 
-    res = verify_sqlite(db, hmac_key_env)
+    res = verify_resumable(
+        "sqlite", db, workers=workers, hmac_key_env=hmac_key_env, checkpoint_path=checkpoint, since_checkpoint=since_checkpoint
+    )
     if not res.ok:
         click.echo(
             f"FAIL - checked={res.checked} idx={res.failed_index} msg={res.message}",
             err=True,
         )
         raise SystemExit(1)
-    click.echo(f"OK - checked={res.checked}")
+    click.echo(f"OK - checked={res.checked} throughput={res.mb_per_s:.1f}MB/s")
 
 
 @aegis.command("watch")
 @click.option("--session-id", required=True)
 @click.option("--steps-per-round", type=int, default=100, show_default=True)
-@click.option("--interval", type=float, default=1.0, show_default=True)
+@click.option("--interval", type=float, default=1.0, show_default=True, help="Poll interval when the server has no event stream")
 @click.option("--role", default="viewer", show_default=True)
 @click.option("--url", default=DEFAULT_URL, show_default=True)
 def watch(session_id: str, steps_per_round: int, interval: float, role: str, url: str):
-    """Poll status and display a simple epsilon estimate based on rounds."""
-    # Fetch dp config for sample rate and noise
-    httpx.post(
-        f"{url}/dp/config",
-        headers=_headers("operator"),
-        json={"clipping_norm": 1.0, "noise_multiplier": 1.0, "sample_rate": 0.01, "delta": 1e-5, "accountant": "rdp"},
-    )
-    total_steps = 0
+    """Stream status changes (rounds, epsilon, ETA) until the session finishes."""
+    from .events import TERMINAL_STATUSES, iter_sse
+
+    def _show(st: dict) -> None:
+        rounds = int(st.get("current_round", 0))
+        click.echo(json.dumps({
+            "status": st.get("status"),
+            "rounds": rounds,
+            "total_rounds": st.get("total_rounds"),
+            "approx_steps": rounds * steps_per_round,
+            "epsilon": st.get("epsilon_estimate"),
+            "eta_seconds": st.get("eta_seconds"),
+        }))
+
+    params = {"session_id": session_id}
+    with httpx.stream("GET", f"{url}/training/events", headers=_headers(role), params=params, timeout=httpx.Timeout(10.0, read=None)) as r:
+        if r.status_code == 200:
+            for evt in iter_sse(r.iter_lines()):
+                _show(evt["data"])
+            return
+        if r.status_code != 404:
+            r.read()
+            click.echo(r.text)
+            return
+    # Older servers without /training/events: fall back to polling
     while True:
-        r = httpx.get(f"{url}/training/status", headers=_headers(role), params={"session_id": session_id})
+        r = httpx.get(f"{url}/training/status", headers=_headers(role), params=params)
         if r.status_code != 200:
             click.echo(r.text)
             break
         st = r.json()
-        rounds = int(st.get("rounds", 0))
-        total_steps = rounds * steps_per_round
-        # This is a placeholder; epsilon reporting will come from server in later stages.
-        # Here we just print total steps.
-        click.echo(json.dumps({"rounds": rounds, "approx_steps": total_steps}))
-        if st.get("status") == "stopped":
+        _show(st)
+        if st.get("status") in TERMINAL_STATUSES:
             break
         time.sleep(interval)
 
 
+@aegis.command("simulate")
+@click.option("--clients", type=int, default=100, show_default=True, help="Number of virtual clients")
+@click.option("--rounds", type=int, default=3, show_default=True)
+@click.option("--dim", type=int, default=10, show_default=True, help="Model parameter count")
+@click.option("--samples", type=int, default=50, show_default=True, help="Synthetic samples per client")
+@click.option("--aggregator", type=click.Choice(["trimmed_mean", "krum"]), default="trimmed_mean", show_default=True)
+@click.option("--workers", type=int, default=None, help="Process pool size (default: CPU count, 0 = inline)")
+@click.option("--dataset", type=click.Path(exists=True, dir_okay=False), default=None, help=".npz file with X and y arrays")
+@click.option("--seed", type=int, default=0, show_default=True)
+def simulate(clients: int, rounds: int, dim: int, samples: int, aggregator: str, workers: Optional[int], dataset: Optional[str], seed: int):
+    """Run an in-process federated simulation and print per-round latency, bytes and CPU."""
+    from .simulation import SimulationConfig, run_simulation
+
+    rep = run_simulation(
+        SimulationConfig(
+            num_clients=clients,
+            rounds=rounds,
+            dim=dim,
+            samples_per_client=samples,
+            aggregator=aggregator,
+            workers=workers,
+            dataset_path=dataset,
+            seed=seed,
+        )
+    )
+    click.echo(json.dumps(rep.to_dict(), indent=2))
+
+
 @aegis.command("demo")
 @click.option("--spawn-api/--no-spawn-api", default=True, show_default=True, help="Spawn local API server for the demo")
 @click.option("--rounds", type=int, default=3, show_default=True)
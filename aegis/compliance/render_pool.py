@@ -0,0 +1,108 @@
+"""
+Bounded worker pool for compliance-report rendering.
+
+Rendering a report (epsilon accounting, markdown, fpdf layout) is CPU-bound
+and synchronous, so it must not run on the uvicorn event loop. `ReportWorkerPool`
+runs it on a small thread pool. With `kind="process"`, PDF layout goes to a
+process pool so it doesn't compete for the GIL either. At most `max_pending`
+renders are admitted (running + waiting); beyond that, `RenderPoolBusy` is
+raised so the API can answer 503 instead of queueing without limit. The current
+depth is reported through `on_depth` (a Prometheus gauge in the API).
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+import asyncio
+import threading
+
+T = TypeVar("T")
+
+
+class RenderPoolBusy(RuntimeError):
+    """Raised when the render queue is full."""
+
+
+class ReportWorkerPool:
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_pending: int = 16,
+        kind: str = "thread",
+        on_depth: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        if kind not in {"thread", "process"}:
+            raise ValueError("kind must be 'thread' or 'process'")
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self.kind = kind
+        self.on_depth = on_depth
+        self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="aegis-report")
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.depth = 0
+
+    def _cpu_pool(self) -> Executor:
+        if self.kind != "process":
+            return self._threads
+        with self._lock:
+            if self._procs is None:
+                self._procs = ProcessPoolExecutor(max_workers=self.workers)
+            return self._procs
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.depth >= self.max_pending:
+                raise RenderPoolBusy(f"report queue full ({self.max_pending} pending)")
+            self.depth += 1
+            depth = self.depth
+        if self.on_depth is not None:
+            self.on_depth(depth)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.depth -= 1
+            depth = self.depth
+        if self.on_depth is not None:
+            self.on_depth(depth)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator["ReportWorkerPool"]:
+        """Admit one render (raises `RenderPoolBusy` when full) for the duration of the block."""
+        self._acquire()
+        try:
+            yield self
+        finally:
+            self._release()
+
+    async def run(self, fn: Callable[..., T], *args: Any, cpu: bool = False) -> T:
+        """Run `fn(*args)` off the event loop; `cpu=True` work may go to the process pool."""
+        pool = self._cpu_pool() if cpu else self._threads
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        """Queue a background render (an async job); the slot is held until it finishes."""
+        self._acquire()
+        try:
+            fut = self._threads.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(lambda _f: self._release())
+        return fut
+
+    def call(self, fn: Callable[..., T], *args: Any, cpu: bool = False) -> T:
+        """Synchronous variant of `run` for code already on a pool thread."""
+        if cpu and self.kind == "process":
+            return self._cpu_pool().submit(fn, *args).result()
+        return fn(*args)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._threads.shutdown(wait=wait)
+        if self._procs is not None:
+            self._procs.shutdown(wait=wait)
+
+
+__all__ = ["RenderPoolBusy", "ReportWorkerPool"]
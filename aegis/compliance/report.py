@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import asdict
-from typing import Dict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Mapping, Tuple, Union
 from typing import Optional
+import hashlib
+import importlib.metadata
+import threading
 
 from aegis.privacy_engine import DPConfig
 try:  # optional PDF dependency
@@ -14,8 +19,8 @@ except Exception:  # pragma: no cover - optional
 def generate_markdown(
     *,
     dp_config: DPConfig,
-    participants: Dict[str, bytes],
-    sessions: Dict[str, Dict[str, str]],
+    participants: Mapping[str, Any],
+    sessions: Mapping[str, Mapping[str, Any]],
     strategy: str,
     epsilon: Optional[float] = None,
     epsilon_steps: Optional[int] = None,
@@ -111,7 +116,62 @@ def generate_pdf(markdown: str) -> bytes:
     return out.encode("latin1")
 
 
-__all__ = ["generate_markdown", "generate_pdf"]
+@lru_cache(maxsize=None)
+def library_versions(app_version: str) -> Dict[str, str]:
+    """Versions of the libraries named in the report, probed once per process via package metadata."""
+    versions: Dict[str, str] = {"aegis_api": app_version}
+    for dist, label in (("fastapi", "fastapi"), ("pydantic", "pydantic"), ("flwr", "flwr"), ("opacus", "opacus"), ("torch", "torch")):
+        try:
+            versions[label] = importlib.metadata.version(dist)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return versions
+
+
+def report_etag(body: Union[str, bytes]) -> str:
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+class ReportCache:
+    """Small LRU of rendered reports keyed on (inputs fingerprint, steps, format).
+
+    The fingerprint must cover everything the report renders, so a cached entry
+    never outlives the state it was rendered from.
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Union[str, bytes], str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[Union[str, bytes], str]]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hit
+
+    def put(self, key: Hashable, body: Union[str, bytes]) -> str:
+        etag = report_etag(body)
+        with self._lock:
+            self._entries[key] = (body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+__all__ = ["generate_markdown", "generate_pdf", "library_versions", "report_etag", "ReportCache"]
 
 
 if __name__ == "__main__":  # lightweight CLI for report generation
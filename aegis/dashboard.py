@@ -5,6 +5,8 @@ import time
 import httpx
 import streamlit as st
 
+from aegis.events import iter_sse
+
 
 BASE_URL = os.environ.get("AEGIS_API_URL", "http://127.0.0.1:8000")
 
@@ -56,15 +58,15 @@ with col2:
     st.subheader("Metrics")
     placeholder = st.empty()
     chart_data = []
-    for _ in range(10):
-        try:
-            r = httpx.get(f"{base_url}/training/status", headers=headers("viewer"), params={"session_id": session_id}, timeout=2)
-            status = r.json().get("status", "?") if r.status_code == 200 else "error"
-            chart_data.append({"t": time.time(), "status": 1.0 if status == "running" else 0.0})
-            placeholder.line_chart(chart_data, x="t", y="status")
-            time.sleep(1)
-        except Exception:
-            time.sleep(1)
+    # Status changes are pushed by the server (SSE); the stream ends when the session does
+    try:
+        with httpx.stream("GET", f"{base_url}/training/events", headers=headers("viewer"), params={"session_id": session_id}, timeout=httpx.Timeout(5.0, read=30.0)) as r:
+            for evt in iter_sse(r.iter_lines()):
+                data = evt["data"]
+                chart_data.append({"t": time.time(), "round": data.get("current_round", 0), "epsilon": data.get("epsilon_estimate") or 0.0})
+                placeholder.line_chart(chart_data, x="t", y=["round", "epsilon"])
+    except Exception as e:
+        placeholder.write(f"event stream unavailable: {e}")
 
 st.divider()
 if st.button("Generate Compliance Report (PDF)"):
@@ -0,0 +1,126 @@
+"""
+In-process fan-out of training-session events to Server-Sent Events subscribers.
+
+The session executor publishes a status event whenever a session changes
+(start, round completed, stop, failure). The publish may come from any thread.
+Each subscriber is an SSE response coroutine with its own small queue on its own
+event loop, and delivery goes through `loop.call_soon_threadsafe`. One producer
+therefore serves any number of watchers without them polling. When a
+subscriber's queue is full, the oldest event is dropped, because status events
+are snapshots and only the newest one matters.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import json
+import threading
+
+
+TERMINAL_STATUSES = frozenset({"completed", "stopped", "failed"})
+
+
+def format_sse(data: Dict[str, Any], *, event: str = "status", id: Optional[str] = None) -> bytes:
+    lines = [f"event: {event}"]
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def iter_sse(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    """Parse SSE text lines into `{"event", "id", "data"}` dicts (comments are skipped)."""
+    event: Dict[str, Any] = {}
+    data: List[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                event["data"] = json.loads("\n".join(data))
+                event.setdefault("event", "message")
+                yield event
+            event, data = {}, []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "data":
+            data.append(value)
+        elif field in {"event", "id"}:
+            event[field] = value
+
+
+class Subscription:
+    def __init__(self, broker: "EventBroker", session_id: str, maxsize: int) -> None:
+        self.broker = broker
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class EventBroker:
+    def __init__(self, *, max_queue: int = 16) -> None:
+        self.max_queue = max(1, int(max_queue))
+        self._lock = threading.Lock()
+        self._subs: Dict[str, List[Subscription]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, session_id: str) -> Subscription:
+        """Register a subscriber; must be called from the subscriber's running event loop."""
+        sub = Subscription(self, session_id, self.max_queue)
+        with self._lock:
+            self._subs.setdefault(session_id, []).append(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.session_id, [])
+            if sub in subs:
+                subs.remove(sub)
+            if not subs:
+                self._subs.pop(sub.session_id, None)
+
+    def publish(self, session_id: str, event: Dict[str, Any]) -> int:
+        """Fan an event out to all subscribers of `session_id` (thread-safe); returns the count."""
+        with self._lock:
+            self._last[session_id] = event
+            subs = list(self._subs.get(session_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:  # subscriber loop already closed
+                self._unsubscribe(sub)
+        return len(subs)
+
+    def last(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._last.get(session_id)
+
+    def subscriber_count(self, session_id: Optional[str] = None) -> int:
+        with self._lock:
+            if session_id is not None:
+                return len(self._subs.get(session_id, ()))
+            return sum(len(v) for v in self._subs.values())
+
+
+__all__ = ["EventBroker", "Subscription", "TERMINAL_STATUSES", "format_sse", "iter_sse"]
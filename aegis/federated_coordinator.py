@@ -11,14 +11,22 @@ reference implementation for testing the aggregation & envelope logic.
 """
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
 import hashlib
 import hmac
 import json
 import logging
 import time
 
+import numpy as np
+
+from .checkpoint import Checkpoint, CheckpointInfo, CheckpointStore
+from .secure_aggregation import MaskedUpdate, SecureAggregationServer
+from .update_arena import UpdateArena
+from .update_codec import UpdateFormatError, parse_update
+
 try:  # optional Flower import
     import flwr as fl
 except Exception:  # pragma: no cover
@@ -33,59 +41,87 @@ class UpdateEnvelope:
     round: int
     params: List[float]
     signature: str  # hex
+    base_version: Optional[int] = None  # when set, params are a delta against this global version
+
+    @staticmethod
+    def _payload(client_id: str, round: int, params: Sequence[float], base_version: Optional[int]) -> bytes:
+        body: Dict[str, Any] = {"client_id": client_id, "round": round, "params": list(params)}
+        if base_version is not None:
+            body["base_version"] = base_version
+        return json.dumps(body, separators=(",", ":")).encode()
 
     @staticmethod
-    def sign(client_id: str, round: int, params: Sequence[float], key: bytes) -> "UpdateEnvelope":
-        payload = json.dumps({"client_id": client_id, "round": round, "params": list(params)}, separators=(",", ":")).encode()
+    def sign(client_id: str, round: int, params: Sequence[float], key: bytes, *, base_version: Optional[int] = None) -> "UpdateEnvelope":
+        payload = UpdateEnvelope._payload(client_id, round, params, base_version)
         sig = hmac.new(key, payload, hashlib.sha256).hexdigest()
-        return UpdateEnvelope(client_id=client_id, round=round, params=list(params), signature=sig)
+        return UpdateEnvelope(client_id=client_id, round=round, params=list(params), signature=sig, base_version=base_version)
 
     def verify(self, key: bytes) -> bool:
-        payload = json.dumps({"client_id": self.client_id, "round": self.round, "params": list(self.params)}, separators=(",", ":")).encode()
+        payload = self._payload(self.client_id, self.round, self.params, self.base_version)
         exp = hmac.new(key, payload, hashlib.sha256).hexdigest()
         return hmac.compare_digest(exp, self.signature)
 
 
 # -------------------------------- Aggregators -------------------------------- #
 
-def aggregate_trimmed_mean(updates: List[List[float]], trim_ratio: float = 0.1) -> List[float]:
-    if not updates:
-        return []
-    n = len(updates)
+def trimmed_mean_into(rows: np.ndarray, out: np.ndarray, *, trim_ratio: float = 0.1, scratch: Optional[np.ndarray] = None) -> np.ndarray:
+    """Coordinate-wise trimmed mean of `rows` (n, d) written into `out` (d,).
+
+    `scratch` (at least n rows) receives the column-sorted copy so no (n, d)
+    temporary is allocated when the caller preallocates it.
+    """
+    n = rows.shape[0]
     if n == 1:
-        return list(updates[0])
+        out[:] = rows[0]
+        return out
     k = max(0, int(trim_ratio * n))
-    d = len(updates[0])
-    out: List[float] = []
-    for j in range(d):
-        col = sorted(u[j] for u in updates)
-        trimmed = col[k: n - k if n - k > k else n]
-        if not trimmed:
-            trimmed = col
-        out.append(sum(trimmed) / len(trimmed))
+    work = scratch[:n] if scratch is not None else np.empty_like(rows)
+    work[:] = rows
+    work.sort(axis=0)
+    hi = n - k if n - k > k else n
+    if hi <= k:
+        k, hi = 0, n
+    np.mean(work[k:hi], axis=0, out=out)
+    return out
+
+
+def krum_into(rows: np.ndarray, out: np.ndarray, *, f: int = 1) -> np.ndarray:
+    """Krum: copy into `out` the row with the smallest sum of squared distances to its n-f-2 closest peers."""
+    n = rows.shape[0]
+    if n == 1:
+        out[:] = rows[0]
+        return out
+    # Direct differences, not |a|^2 + |b|^2 - 2ab: the Gram form cancels catastrophically
+    # when updates are close relative to their magnitude, which is exactly Krum's case
+    dists = np.empty((n, n))
+    diff = np.empty((n - 1, rows.shape[1]))
+    for i in range(n - 1):
+        d = diff[: n - 1 - i]
+        np.subtract(rows[i + 1:], rows[i], out=d)
+        dists[i, i + 1:] = dists[i + 1:, i] = np.einsum("ij,ij->i", d, d)
+    np.fill_diagonal(dists, np.inf)
+    dists.sort(axis=1)
+    m = n - f - 2
+    k = m if m > 0 else n - 1
+    scores = dists[:, :k].sum(axis=1)
+    out[:] = rows[int(np.argmin(scores))]
     return out
 
 
-def aggregate_krum(updates: List[List[float]], f: int = 1) -> List[float]:
-    # Basic multi-Krum: pick update with minimal sum of distances to its closest n-f-2 neighbors
-    # and return it directly (or average selected set; here select 1 for simplicity).
-    n = len(updates)
-    if n == 0:
+def aggregate_trimmed_mean(updates: Sequence[Sequence[float]], trim_ratio: float = 0.1) -> List[float]:
+    if len(updates) == 0:
         return []
+    rows = np.asarray(updates, dtype="float64")
+    return cast(List[float], trimmed_mean_into(rows, np.empty(rows.shape[1]), trim_ratio=trim_ratio).tolist())
 
-    def sqdist(a: List[float], b: List[float]) -> float:
-        return sum((x - y) ** 2 for x, y in zip(a, b))
 
-    m = n - f - 2
-    scores: List[Tuple[float, int]] = []
-    for i, ui in enumerate(updates):
-        dists = [sqdist(ui, uj) for j, uj in enumerate(updates) if j != i]
-        dists.sort()
-        k = m if m > 0 else len(dists)
-        score = sum(dists[:k])
-        scores.append((score, i))
-    _, best_idx = min(scores, key=lambda t: t[0])
-    return list(updates[best_idx])
+def aggregate_krum(updates: Sequence[Sequence[float]], f: int = 1) -> List[float]:
+    # Basic Krum: pick the update with minimal sum of distances to its closest n-f-2 neighbors
+    # and return it directly (no multi-Krum averaging).
+    if len(updates) == 0:
+        return []
+    rows = np.asarray(updates, dtype="float64")
+    return cast(List[float], krum_into(rows, np.empty(rows.shape[1]), f=f).tolist())
 
 
 # ------------------------------ Coordinator Core ----------------------------- #
@@ -103,12 +139,22 @@ class FederatedCoordinator:
         aggregator: str = "trimmed_mean",
         auth_keys: Optional[Dict[str, bytes]] = None,
         straggler: Optional[StragglerPolicy] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        max_cached_versions: int = 4,
+        max_clients: int = 1024,
     ) -> None:
         if aggregator not in {"trimmed_mean", "krum"}:
             raise ValueError("aggregator must be 'trimmed_mean' or 'krum'")
         self.aggregator = aggregator
         self.auth_keys = auth_keys or {}
         self.straggler = straggler or StragglerPolicy()
+        self.checkpoints = checkpoints
+        # Recent global models, so delta-encoded updates can be reconstructed
+        self.max_cached_versions = max(1, int(max_cached_versions))
+        self._global_versions: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        # Reusable (max_clients, d) update buffer, sized on the first update
+        self.max_clients = max(1, int(max_clients))
+        self.arena: Optional[UpdateArena] = None
         self.log = logging.getLogger("aegis.federated_coordinator")
 
     # Envelope auth
@@ -121,27 +167,150 @@ class FederatedCoordinator:
         )
         return ok
 
+    # Global model versions (delta reconstruction)
+    def publish_global(self, version: int, params: Sequence[float] | np.ndarray) -> None:
+        """Cache a global-model version that clients may send deltas against."""
+        self._global_versions[int(version)] = np.array(params, dtype="float64")
+        self._global_versions.move_to_end(int(version))
+        while len(self._global_versions) > self.max_cached_versions:
+            self._global_versions.popitem(last=False)
+
+    def global_version(self, version: int) -> Optional[np.ndarray]:
+        return self._global_versions.get(int(version))
+
+    # Per-round update arena
+    def begin_round(self) -> None:
+        """Forget the previous round's updates; the arena memory is reused."""
+        if self.arena is not None:
+            self.arena.reset()
+
+    def _claim_row(self, client_id: str, base_version: Optional[int], dim: int) -> Optional[np.ndarray]:
+        """Claim an arena row for an authenticated update, or None if it must be skipped."""
+        if base_version is not None:
+            base = self.global_version(base_version)
+            if base is None or base.size != dim:
+                self.log.warning("dropping delta with unknown or mismatched base", extra={"client_id": client_id, "base_version": base_version})
+                return None
+        arena = self.arena
+        if arena is None or (arena.count == 0 and arena.dim != dim):
+            arena = self.arena = UpdateArena(self.max_clients, dim)
+        elif arena.dim != dim:
+            self.log.warning("dropping update with mismatched dimension", extra={"client_id": client_id, "dim": dim, "expected": arena.dim})
+            return None
+        if arena.count >= arena.max_clients:
+            arena = self.arena = arena.grown(arena.max_clients * 2)
+            self.max_clients = arena.max_clients
+            self.log.warning("update arena grown", extra={"max_clients": arena.max_clients})
+        try:
+            return arena.claim(client_id, base_version)
+        except ValueError:
+            self.log.warning("ignoring duplicate update", extra={"client_id": client_id})
+            return None
+
+    def _accept(self, client_id: str, base_version: Optional[int], values: Any) -> bool:
+        row = self._claim_row(client_id, base_version, len(values))
+        if row is None:
+            return False
+        row[:] = values
+        return True
+
+    def _finish_round(self, arena: Optional[UpdateArena] = None) -> Optional[np.ndarray]:
+        """Aggregate the arena's filled rows into its output buffer.
+
+        Trimmed mean and Krum are translation-equivariant, so when every update is a
+        delta against the same base we aggregate the deltas directly and add the base
+        once; mixed rounds reconstruct deltas in place first.
+        """
+        arena = self.arena if arena is None else arena
+        if arena is None or arena.count == 0:
+            return None
+        rows = arena.rows()
+        bvs = arena.base_versions[: arena.count]
+        first = int(bvs[0])
+        uniform = bool((bvs == first).all())
+        if not uniform:
+            for i in range(arena.count):
+                bv = int(bvs[i])
+                if bv != UpdateArena.NO_BASE:
+                    np.add(rows[i], self._global_versions[bv], out=rows[i])
+                    bvs[i] = UpdateArena.NO_BASE
+        if self.aggregator == "trimmed_mean":
+            trimmed_mean_into(rows, arena.out, scratch=arena.scratch)
+        else:
+            krum_into(rows, arena.out)
+        if uniform and first != UpdateArena.NO_BASE:
+            np.add(arena.out, self._global_versions[first], out=arena.out)
+        return arena.out
+
     # Aggregation
-    def aggregate(self, envelopes: List[UpdateEnvelope]) -> List[float]:
-        if not envelopes:
-            return []
-        # auth filter
-        valid_updates = [e.params for e in envelopes if self.verify_envelope(e)]
+    def aggregate_array(self, envelopes: List[UpdateEnvelope]) -> Optional[np.ndarray]:
+        """Like `aggregate`, but returns the arena's output buffer (valid until the next round)."""
+        self.begin_round()
+        valid = 0
+        for e in envelopes:
+            if self.verify_envelope(e) and self._accept(e.client_id, e.base_version, e.params):
+                valid += 1
         self.log.info(
             "aggregate",
             extra={
                 "aggregator": self.aggregator,
-                "round": envelopes[0].round,
+                "round": envelopes[0].round if envelopes else None,
                 "received": len(envelopes),
-                "valid": len(valid_updates),
+                "valid": valid,
             },
         )
-        if not valid_updates:
+        return self._finish_round()
+
+    def aggregate(self, envelopes: List[UpdateEnvelope]) -> List[float]:
+        if not envelopes:
             return []
-        if self.aggregator == "trimmed_mean":
-            return aggregate_trimmed_mean(valid_updates)
-        else:
-            return aggregate_krum(valid_updates)
+        out = self.aggregate_array(envelopes)
+        return cast(List[float], out.tolist()) if out is not None else []
+
+    def aggregate_wire(self, payloads: List[bytes]) -> List[float]:
+        """Aggregate binary (optionally delta-encoded / zstd-compressed) updates.
+
+        Each payload is authenticated before decoding and then decoded straight into
+        its arena row.
+        """
+        self.begin_round()
+        valid = 0
+        for data in payloads:
+            try:
+                upd = parse_update(data)
+            except UpdateFormatError:
+                continue
+            key = self.auth_keys.get(upd.client_id)
+            if key is None or not upd.verify(key):
+                continue
+            row = self._claim_row(upd.client_id, upd.base_version, upd.n)
+            if row is None:
+                continue
+            try:
+                upd.decode_into(row)
+            except UpdateFormatError:
+                assert self.arena is not None
+                self.arena.release(upd.client_id)
+                continue
+            valid += 1
+        self.log.info("aggregate_wire", extra={"aggregator": self.aggregator, "received": len(payloads), "valid": valid})
+        out = self._finish_round()
+        return cast(List[float], out.tolist()) if out is not None else []
+
+    def aggregate_arena(self, arena: UpdateArena) -> Optional[np.ndarray]:
+        """Aggregate an externally filled arena (e.g. streamed API uploads, already authenticated).
+
+        Rows that are deltas against a global version no longer cached are dropped first.
+        The result is the arena's output buffer; the coordinator's own arena is untouched.
+        """
+        received = len(arena)
+        for client_id, idx in sorted(arena.clients().items(), key=lambda kv: -kv[1]):
+            bv = int(arena.base_versions[idx])
+            if bv != UpdateArena.NO_BASE and self.global_version(bv) is None:
+                self.log.warning("dropping delta with unknown or mismatched base", extra={"client_id": client_id, "base_version": bv})
+                arena.release(client_id)
+        self.log.info("aggregate_arena", extra={"aggregator": self.aggregator, "received": received, "valid": len(arena)})
+        return self._finish_round(arena)
 
     def aggregate_with_retries(self, envelope_attempts: List[List[UpdateEnvelope]], *, min_required: int = 1) -> List[float]:
         """Aggregate across multiple attempts to simulate straggler retries.
@@ -156,17 +325,18 @@ class FederatedCoordinator:
             - If not enough updates after allowed attempts (max_retries + 1 total),
               returns aggregation of whatever valid updates were collected (or []).
         """
-        valid: List[List[float]] = []
+        self.begin_round()
         max_attempts = max(1, int(self.straggler.max_retries) + 1)
         attempts = 0
+        valid = 0
         for batch in envelope_attempts:
             attempts += 1
-            # extend valid with any newly verified updates
+            # accumulate any newly verified updates into the arena
             for e in batch:
-                if self.verify_envelope(e):
-                    valid.append(e.params)
-            if len(valid) >= min_required:
-                return aggregate_trimmed_mean(valid) if self.aggregator == "trimmed_mean" else aggregate_krum(valid)
+                if self.verify_envelope(e) and self._accept(e.client_id, e.base_version, e.params):
+                    valid += 1
+            if valid >= min_required:
+                break
             if attempts >= max_attempts:
                 break
             # Backoff before next attempt to simulate timeout/retry window
@@ -175,9 +345,66 @@ class FederatedCoordinator:
             except Exception:  # pragma: no cover
                 pass
 
-        if not valid:
+        out = self._finish_round()
+        return cast(List[float], out.tolist()) if out is not None else []
+
+    # Secure aggregation (pairwise masking): the coordinator only ever sees the sum
+    def verify_masked(self, updates: List[MaskedUpdate], round: int) -> Dict[str, Any]:
+        """Auth-filter masked updates for `round`; the returned client set is the round's survivor list.
+
+        The round is under the MAC, so an update replayed from an earlier round verifies
+        and must be rejected here, or its masks would not cancel in this round's sum.
+        """
+        out: Dict[str, Any] = {}
+        for u in updates:
+            if u.round != round:
+                continue
+            key = self.auth_keys.get(u.client_id)
+            if key is not None and u.verify(key):
+                out[u.client_id] = u.masked
+        return out
+
+    def aggregate_secure(
+        self,
+        masked: Dict[str, Any],
+        server: SecureAggregationServer,
+        revealed: Dict[str, Dict[str, Dict[str, Tuple[int, int]]]],
+        round: int,
+    ) -> List[float]:
+        """Mean of the survivors' inputs, recovered from masked updates and revealed shares.
+
+        Robust aggregators need individual updates, so secure rounds always use the mean.
+        """
+        if not masked:
             return []
-        return aggregate_trimmed_mean(valid) if self.aggregator == "trimmed_mean" else aggregate_krum(valid)
+        total = server.unmask_sum(masked, revealed, round)
+        self.log.info("aggregate_secure", extra={"round": round, "survivors": len(masked), "registered": len(server.public_keys)})
+        return cast(List[float], (total / len(masked)).tolist())
+
+    # Checkpointing
+    def commit_round(self, session_id: str, round: int, params: Sequence[float] | np.ndarray) -> Optional[CheckpointInfo]:
+        """Persist a round's aggregate as the session's latest checkpoint (no-op without a store)."""
+        if self.checkpoints is None or not len(params):
+            return None
+        info = self.checkpoints.save(session_id, round, params)
+        self.log.info(
+            "checkpoint",
+            extra={
+                "session_id": session_id,
+                "round": round,
+                "checkpoint_id": info.checkpoint_id,
+                "bytes_written": info.bytes_written,
+                "bytes_deduplicated": info.bytes_deduplicated,
+                "bytes_blob": info.bytes_blob,
+            },
+        )
+        return info
+
+    def resume(self, session_id: str) -> Optional[Checkpoint]:
+        """Return the latest checkpoint of a session so training can continue after it."""
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.resume(session_id)
 
     # Health and stragglers (scaffolding; integration tested via examples later)
     def health_ping(self, client_id: str) -> Dict[str, str]:
@@ -188,6 +415,8 @@ __all__ = [
     "UpdateEnvelope",
     "aggregate_trimmed_mean",
     "aggregate_krum",
+    "trimmed_mean_into",
+    "krum_into",
     "StragglerPolicy",
     "FederatedCoordinator",
 ]
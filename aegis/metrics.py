@@ -0,0 +1,190 @@
+"""
+Request metrics for every API route, recorded by one pure-ASGI middleware.
+
+`MetricsMiddleware` labels each request by its route *template* (for example
+`/compliance/report/jobs/{job_id}`, never the raw path) and by method. Label
+cardinality is therefore bounded by the route table: unknown paths collapse
+into `<unmatched>` and unusual methods into `OTHER`. It records:
+
+- `aegis_requests_total{endpoint,method,status}`
+- `aegis_request_latency_seconds{endpoint,method}`: time until the response
+  headers are sent, so long-lived SSE/NDJSON streams do not skew p95
+- `aegis_requests_in_flight{endpoint,method}`
+- `aegis_response_size_bytes{endpoint,method}`: body bytes actually sent
+
+Hot-path cost is kept to a dict lookup for static routes (a few precompiled
+regexes for parameterised ones), cached label children, and two
+`perf_counter` calls. `benchmarks/benchmark_metrics_middleware.py` checks the
+overhead budget (< 20µs per request).
+"""
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional, Pattern, Sequence, Tuple, cast
+import importlib
+import time
+
+try:  # optional metrics dependency
+    _prom: Any = importlib.import_module("prometheus_client")
+except Exception:  # pragma: no cover - optional
+    _prom = None
+
+
+class NullMetric:
+    """What a metric looks like to callers; the no-op stand-in when prometheus_client is missing."""
+
+    def labels(self, *_a: Any, **_k: Any) -> "NullMetric":
+        return self
+
+    def inc(self, amount: float = 1.0) -> None:
+        return None
+
+    def dec(self, amount: float = 1.0) -> None:
+        return None
+
+    def set(self, value: float) -> None:
+        return None
+
+    def observe(self, amount: float) -> None:
+        return None
+
+
+def metric(kind: str, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any) -> NullMetric:
+    """A prometheus_client `Counter`, `Gauge` or `Histogram`, or a `NullMetric` without the library."""
+    if _prom is None:
+        return NullMetric()
+    return cast(NullMetric, getattr(_prom, kind)(name, documentation, list(labelnames), **kwargs))
+
+
+def exposition() -> Optional[Tuple[bytes, str]]:
+    """The `/metrics` body and content type, or None when metrics are disabled."""
+    if _prom is None:
+        return None
+    return _prom.generate_latest(), _prom.CONTENT_TYPE_LATEST
+
+
+REQ_COUNT = metric("Counter", "aegis_requests_total", "Total API requests", ["endpoint", "method", "status"])
+REQ_LATENCY = metric("Histogram", "aegis_request_latency_seconds", "Request latency (until response headers)", ["endpoint", "method"])
+REQ_IN_FLIGHT = metric("Gauge", "aegis_requests_in_flight", "Requests currently being handled", ["endpoint", "method"])
+RESP_SIZE = metric(
+    "Histogram",
+    "aegis_response_size_bytes",
+    "Response body size",
+    ["endpoint", "method"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+UNMATCHED = "<unmatched>"
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class _RouteIndex:
+    """Path -> route template: exact match for static routes, regexes for parameterised ones."""
+
+    def __init__(self, routes: List[Any]) -> None:
+        self.size = len(routes)
+        self.static: Dict[str, str] = {}
+        self.dynamic: List[Tuple[Pattern[str], str]] = []
+        for route in routes:
+            path = getattr(route, "path", None)
+            regex = getattr(route, "path_regex", None)
+            if path is None or regex is None:
+                continue
+            if getattr(route, "param_convertors", None):
+                self.dynamic.append((regex, path))
+            else:
+                self.static.setdefault(path, path)
+
+    def template(self, path: str) -> str:
+        hit = self.static.get(path)
+        if hit is not None:
+            return hit
+        for regex, template in self.dynamic:
+            if regex.match(path):
+                return template
+        return UNMATCHED
+
+
+class _Children:
+    """Label children for one (endpoint, method), resolved once."""
+
+    __slots__ = ("latency", "size", "in_flight", "counts", "endpoint", "method")
+
+    def __init__(self, endpoint: str, method: str) -> None:
+        self.endpoint = endpoint
+        self.method = method
+        self.latency = REQ_LATENCY.labels(endpoint, method)
+        self.size = RESP_SIZE.labels(endpoint, method)
+        self.in_flight = REQ_IN_FLIGHT.labels(endpoint, method)
+        self.counts: Dict[int, Any] = {}
+
+    def count(self, status: int) -> None:
+        child = self.counts.get(status)
+        if child is None:
+            child = self.counts[status] = REQ_COUNT.labels(self.endpoint, self.method, str(status))
+        child.inc()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, *, routes: Optional[List[Any]] = None) -> None:
+        self.app = app
+        self._routes = routes  # default: the Starlette app's routes from scope["app"]
+        self._index: Optional[_RouteIndex] = None
+        self._children: Dict[Tuple[str, str], _Children] = {}
+
+    def _route_index(self, scope: Scope) -> _RouteIndex:
+        routes = self._routes if self._routes is not None else getattr(scope.get("app"), "routes", [])
+        index = self._index
+        if index is None or index.size != len(routes):
+            index = self._index = _RouteIndex(list(routes))
+        return index
+
+    def _labels(self, scope: Scope) -> _Children:
+        method = scope.get("method", "GET")
+        if method not in _METHODS:
+            method = "OTHER"
+        endpoint = self._route_index(scope).template(scope.get("path", ""))
+        key = (endpoint, method)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = _Children(endpoint, method)
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        m = self._labels(scope)
+        t0 = time.perf_counter()
+        status = 500
+        size = 0
+        started = False
+
+        async def _send(message: Message) -> None:
+            nonlocal status, size, started
+            kind = message["type"]
+            if kind == "http.response.start":
+                status = message["status"]
+                started = True
+                m.latency.observe(time.perf_counter() - t0)
+            elif kind == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        m.in_flight.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            m.in_flight.dec()
+            if not started:
+                m.latency.observe(time.perf_counter() - t0)
+            m.count(status)
+            m.size.observe(size)
+
+
+__all__ = ["MetricsMiddleware", "NullMetric", "metric", "exposition", "REQ_COUNT", "REQ_LATENCY", "REQ_IN_FLIGHT", "RESP_SIZE", "UNMATCHED"]
@@ -130,6 +130,15 @@ class DifferentialPrivacyEngine:
 
     _spent_epsilon: float = 0.0
 
+    @property
+    def spent_epsilon(self) -> float:
+        return self._spent_epsilon
+
+    @spent_epsilon.setter
+    def spent_epsilon(self, value: float) -> None:
+        """Adopt a total tracked elsewhere (e.g. the budget shared by all API workers)."""
+        self._spent_epsilon = float(value)
+
     def reset_budget(self) -> None:
         self._spent_epsilon = 0.0
 
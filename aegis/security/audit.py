@@ -6,9 +6,20 @@ import json
 import logging
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
-import hmac
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import atexit
 import sqlite3
+import threading
+
+from .audit_query import AuditFilter, QueryResult, dated_path, ensure_rollup, query_records, query_sqlite
+from .audit_segments import read_archive
+from .audit_sign import RowSigner
+from .audit_writer import AuditWriter, writer_from_env
+from .merkle import MerkleTree, leaf_hash
+
+# Merkle nodes below this level are dropped per completed block of 2**10 events
+# and recomputed from the durable sink when an old proof needs them
+_MERKLE_PRUNE_BELOW = 10
 
 
 @dataclass
@@ -21,39 +32,65 @@ class AuditEvent:
     prev_hash: Optional[str] = None
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self), separators=(",", ":"))
+        # Flat dataclass of primitives: vars() matches asdict() field order without the deep copy
+        return json.dumps(vars(self), separators=(",", ":"))
 
 
 class AuditLogger:
+    """Hash-chained audit log.
+
+    Recent events live in a fixed-capacity ring buffer (`AEGIS_AUDIT_BUFFER_EVENTS`,
+    default 50000). Older ones are read back from the durable sink (SQLite or
+    JSONL) through the same `event()` / `query()` API, and the chain flag,
+    checksum and Merkle tree are all maintained incrementally, so memory stays
+    flat under sustained load. Without a durable sink nothing can be read back,
+    so the buffer is unbounded.
+    """
+
     def __init__(self) -> None:
         self._prev: Optional[str] = None
         self._log = logging.getLogger("aegis.audit")
-        # Store events in-memory for compliance/audit testing
-        self._events = []
+        self._lock = threading.Lock()
+        # Maintained on append, so readers never rescan the whole chain
+        self._chain_valid = True
+        self._checksum = hashlib.sha256()
+        self._count = 0
         self._outfile = os.environ.get("AEGIS_AUDIT_LOG_FILE")
         # Optional durable backend (SQLite) with simple daily rotation
         self._sqlite_path = os.environ.get("AEGIS_AUDIT_SQLITE_PATH")
-        self._hmac_key = os.environ.get("AEGIS_AUDIT_HMAC_KEY")
-        self._sqlite_conn: Optional[sqlite3.Connection] = None
-        if self._sqlite_path:
-            self._sqlite_conn = self._open_sqlite()
+        hmac_key = os.environ.get("AEGIS_AUDIT_HMAC_KEY")
+        self._signer = RowSigner(hmac_key) if hmac_key else None
+        # Durable sinks are written by a background group-commit thread (see audit_writer)
+        self._writer: Optional[AuditWriter] = writer_from_env(
+            self._outfile,
+            self._open_sqlite if self._sqlite_path else None,
+            self._rotated_sqlite_path if self._sqlite_path else None,
+        )
+        self._capacity: Optional[int] = None
+        self._ring: List[Optional[AuditEvent]] = []
+        if self._writer is not None:
+            atexit.register(self._writer.close)
+            # Evicted events must already be with the writer, never still queued behind it
+            floor = self._writer.max_queue + self._writer.max_batch
+            self._capacity = max(int(os.environ.get("AEGIS_AUDIT_BUFFER_EVENTS", "50000")), floor)
+            self._ring = [None] * self._capacity
+        # RFC 6962 tree over each event's JSON line: O(log n) inclusion/consistency proofs
+        if self._writer is not None:
+            self._merkle = MerkleTree(prune_below=_MERKLE_PRUNE_BELOW, leaves=self._leaf_hashes)
+        else:
+            self._merkle = MerkleTree()
 
     def _rotated_sqlite_path(self) -> str:
         assert self._sqlite_path is not None
-        today = datetime.now(timezone.utc).strftime("%Y%m%d")
-        if "{date}" in self._sqlite_path:
-            return self._sqlite_path.format(date=today)
-        base = self._sqlite_path
-        # append date before extension if present
-        if "." in os.path.basename(base):
-            root, ext = os.path.splitext(base)
-            return f"{root}.{today}{ext}"
-        return f"{base}.{today}.sqlite"
+        return dated_path(self._sqlite_path, datetime.now(timezone.utc).strftime("%Y%m%d"))
 
     def _open_sqlite(self) -> sqlite3.Connection:
         path = self._rotated_sqlite_path()
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
         conn = sqlite3.connect(path, isolation_level=None)
+        # WAL: appends don't block readers (verification, queries); NORMAL syncs at checkpoints
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS audit_events (
@@ -68,53 +105,223 @@ class AuditLogger:
             )
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_timestamp ON audit_events (timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_actor_action ON audit_events (actor, action)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_prev_hash ON audit_events (prev_hash)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_action ON audit_events (action)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_outcome ON audit_events (outcome)")
+        # Hourly counts for /audit/query, kept by a trigger inside each batch's transaction
+        ensure_rollup(conn)
         return conn
 
     def _hmac_sign(self, params_hash: str, prev_hash: Optional[str]) -> Optional[str]:
-        if not self._hmac_key:
-            return None
-        key = self._hmac_key.encode()
-        msg = (params_hash + (prev_hash or "")).encode()
-        return hmac.new(key, msg, hashlib.sha256).hexdigest()
+        return self._signer.sign(params_hash, prev_hash) if self._signer is not None else None
 
     def emit(self, actor: str, action: str, params: Dict[str, Any], outcome: str) -> AuditEvent:
+        with self._lock:
+            return self._emit_locked(actor, action, params, outcome)
+
+    def _emit_locked(self, actor: str, action: str, params: Dict[str, Any], outcome: str) -> AuditEvent:
         ts = datetime.now(timezone.utc).isoformat()
         payload = json.dumps(params, separators=(",", ":")).encode()
         ph = self._prev.encode() if self._prev else b""
         h = hashlib.sha256(ph + payload).hexdigest()
         evt = AuditEvent(timestamp=ts, actor=actor, action=action, params_hash=h, outcome=outcome, prev_hash=self._prev)
         try:
-            self._log.info("audit", extra={"event": asdict(evt)})
-            # Best-effort file append if configured
-            if self._outfile:
-                with open(self._outfile, "a", encoding="utf-8") as fh:
-                    fh.write(evt.to_json() + "\n")
-            # Best-effort SQLite insert if configured
-            if self._sqlite_conn is not None:
-                sig = self._hmac_sign(evt.params_hash, evt.prev_hash)
-                self._sqlite_conn.execute(
-                    "INSERT INTO audit_events (timestamp, actor, action, params_hash, outcome, prev_hash, signature) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (evt.timestamp, evt.actor, evt.action, evt.params_hash, evt.outcome, evt.prev_hash, sig),
-                )
+            if self._log.isEnabledFor(logging.INFO):
+                self._log.info("audit", extra={"event": asdict(evt)})
         except Exception:
             # Logging handler misconfig shouldn't break audit chain; continue silently.
             pass
-        self._prev = h
-        self._events.append(evt)
+        line = evt.to_json()
+        self._append(evt, line)
+        if self._writer is not None:
+            # Enqueued under the lock, so sinks see events in chain order
+            row = None
+            if self._sqlite_path:
+                sig = self._hmac_sign(evt.params_hash, evt.prev_hash)
+                row = (evt.timestamp, evt.actor, evt.action, evt.params_hash, evt.outcome, evt.prev_hash, sig)
+            self._writer.submit((line, row))
         return evt
 
-    def events(self):
-        return list(self._events)
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every emitted event has reached the durable sinks."""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def _append(self, evt: AuditEvent, line: Optional[str] = None) -> None:
+        if self._count and evt.prev_hash != self._prev:
+            self._chain_valid = False
+        self._prev = evt.params_hash
+        self._checksum.update(evt.params_hash.encode())
+        self._merkle.append((line if line is not None else evt.to_json()).encode())
+        if self._capacity is None:
+            self._ring.append(evt)
+        else:
+            self._ring[self._count % self._capacity] = evt
+        self._count += 1
+
+    def _first_buffered(self) -> int:
+        return 0 if self._capacity is None else max(0, self._count - self._capacity)
+
+    def _buffered(self, seq: int) -> Optional[AuditEvent]:
+        """The buffered event `seq`, or None once it has been evicted."""
+        if self._capacity is None:
+            return self._ring[seq]
+        evt = self._ring[seq % self._capacity]
+        # Re-check after the read: a concurrent append may have overwritten the slot
+        return evt if seq >= self._first_buffered() else None
+
+    def _iter(self, start: int, end: int) -> Iterator[Tuple[int, AuditEvent]]:
+        """`(seq, event)` for [start, end): the buffer first, evicted events from the durable sink."""
+        seq = max(0, start)
+        while seq < end:
+            first = self._first_buffered()
+            if seq >= first:
+                evt = self._buffered(seq)
+                if evt is not None:
+                    yield seq, evt
+                    seq += 1
+                continue
+            assert self._writer is not None
+            stop = min(end, first)
+            if self._writer.spill.durable < stop:
+                self._writer.flush()
+            for seq, fields in self._writer.spill.read(seq, stop):
+                yield seq, AuditEvent(**fields)
+            seq = stop
+
+    def _leaf_hashes(self, start: int, end: int) -> List[bytes]:
+        return [leaf_hash(evt.to_json().encode()) for _seq, evt in self._iter(start, end)]
+
+    def events(self) -> List[AuditEvent]:
+        """The buffered (most recent) events; use `query()` to reach the whole log."""
+        return [evt for _seq, evt in self._iter(self._first_buffered(), self._count)]
+
+    def event(self, seq: int) -> AuditEvent:
+        if not 0 <= seq < self._count:
+            raise IndexError("audit event index out of range")
+        for _seq, evt in self._iter(seq, seq + 1):
+            return evt
+        raise IndexError(f"audit event {seq} is no longer available")
+
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def chain_valid(self) -> bool:
+        """Chain validity tracked incrementally as events are appended (see `verify_chain`)."""
+        return self._chain_valid
+
+    def query(
+        self,
+        *,
+        after: int = -1,
+        actor: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[Tuple[int, AuditEvent]]:
+        """Lazily yield `(seq, event)` after sequence number `after`, oldest first.
+
+        `since`/`until` are ISO-8601 timestamps (inclusive); events are time-ordered, so
+        iteration stops past `until`. The start is found by bisection in the buffer,
+        or from the sink's sparse time index when `since` predates the buffer, and
+        evicted events are streamed from the durable sink.
+        """
+        end = self._count
+        start = max(0, after + 1)
+        if since is not None and start < end:
+            first = max(start, self._first_buffered())
+            buffered = self._buffered(first) if first < end else None
+            if buffered is not None and buffered.timestamp <= since:
+                # bisect_left over the buffered ring (bisect's key= needs Python 3.10)
+                lo, hi = first, end
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if self.event(mid).timestamp < since:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                start = lo
+            elif self._writer is not None and start < first:
+                start = max(start, self._writer.spill.start_for(since))
+        for seq, evt in self._iter(start, end):
+            if since is not None and evt.timestamp < since:
+                continue
+            if until is not None and evt.timestamp > until:
+                return
+            if (actor is None or evt.actor == actor) and (action is None or evt.action == action):
+                yield seq, evt
+
+    def search(
+        self,
+        flt: AuditFilter,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        count: bool = False,
+        group_by: Tuple[str, ...] = (),
+    ) -> QueryResult:
+        """Filtered page, count and group-by counts over the whole durable log (see `audit_query`).
+
+        SQLite answers from its indexes and hourly rollup; otherwise the JSONL archive,
+        or without a durable sink the in-memory buffer, is filtered in order.
+        Raises ValueError for a malformed cursor.
+        """
+        opts: Dict[str, Any] = dict(limit=limit, cursor=cursor, count=count, group_by=group_by)
+        if self._sqlite_path or self._outfile:
+            self.flush()
+        if self._sqlite_path:
+            return query_sqlite(self._sqlite_path, flt, **opts)
+        if self._outfile:
+            return query_records("jsonl", read_archive(self._outfile, flt.since, flt.until), flt, **opts)
+        records = (
+            vars(evt)
+            for _seq, evt in self.query(actor=flt.actor, action=flt.action, since=flt.since, until=flt.until)
+        )
+        return query_records("memory", records, flt, **opts)
 
     def verify_chain(self) -> bool:
-        for i in range(1, len(self._events)):
-            if self._events[i].prev_hash != self._events[i - 1].params_hash:
+        """Re-walk the buffered events; the evicted prefix is covered by the incremental flag."""
+        prev: Optional[AuditEvent] = None
+        for _seq, evt in self._iter(self._first_buffered(), self._count):
+            if prev is not None and evt.prev_hash != prev.params_hash:
                 return False
-        return True
+            prev = evt
+        return self._chain_valid
 
     def checksum(self) -> str:
-        """Compute a chain checksum as sha256 of concatenated params_hash values."""
-        if not self._events:
-            return hashlib.sha256(b"").hexdigest()
-        data = b"".join(e.params_hash.encode() for e in self._events)
-        return hashlib.sha256(data).hexdigest()
+        """Chain checksum: sha256 of the concatenated params_hash values (kept incrementally)."""
+        return self._checksum.copy().hexdigest()
+
+    def merkle_root(self, size: Optional[int] = None) -> str:
+        """Hex Merkle root of the whole log (cached) or of its first `size` events."""
+        return (self._merkle.root() if size is None else self._merkle.root_at(size)).hex()
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> Dict[str, Any]:
+        """Audit path proving event `index` is in the tree of `size` events (default: current)."""
+        size = len(self._merkle) if size is None else size
+        proof = self._merkle.inclusion_proof(index, size)
+        return {
+            "index": index,
+            "tree_size": size,
+            "leaf_hash": self._merkle.leaf(index).hex(),
+            "proof": [p.hex() for p in proof],
+            "root": self._merkle.root_at(size).hex(),
+        }
+
+    def consistency_proof(self, first: int, second: Optional[int] = None) -> Dict[str, Any]:
+        """Proof that the log at `first` events is a prefix of the log at `second` events."""
+        second = len(self._merkle) if second is None else second
+        proof = self._merkle.consistency_proof(first, second)
+        return {
+            "first": first,
+            "second": second,
+            "first_root": self._merkle.root_at(first).hex(),
+            "second_root": self._merkle.root_at(second).hex(),
+            "proof": [p.hex() for p in proof],
+        }
@@ -0,0 +1,336 @@
+"""
+Indexed queries over the durable audit log (`GET /audit/query`).
+
+Filters are exact `actor` / `action` / `outcome` matches and an inclusive
+ISO-8601 time range. A query can return a page of matching events, their
+total count, and counts grouped by any of `GROUP_FIELDS`.
+
+With SQLite (`AEGIS_AUDIT_SQLITE_PATH`), nothing is scanned in Python:
+
+- Only the daily databases whose date overlaps the range are opened.
+- Events are stored in time order, so the range maps to an id range with two
+  lookups on the timestamp index. Filters then run on the `(actor, action)`,
+  `action` and `outcome` indexes, which SQLite keys by id, so a page is an
+  index range scan. Pages resume from a `<date>:<id>` cursor.
+- Each database keeps `audit_counts(hour, actor, action, outcome, n)`, an hourly
+  rollup maintained by a trigger in the same transaction as the insert.
+  Counts for whole hours are summed from that small table. Only the partial
+  hours at the two ends of the range are counted from `audit_events`, through
+  the id range.
+
+Without SQLite, the JSONL archive answers: the segment manifest selects the
+segments that overlap the range, and they are read with the window scanner.
+Without any durable sink, the in-memory buffer answers. Both paths filter and
+count in Python, and their cursor is a plain offset.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import glob
+import itertools
+import os
+import re
+import sqlite3
+
+GROUP_FIELDS = ("actor", "action", "outcome", "day", "hour")
+_EVENT_COLUMNS = ("timestamp", "actor", "action", "params_hash", "outcome", "prev_hash")
+_DATE = re.compile(r"(\d{8})")
+
+_ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS audit_counts (
+    hour TEXT NOT NULL,
+    actor TEXT NOT NULL,
+    action TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (hour, actor, action, outcome)
+) WITHOUT ROWID
+"""
+_ROLLUP_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS audit_counts_insert AFTER INSERT ON audit_events BEGIN
+    INSERT INTO audit_counts (hour, actor, action, outcome, n)
+    VALUES (substr(NEW.timestamp, 1, 13), NEW.actor, NEW.action, NEW.outcome, 1)
+    ON CONFLICT (hour, actor, action, outcome) DO UPDATE SET n = n + 1;
+END
+"""
+
+
+@dataclass
+class AuditFilter:
+    actor: Optional[str] = None
+    action: Optional[str] = None
+    outcome: Optional[str] = None
+    since: Optional[str] = None  # inclusive, UTC ISO-8601
+    until: Optional[str] = None
+
+    def matches(self, rec: Dict[str, Any]) -> bool:
+        ts = rec.get("timestamp", "")
+        return (
+            (self.actor is None or rec.get("actor") == self.actor)
+            and (self.action is None or rec.get("action") == self.action)
+            and (self.outcome is None or rec.get("outcome") == self.outcome)
+            and (self.since is None or ts >= self.since)
+            and (self.until is None or ts <= self.until)
+        )
+
+    def _where(self) -> Tuple[List[str], List[Any]]:
+        """Equality filters as SQL. Actor alone is a handful of roles: scan by id rather than sort its index."""
+        clauses, args = [], []
+        for col in ("actor", "action", "outcome"):
+            value = getattr(self, col)
+            if value is not None:
+                only_actor = col == "actor" and self.action is None and self.outcome is None
+                clauses.append(f"{'+' if only_actor else ''}{col} = ?")
+                args.append(value)
+        return clauses, args
+
+
+@dataclass
+class QueryResult:
+    backend: str  # "sqlite", "jsonl" or "memory"
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    count: Optional[int] = None
+    groups: Optional[List[Dict[str, Any]]] = None
+
+
+def ensure_rollup(conn: sqlite3.Connection) -> None:
+    """Create the hourly rollup and its trigger, backfilling it once for events written before it existed."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_counts'").fetchone()
+    if exists:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(_ROLLUP_DDL)
+        conn.execute(
+            "INSERT INTO audit_counts (hour, actor, action, outcome, n) "
+            "SELECT substr(timestamp, 1, 13), actor, action, outcome, COUNT(*) FROM audit_events GROUP BY 1, 2, 3, 4"
+        )
+        conn.execute(_ROLLUP_TRIGGER)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def dated_path(template: str, day: str) -> str:
+    """The database for `day` (YYYYMMDD): `{date}` in the template, else the date before the extension."""
+    if "{date}" in template:
+        return template.format(date=day)
+    if "." in os.path.basename(template):
+        root, ext = os.path.splitext(template)
+        return f"{root}.{day}{ext}"
+    return f"{template}.{day}.sqlite"
+
+
+def _day(ts: str, shift: int = 0) -> str:
+    return (datetime.strptime(ts[:10], "%Y-%m-%d") + timedelta(days=shift)).strftime("%Y%m%d")
+
+
+def sqlite_files(template: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[str, str]]:
+    """`(date, path)` of the existing daily databases that can hold events in [since, until], oldest first."""
+    # The writer checks for the new day once a second, so the previous file may hold the first moments of `since`
+    lo = _day(since, -1) if since else None
+    hi = _day(until) if until else None
+    found = []
+    for path in glob.glob(dated_path(template, "[0-9]" * 8)):
+        m = _DATE.search(os.path.basename(path))
+        if m and (lo is None or m.group(1) >= lo) and (hi is None or m.group(1) <= hi):
+            found.append((m.group(1), path))
+    return sorted(found)
+
+
+def _id_range(conn: sqlite3.Connection, since: Optional[str], until: Optional[str], open_end: bool = False) -> Optional[Tuple[int, int]]:
+    """First and last id with since <= timestamp <= until (< until with `open_end`), from the timestamp index."""
+    lo = conn.execute(
+        "SELECT id FROM audit_events WHERE timestamp >= ? ORDER BY timestamp LIMIT 1" if since is not None
+        else "SELECT MIN(id) FROM audit_events",
+        (since,) if since is not None else (),
+    ).fetchone()
+    op = "<" if open_end else "<="
+    hi = conn.execute(
+        f"SELECT id FROM audit_events WHERE timestamp {op} ? ORDER BY timestamp DESC LIMIT 1" if until is not None
+        else "SELECT MAX(id) FROM audit_events",
+        (until,) if until is not None else (),
+    ).fetchone()
+    if lo is None or hi is None or lo[0] is None or hi[0] is None or lo[0] > hi[0]:
+        return None
+    return lo[0], hi[0]
+
+
+def _next_hour(ts: str) -> str:
+    return (datetime.strptime(ts[:13], "%Y-%m-%dT%H") + timedelta(hours=1)).strftime("%Y-%m-%dT%H")
+
+
+def _group_sql(group_by: Sequence[str], hour_column: str) -> List[str]:
+    cols = {"day": f"substr({hour_column}, 1, 10)", "hour": f"substr({hour_column}, 1, 13)"}
+    return [cols.get(g, g) for g in group_by]
+
+
+def _count_sqlite(conn: sqlite3.Connection, day: str, flt: AuditFilter, group_by: Sequence[str]) -> Counter:
+    counts: Counter = Counter()
+    clauses, args = flt._where()
+    edges: List[Tuple[Optional[str], Optional[str], bool]] = []  # (since, until, open end) counted from audit_events
+    rollup = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_counts'").fetchone()
+    if rollup is None:
+        edges.append((flt.since, flt.until, False))
+    else:
+        # Ends on an hour boundary need no edge scan: the whole hour is in the rollup
+        whole_since = flt.since is None or flt.since[13:] == ":00:00+00:00"
+        whole_until = flt.until is None or flt.until[13:] == ":59:59.999999+00:00"
+        where = [c.lstrip("+") for c in clauses]
+        bounds: List[Any] = []
+        if flt.since is not None:
+            where.append("hour >= ?" if whole_since else "hour > ?")
+            bounds.append(flt.since[:13])
+        if flt.until is not None:
+            where.append("hour <= ?" if whole_until else "hour < ?")
+            bounds.append(flt.until[:13])
+        cols = _group_sql(group_by, "hour")
+        sql = f"SELECT {', '.join(cols + ['SUM(n)'])} FROM audit_counts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if cols:
+            sql += " GROUP BY " + ", ".join(cols)
+        for row in conn.execute(sql, args + bounds):
+            if row[-1]:
+                counts[tuple(row[:-1])] += row[-1]
+        # A partial hour is in its own day's file, or the previous one just after midnight
+        near = (day, _day(f"{day[:4]}-{day[4:6]}-{day[6:]}", 1))
+        since, until = flt.since, flt.until
+        if since is not None and until is not None and since[:13] == until[:13]:
+            if not (whole_since and whole_until):
+                edges.append((since, until, False))
+        else:
+            if since is not None and not whole_since:
+                edges.append((since, _next_hour(since), True))
+            if until is not None and not whole_until:
+                edges.append((until[:13], until, False))
+        edges = [e for e in edges if e[0] is not None and _day(e[0]) in near]
+    cols = _group_sql(group_by, "timestamp")
+    for since, until, open_end in edges:
+        ids = _id_range(conn, since, until, open_end)
+        if ids is None:
+            continue
+        sql = f"SELECT {', '.join(cols + ['COUNT(*)'])} FROM audit_events WHERE " + " AND ".join(clauses + ["id >= ?", "id <= ?"])
+        if cols:
+            sql += " GROUP BY " + ", ".join(cols)
+        for row in conn.execute(sql, args + list(ids)):
+            if row[-1]:
+                counts[tuple(row[:-1])] += row[-1]
+    return counts
+
+
+def _parse_cursor(cursor: Optional[str]) -> Tuple[str, int]:
+    if not cursor:
+        return "", 0
+    day, _, rowid = cursor.partition(":")
+    if not (_DATE.fullmatch(day) and rowid.isdigit()):
+        raise ValueError("invalid cursor")
+    return day, int(rowid)
+
+
+def query_sqlite(
+    template: str,
+    flt: AuditFilter,
+    *,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    count: bool = False,
+    group_by: Sequence[str] = (),
+) -> QueryResult:
+    """Answer a query from the daily SQLite databases matching `template` (see the module docstring)."""
+    after_day, after_id = _parse_cursor(cursor)
+    res = QueryResult("sqlite")
+    counts: Counter = Counter()
+    clauses, args = flt._where()
+    select = f"SELECT id, {', '.join(_EVENT_COLUMNS)} FROM audit_events WHERE " + " AND ".join(clauses + ["id > ?", "id <= ?"])
+    last = None
+    for day, path in sqlite_files(template, flt.since, flt.until):
+        conn = sqlite3.connect(path)
+        try:
+            if count or group_by:
+                counts.update(_count_sqlite(conn, day, flt, group_by))
+            if limit == 0 or day < after_day or res.next_cursor is not None:
+                continue
+            ids = _id_range(conn, flt.since, flt.until)
+            if ids is None:
+                continue
+            lo = max(ids[0] - 1, after_id if day == after_day else 0)
+            # One row past the page tells whether there is a next page
+            rows = conn.execute(select + " ORDER BY id LIMIT ?", args + [lo, ids[1], limit + 1 - len(res.events)])
+            for row in rows:
+                if len(res.events) == limit:
+                    res.next_cursor = last
+                    break
+                last = f"{day}:{row[0]}"
+                res.events.append(dict(zip(_EVENT_COLUMNS, row[1:])))
+        finally:
+            conn.close()
+    _summarise(res, counts, count, group_by)
+    return res
+
+
+def query_records(
+    backend: str,
+    records: Iterable[Dict[str, Any]],
+    flt: AuditFilter,
+    *,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    count: bool = False,
+    group_by: Sequence[str] = (),
+) -> QueryResult:
+    """Answer a query by filtering `records` in order (JSONL archive or in-memory buffer); the cursor is an offset."""
+    if cursor and not cursor.isdigit():
+        raise ValueError("invalid cursor")
+    offset = int(cursor or 0)
+    matches = (rec for rec in records if flt.matches(rec))
+    res = QueryResult(backend)
+    counts: Counter = Counter()
+    if not (count or group_by):
+        page = list(itertools.islice(matches, offset, offset + limit + 1))
+        res.events = page[:limit]
+        res.next_cursor = str(offset + limit) if len(page) > limit else None
+        return res
+    for i, rec in enumerate(matches):
+        if offset <= i < offset + limit:
+            res.events.append(rec)
+        elif i == offset + limit:
+            res.next_cursor = str(offset + limit)
+        counts[tuple(_group_value(rec, g) for g in group_by)] += 1
+    _summarise(res, counts, count, group_by)
+    return res
+
+
+def _group_value(rec: Dict[str, Any], name: str) -> Any:
+    if name == "day":
+        return str(rec.get("timestamp", ""))[:10]
+    if name == "hour":
+        return str(rec.get("timestamp", ""))[:13]
+    return rec.get(name)
+
+
+def _summarise(res: QueryResult, counts: Counter, count: bool, group_by: Sequence[str]) -> None:
+    if count:
+        res.count = sum(counts.values())
+    if group_by:
+        res.groups = [
+            dict(zip(group_by, key), count=n)
+            for key, n in sorted(counts.items(), key=lambda kv: (-kv[1], [str(k) for k in kv[0]]))
+        ]
+
+
+__all__ = [
+    "AuditFilter",
+    "GROUP_FIELDS",
+    "QueryResult",
+    "dated_path",
+    "ensure_rollup",
+    "query_records",
+    "query_sqlite",
+    "sqlite_files",
+]
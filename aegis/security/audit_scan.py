@@ -0,0 +1,171 @@
+"""
+Fast reader for JSONL audit files.
+
+Plain files are memory-mapped and cut into windows of whole lines (about
+`_WINDOW` bytes each) on newline bytes, so nothing is read or split line by line
+through text IO. Compressed segments cannot be mapped and are streamed in the
+same windows.
+
+Records written by `AuditEvent.to_json` share one compact layout:
+
+    {"timestamp":"…","actor":"…","action":"…","params_hash":"…","outcome":"…","prev_hash":"…"|null}
+
+Windows made only of such lines skip `json.loads` altogether:
+
+- `chain_hashes` (verification) checks the layout of the whole window with
+  numpy array operations and returns the two hash columns as byte arrays,
+  so linkage is compared one window at a time instead of one line at a time
+- `parse_events` (read-back, queries) decodes the window once and slices the
+  fields out of one line-anchored regex pass
+
+A window with any other line, such as the generic `{payload, prev_hash,
+curr_hash}` schema, escaped strings, extra keys or other whitespace, falls back
+to `json.loads` per line. Mixed files give the same results either way.
+"""
+from __future__ import annotations
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+import io
+import json
+import mmap
+import re
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+_WINDOW = 1 << 20
+
+_LAYOUT = (
+    r'^\{"timestamp":"V","actor":"V","action":"V","params_hash":"H","outcome":"V","prev_hash":(?:"H"|null)\}\n'
+)
+_VALUE = r'[^"\\\n]*'
+_HASH = r'[^"\\\n]+'  # non-empty, so an empty prev_hash can't be confused with null
+# Values can't span lines and every match ends on a newline, so a match is always one whole line
+_EVENTS = re.compile(_LAYOUT.replace("V", f"({_VALUE})").replace("H", f"({_HASH})"), re.M)
+
+_QUOTE, _CLOSE, _NEWLINE = ord('"'), ord("}"), ord("\n")
+# Fixed text around the quotes of a compact line: (bytes, quote column it starts at; None = line start)
+_KEYS_AT = [(np.frombuffer(b'{"timestamp":"', np.uint8), None)] + [
+    (np.frombuffer(f'","{key}":"'.encode(), np.uint8), 4 * i - 1)
+    for i, key in enumerate(("actor", "action", "params_hash", "outcome", "prev_hash"), 1)
+]
+
+
+def iter_windows(fh: IO[bytes], end: Optional[int] = None, *, align: bool = False) -> Iterator[bytes]:
+    """Blocks of whole lines from `fh`'s position, stopping before the first line that starts at or past `end`.
+
+    With `align`, a position in the middle of a line skips to the next one (that
+    line belongs to whoever reads the range before). Ranges need a plain file;
+    other streams (compressed segments) are read to the end.
+    """
+    pos = fh.tell()
+    if not isinstance(getattr(fh, "raw", None), io.FileIO):
+        if end is not None or align:
+            raise ValueError("byte ranges need an uncompressed audit file")
+        yield from _stream_windows(fh)
+        return
+    try:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # empty file
+        return
+    with mm:
+        size = len(mm)
+        stop = size if end is None else min(end, size)
+        if align and pos:
+            nl = mm.find(b"\n", pos - 1)
+            pos = size if nl < 0 else nl + 1
+        while pos < stop:
+            nl = mm.find(b"\n", min(pos + _WINDOW, stop) - 1)
+            cut = size if nl < 0 else nl + 1
+            yield mm[pos:cut]
+            pos = cut
+
+
+def _stream_windows(fh: IO[bytes]) -> Iterator[bytes]:
+    rest = b""
+    while True:
+        block = fh.read(_WINDOW)
+        if not block:
+            if rest:
+                yield rest
+            return
+        block = rest + block
+        cut = block.rfind(b"\n") + 1
+        if cut:
+            yield block[:cut]
+        rest = block[cut:]
+
+
+def skip_records(window: bytes, n: int) -> Tuple[int, int]:
+    """Offset just past the first `n` non-blank lines of a window (or its end), and how many it passed.
+
+    Nothing is parsed, so callers can cut a window down to the records they need.
+    """
+    pos = passed = 0
+    while passed < n and pos < len(window):
+        nl = window.find(b"\n", pos)
+        end = len(window) if nl < 0 else nl
+        passed += bool(window[pos:end].strip())
+        pos = end + 1
+    return min(pos, len(window)), passed
+
+
+def _text(window: bytes) -> Optional[str]:
+    if not window.endswith(b"\n"):  # a torn last line never matches: parse it in full
+        return None
+    try:
+        return window.decode()
+    except UnicodeDecodeError:
+        return None
+
+
+def chain_hashes(window: bytes) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """`(params_hash, prev_hash)` of every line as `(n, 64)` byte arrays, or None unless the whole window is compact.
+
+    Checked with array operations, never per line. The window must hold only
+    compact lines with 64-character hashes and a non-null prev_hash: exactly 24
+    quotes per line, the six keys at their quote positions, and a newline right
+    after each closing brace. Anything else (including the first event of a
+    log) is for the full parse.
+    """
+    if not window.endswith(b"\n") or b"\\" in window:  # no escapes: every quote is structural
+        return None
+    arr = np.frombuffer(window, np.uint8)
+    n = window.count(b"\n")
+    found = np.flatnonzero(arr == _QUOTE)
+    if not n or len(found) != 24 * n:
+        return None
+    q = found.reshape(n, 24)
+    ends = q[:, 23]
+    if ends[-1] != len(arr) - 3:
+        return None
+    # n newlines, each right after a line's closing brace: no other newline, no record spans two lines
+    if not ((arr[ends + 1] == _CLOSE).all() and (arr[ends + 2] == _NEWLINE).all()):
+        return None
+    starts = q[:, 0] - 1
+    if starts[0] != 0 or not (starts[1:] == ends[:-1] + 3).all():
+        return None
+    for key, col in _KEYS_AT:
+        at = starts if col is None else q[:, col]
+        if at[-1] + len(key) > len(arr) or not (sliding_window_view(arr, len(key))[at] == key).all():
+            return None
+    if not ((q[:, 15] - q[:, 14] == 65).all() and (q[:, 23] - q[:, 22] == 65).all()):
+        return None
+    rows = sliding_window_view(arr, 64)
+    return rows[q[:, 14] + 1], rows[q[:, 22] + 1]
+
+
+def parse_events(window: bytes) -> List[Dict[str, Any]]:
+    """Every non-blank line of a window as a dict, in order."""
+    text = _text(window)
+    if text is not None:
+        found = _EVENTS.findall(text)
+        if len(found) == text.count("\n"):
+            return [
+                {"timestamp": ts, "actor": actor, "action": action, "params_hash": ph, "outcome": outcome, "prev_hash": prev or None}
+                for ts, actor, action, ph, outcome, prev in found
+            ]
+    return [json.loads(line) for line in window.split(b"\n") if line.strip()]
+
+
+__all__ = ["chain_hashes", "iter_windows", "parse_events", "skip_records"]
@@ -0,0 +1,389 @@
+"""
+Segmented, compressed JSONL audit archive.
+
+The active segment is always the configured file (`AEGIS_AUDIT_LOG_FILE`), so
+tools that tail it keep working. The writer rolls it while the process runs, as
+soon as either threshold is crossed:
+
+- `AEGIS_AUDIT_SEGMENT_BYTES` (default 256 MiB)
+- `AEGIS_AUDIT_SEGMENT_SECONDS` (default 86400), measured from its first event
+
+A rolled segment is renamed to `<stem>.<first index>.jsonl` and recorded in
+`<path>.manifest.json` (file, first index, count, first/last timestamp,
+first/last hash). The manifest entry is written before the rename, and `open`
+finishes a rename that a crash interrupted. A background thread then zstd-compresses it to
+`.jsonl.zst`, when `zstandard` is installed. Segments are plain slices of one
+chain: the first event of each segment links to the last hash of the one before
+it. Verification checks those links against the manifest, and time-range
+readers use the manifest to open only the segments they need.
+
+Rolling assumes this process is the file's only writer. Where `fcntl` exists,
+`WriterLock` enforces it: the first process to open the file owns it, and
+writers in other processes (several API workers sharing
+`AEGIS_AUDIT_LOG_FILE`) join as guests. The owner does not roll while any guest
+has the file open, and neither does a guest. Manifest updates take an
+exclusive lock on `<path>.manifest.lock`, so concurrent compression or
+verification never sees half an update.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import IO, Any, Callable, Iterator, List, Optional, Tuple
+import importlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+from .audit_scan import iter_windows, parse_events
+
+try:  # optional compression dependency
+    zstd: Any = importlib.import_module("zstandard")
+except Exception:  # pragma: no cover - optional
+    zstd = None
+
+try:  # advisory file locks (POSIX); elsewhere one writer per file is assumed
+    fcntl: Any = importlib.import_module("fcntl")
+except Exception:  # pragma: no cover - platform
+    fcntl = None
+
+
+@dataclass
+class Segment:
+    file: str  # basename, next to the active log
+    first_index: int  # archive-wide index of its first event
+    count: int
+    first_ts: str
+    last_ts: str
+    first_prev_hash: Optional[str]
+    first_hash: str
+    last_hash: str
+    bytes: int  # uncompressed size
+
+
+def manifest_path(path: str) -> str:
+    return f"{path}.manifest.json"
+
+
+def load_manifest(path: str) -> List[Segment]:
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            return [Segment(**s) for s in json.load(f)["segments"]]
+    except FileNotFoundError:
+        return []
+
+
+def save_manifest(path: str, segments: List[Segment]) -> None:
+    tmp = manifest_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"segments": [asdict(s) for s in segments]}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, manifest_path(path))
+
+
+@contextmanager
+def manifest_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on `<path>.manifest.lock` across processes (a no-op without `fcntl`)."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(manifest_path(path) + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+class WriterLock:
+    """Which process may roll an audit JSONL file.
+
+    `acquire` (before opening the file) takes `<path>.lock` exclusively if no
+    other process holds it: that process owns the file. Otherwise it joins as a
+    guest, holding `<path>.writers` shared until `release`. `alone()` holds off
+    new guests for the duration of a block and says whether the owner is the
+    file's only writer.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.owner = True
+        self._owner_fd: Optional[int] = None
+        self._writers_fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        """Join as owner or guest (blocks while the owner is mid-batch); True for the owner."""
+        if fcntl is None or self._writers_fd is not None:
+            return self.owner
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._owner_fd, self.owner = fd, True
+        except OSError:
+            os.close(fd)
+            self.owner = False
+        self._writers_fd = os.open(self.path + ".writers", os.O_RDWR | os.O_CREAT, 0o600)
+        if not self.owner:
+            fcntl.flock(self._writers_fd, fcntl.LOCK_SH)
+        return self.owner
+
+    @contextmanager
+    def alone(self) -> Iterator[bool]:
+        if fcntl is None or self._writers_fd is None:
+            yield self.owner
+            return
+        held = False
+        if self.owner:
+            try:
+                fcntl.flock(self._writers_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                held = True
+            except OSError:
+                pass
+        try:
+            yield held
+        finally:
+            if held:
+                fcntl.flock(self._writers_fd, fcntl.LOCK_UN)
+
+    def release(self) -> None:
+        for fd in (self._writers_fd, self._owner_fd):
+            if fd is not None:
+                os.close(fd)
+        self._writers_fd = self._owner_fd = None
+        self.owner = True
+
+
+def open_segment(path: str, offset: int = 0) -> IO[bytes]:
+    """A binary reader over a (possibly `.zst`) segment, positioned at uncompressed `offset`."""
+    if path.endswith(".zst"):
+        if zstd is None:
+            raise RuntimeError("reading compressed audit segments requires 'zstandard'. Install via: pip install zstandard")
+        raw = zstd.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        if offset:
+            raw.seek(offset)
+        return io.BufferedReader(raw)
+    fh = open(path, "rb")
+    fh.seek(offset)
+    return fh
+
+
+def segment_files(path: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[Optional[Segment], str]]:
+    """Closed segments overlapping [since, until] (ISO timestamps), then the active file (segment None)."""
+    folder = os.path.dirname(path)
+    out: List[Tuple[Optional[Segment], str]] = [
+        (s, os.path.join(folder, s.file))
+        for s in load_manifest(path)
+        if (since is None or s.last_ts >= since) and (until is None or s.first_ts <= until)
+    ]
+    if os.path.exists(path):
+        out.append((None, path))
+    return out
+
+
+def read_archive(path: str, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[dict]:
+    """Events with since <= timestamp <= until across the archive, opening only overlapping segments."""
+    for _seg, file in segment_files(path, since, until):
+        with open_segment(file) as fh:
+            for window in iter_windows(fh):
+                for rec in parse_events(window):
+                    ts = rec.get("timestamp", "")
+                    if since is not None and ts < since:
+                        continue
+                    if until is not None and ts > until:
+                        return
+                    yield rec
+
+
+def _parse_ts(ts: str) -> float:
+    try:
+        return datetime.fromisoformat(ts).timestamp()
+    except ValueError:
+        return time.time()
+
+
+class SegmentRoller:
+    """Tracks the active segment for the writer thread and rolls it when a threshold is crossed."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = 256 << 20,
+        max_age_s: float = 86400.0,
+        compress: bool = True,
+        on_move: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.max_age_s = float(max_age_s)
+        self.compress = compress and zstd is not None
+        self.on_move = on_move  # (old path, new path) whenever a segment file moves
+        self.log = logging.getLogger("aegis.audit.segments")
+        self._lock = threading.Lock()  # guards the manifest (compression threads update it)
+        self._compressing: List[threading.Thread] = []
+        self._reset(load_manifest(path))
+
+    def _reset(self, segments: List[Segment]) -> None:
+        last = segments[-1] if segments else None
+        self.first_index = last.first_index + last.count if last else 0
+        self.count = 0
+        self.bytes = 0
+        self.first: Optional[dict] = None
+        self.last: Optional[dict] = None
+        self.started = 0.0
+
+    def open(self) -> IO[bytes]:
+        """Open the active file for appending, picking up events left by an earlier process."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._recover()
+        fh = open(self.path, "ab")
+        if fh.tell() and not self.count:
+            self._adopt(fh.tell())
+        return fh
+
+    def _recover(self) -> None:
+        """Finish a roll that stopped between recording the segment and renaming the active file."""
+        with self._lock, manifest_lock(self.path):
+            segments = load_manifest(self.path)
+            if not segments or segments[-1].file.endswith(".zst") or not os.path.exists(self.path):
+                return
+            seg = segments[-1]
+            target = os.path.join(os.path.dirname(self.path), seg.file)
+            if os.path.exists(target):
+                return
+            with open(self.path, "rb") as f:
+                first = f.readline()
+            try:
+                first_hash = json.loads(first).get("params_hash") if first.strip() else None
+            except ValueError:
+                first_hash = None
+            if first_hash != seg.first_hash:
+                self.log.warning("audit manifest lists %s, but the active file does not start it", seg.file)
+                return
+            os.replace(self.path, target)
+        self.log.warning("finished an interrupted roll of %s into %s", self.path, seg.file)
+        if self.on_move is not None:
+            self.on_move(self.path, target)
+        if self.compress:
+            t = threading.Thread(target=self._compress, args=(seg,), name="aegis-audit-compress", daemon=True)
+            self._compressing.append(t)
+            t.start()
+
+    def _adopt(self, size: int) -> None:
+        count, first, last = 0, None, None
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    count += 1
+                    first = first or line
+                    last = line
+        if first is not None and last is not None:
+            self.wrote(first.decode(), last.decode(), count, size)
+
+    def wrote(self, first_line: str, last_line: str, n: int, nbytes: int) -> None:
+        if not self.count:
+            first = self.first = json.loads(first_line)
+            self.started = _parse_ts(first.get("timestamp", ""))
+        self.last = json.loads(last_line) if n > 1 or self.count else self.first
+        self.count += n
+        self.bytes += nbytes
+
+    def due(self) -> bool:
+        if not self.count:
+            return False
+        return self.bytes >= self.max_bytes or (self.max_age_s > 0 and time.time() - self.started >= self.max_age_s)
+
+    def roll(self, fh: IO[bytes], sync: bool = True) -> IO[bytes]:
+        """Close the active segment, record it in the manifest and open a fresh active file.
+
+        The caller must be the file's only writer (`WriterLock.alone`).
+        """
+        fh.flush()
+        if sync:
+            os.fsync(fh.fileno())
+        size = os.fstat(fh.fileno()).st_size
+        fh.close()
+        if size != self.bytes:  # a guest appended since we opened it: count what the file holds
+            self.count = self.bytes = 0
+            self._adopt(size)
+        first, last, count, nbytes = self.first, self.last, self.count, self.bytes
+        assert first is not None and last is not None
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        with self._lock, manifest_lock(self.path):
+            segments = load_manifest(self.path)
+            prev = segments[-1] if segments else None
+            first_index = prev.first_index + prev.count if prev else 0  # the manifest on disk, not our last view of it
+            name = f"{stem}.{first_index:012d}{ext or '.jsonl'}"
+            target = os.path.join(os.path.dirname(self.path), name)
+            seg = Segment(
+                file=name,
+                first_index=first_index,
+                count=count,
+                first_ts=first.get("timestamp", ""),
+                last_ts=last.get("timestamp", ""),
+                first_prev_hash=first.get("prev_hash"),
+                first_hash=first.get("params_hash", ""),
+                last_hash=last.get("params_hash", ""),
+                bytes=nbytes,
+            )
+            segments.append(seg)
+            # The entry goes first: if the process dies before the rename, open() finishes it
+            save_manifest(self.path, segments)
+            os.replace(self.path, target)
+        if self.on_move is not None:
+            self.on_move(self.path, target)
+        self._reset(segments)
+        if self.compress:
+            t = threading.Thread(target=self._compress, args=(seg,), name="aegis-audit-compress", daemon=True)
+            self._compressing.append(t)
+            t.start()
+        return open(self.path, "ab")
+
+    def _compress(self, seg: Segment) -> None:
+        assert zstd is not None
+        folder = os.path.dirname(self.path)
+        src = os.path.join(folder, seg.file)
+        dst = src + ".zst"
+        try:
+            with open(src, "rb") as fin, open(dst + ".tmp", "wb") as fout:
+                zstd.ZstdCompressor(level=3).copy_stream(fin, fout)
+                fout.flush()
+                os.fsync(fout.fileno())
+            os.replace(dst + ".tmp", dst)
+            with self._lock, manifest_lock(self.path):
+                segments = load_manifest(self.path)
+                for s in segments:
+                    if s.file == seg.file:
+                        s.file = os.path.basename(dst)
+                save_manifest(self.path, segments)
+            if self.on_move is not None:
+                self.on_move(src, dst)
+            os.unlink(src)
+        except Exception:
+            self.log.exception("audit segment compression failed: %s", src)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for background compression (called on writer close)."""
+        for t in self._compressing:
+            t.join(timeout)
+        self._compressing = [t for t in self._compressing if t.is_alive()]
+
+
+__all__ = [
+    "Segment",
+    "SegmentRoller",
+    "WriterLock",
+    "load_manifest",
+    "manifest_lock",
+    "manifest_path",
+    "open_segment",
+    "read_archive",
+    "save_manifest",
+    "segment_files",
+]
@@ -0,0 +1,191 @@
+"""
+Read-back index for audit events that have left the in-memory buffer.
+
+The group-commit writer (`audit_writer.AuditWriter`) records where each batch
+landed, keyed by the event's sequence number in this process:
+
+- JSONL: a sparse list of `(seq, path, byte offset)` marks, at most one every
+  `mark_every` events (and one where a gap starts, recorded with offset -1 so
+  it is never misread: after a failed write, or while another process appends
+  to the same file);
+- SQLite: `(seq, path, first rowid, count)` segments. Rows of one batch are
+  contiguous, and consecutive batches merge into one segment, so a
+  single-writer database is a single entry.
+
+`read(start, end)` streams the events back as field dicts, preferring SQLite
+(rowid seek) and falling back to a memory-mapped JSONL scan from the nearest
+mark (`audit_scan`, which skips `json.loads` for compact lines). When the
+writer rolls or compresses a JSONL segment, `relocate` repoints the marks at
+the new file. A sparse time index (the timestamp of every `mark_every`-th event)
+lets `start_for(since)` skip to the right place without reading anything. All
+of these grow with the number of *marks*, not events, so the index stays small
+under sustained load.
+"""
+from __future__ import annotations
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+import bisect
+import sqlite3
+import threading
+
+from .audit_scan import iter_windows, parse_events, skip_records
+from .audit_segments import open_segment
+
+FIELDS = ("timestamp", "actor", "action", "params_hash", "outcome", "prev_hash")
+_SELECT = f"SELECT {', '.join(FIELDS)} FROM audit_events WHERE id >= ? AND id < ? ORDER BY id"
+
+
+class AuditSpill:
+    def __init__(self, *, mark_every: int = 4096, fetch_size: int = 1000) -> None:
+        self.mark_every = max(1, int(mark_every))
+        self.fetch_size = max(1, int(fetch_size))
+        self._lock = threading.Lock()
+        self.durable = 0  # events handed to the sinks so far (written or failed)
+        self._mark_seqs: List[int] = []
+        self._marks: List[Tuple[str, int]] = []
+        self._seg_seqs: List[int] = []
+        self._segs: List[Tuple[str, int, int]] = []  # (path, first rowid, count)
+        self._need_mark = True
+        self._time_seqs: List[int] = []
+        self._time_ts: List[str] = []
+        self._generation = 0  # bumped whenever a file moves, so readers re-resolve their source
+
+    # Writer side
+    def jsonl_written(self, seq: int, n: int, path: str, offset: int, ok: bool = True) -> None:
+        with self._lock:
+            if not ok:
+                if self._marks and self._marks[-1] == (path, -1):
+                    return  # the open gap already covers this batch
+                self._mark_seqs.append(seq)
+                self._marks.append((path, -1))
+                self._need_mark = True
+            elif (
+                self._need_mark
+                or seq - self._mark_seqs[-1] >= self.mark_every
+                or self._marks[-1][0] != path
+            ):
+                self._mark_seqs.append(seq)
+                self._marks.append((path, offset))
+                self._need_mark = False
+
+    def sqlite_written(self, seq: int, n: int, path: str, first_rowid: int) -> None:
+        with self._lock:
+            if self._segs:
+                last_seq, (last_path, last_rowid, last_n) = self._seg_seqs[-1], self._segs[-1]
+                if last_path == path and last_seq + last_n == seq and last_rowid + last_n == first_rowid:
+                    self._segs[-1] = (path, last_rowid, last_n + n)
+                    return
+            self._seg_seqs.append(seq)
+            self._segs.append((path, first_rowid, n))
+
+    def advance(self, n: int, first_ts: Optional[str] = None) -> None:
+        with self._lock:
+            if first_ts is not None and (not self._time_seqs or self.durable - self._time_seqs[-1] >= self.mark_every):
+                self._time_seqs.append(self.durable)
+                self._time_ts.append(first_ts)
+            self.durable += n
+
+    def relocate(self, old: str, new: str) -> None:
+        """A JSONL segment moved (rolled or compressed): offsets are unchanged, the file name is not."""
+        with self._lock:
+            self._marks = [(new if path == old else path, offset) for path, offset in self._marks]
+            self._generation += 1
+
+    def start_for(self, since: str) -> int:
+        """A sequence number at or before the first durable event with timestamp >= `since`."""
+        with self._lock:
+            i = bisect.bisect_left(self._time_ts, since)
+            return self._time_seqs[i - 1] if i else 0
+
+    # Reader side
+    def read(self, start: int, end: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield `(seq, fields)` for the durable events in [start, end); missing ones are skipped."""
+        seq = max(0, start)
+        while seq < min(end, self.durable):
+            with self._lock:
+                stop = min(end, self.durable)
+                seg = self._locate(self._seg_seqs, seq)
+                mark = self._locate(self._mark_seqs, seq)
+                if seg is not None and seq < self._seg_seqs[seg] + self._segs[seg][2]:
+                    first, (path, rowid, n) = self._seg_seqs[seg], self._segs[seg]
+                    source: Tuple[Any, ...] = ("sqlite", path, rowid + seq - first, min(stop, first + n))
+                elif mark is not None and self._marks[mark][1] >= 0:
+                    nxt = self._mark_seqs[mark + 1] if mark + 1 < len(self._mark_seqs) else stop
+                    path, offset = self._marks[mark]
+                    source = ("jsonl", path, offset, self._mark_seqs[mark], min(stop, nxt))
+                else:  # nothing durable here: skip to the next covered sequence number
+                    source = ("gap", self._next_covered(seq, stop))
+                generation = self._generation
+            if source[0] == "jsonl":
+                try:
+                    fh = open_segment(source[1], source[2])
+                except FileNotFoundError:
+                    fh = None
+                with self._lock:
+                    moved = generation != self._generation
+                if fh is None or moved:  # the file moved under us: resolve it again
+                    if fh is not None:
+                        fh.close()
+                    elif not moved:
+                        seq = source[4]
+                    continue
+                # The open handle pins the file, so later moves don't matter
+                _, path, offset, first, upto = source
+                yield from self._read_jsonl(fh, first, seq, upto)
+                seq = upto
+            elif source[0] == "sqlite":
+                _, path, rowid, upto = source
+                yield from self._read_sqlite(path, rowid, seq, upto)
+                seq = upto
+            else:
+                seq = source[1]
+
+    @staticmethod
+    def _locate(seqs: List[int], seq: int) -> Optional[int]:
+        i = bisect.bisect_right(seqs, seq) - 1
+        return i if i >= 0 else None
+
+    def _next_covered(self, seq: int, stop: int) -> int:
+        candidates = [stop]
+        for seqs in (self._mark_seqs, self._seg_seqs):
+            i = bisect.bisect_right(seqs, seq)
+            if i < len(seqs):
+                candidates.append(seqs[i])
+        return min(candidates)
+
+    def _read_sqlite(self, path: str, rowid: int, seq: int, upto: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        conn = sqlite3.connect(path)
+        try:
+            cur = conn.execute(_SELECT, (rowid, rowid + upto - seq))
+            while True:
+                rows = cur.fetchmany(self.fetch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield seq, dict(zip(FIELDS, row))
+                    seq += 1
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_jsonl(fh: IO[bytes], first: int, seq: int, upto: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with fh:
+            cur = first
+            for window in iter_windows(fh):
+                lines = window.count(b"\n") + (not window.endswith(b"\n"))
+                if cur + lines <= seq:  # wholly before the requested range: skip without parsing
+                    cur += lines
+                    continue
+                if cur < seq:
+                    pos, passed = skip_records(window, seq - cur)
+                    window, cur = window[pos:], cur + passed
+                if cur + lines > upto:
+                    window = window[: skip_records(window, upto - cur)[0]]
+                for rec in parse_events(window):
+                    yield cur, rec
+                    cur += 1
+                if cur >= upto:
+                    return
+
+
+__all__ = ["AuditSpill", "FIELDS"]
@@ -0,0 +1,321 @@
+"""
+Group-commit writer for durable audit sinks (JSONL file and SQLite).
+
+`AuditLogger.emit` computes the hash chain synchronously, so ordering is fixed
+at emit time, and then hands the event to this writer. A single background
+thread drains a bounded queue. Everything waiting in the queue is written as
+one JSONL `write` on a file handle kept open, plus one SQLite transaction, so a
+burst of N events costs one round of disk I/O instead of N. When the queue is
+full, `submit` blocks (backpressure) rather than dropping events.
+
+Durability (`AEGIS_AUDIT_FSYNC`):
+- `batch` (default): fsync the JSONL file after every batch
+- `interval`: fsync at most every `AEGIS_AUDIT_FSYNC_INTERVAL_S` seconds (default 1.0)
+- `off`: leave flushing to the OS (SQLite runs with `synchronous=OFF`)
+
+The SQLite database runs in WAL mode with `synchronous=NORMAL`. Every
+`AEGIS_AUDIT_WAL_CHECKPOINT_S` seconds (default 30) the writer runs a passive
+`wal_checkpoint` so the WAL stays small, and it truncates the WAL on close.
+
+`flush()` waits until everything submitted before it has been written (and
+fsynced unless the policy is `off`). `close()` flushes and stops the thread.
+
+As it writes, the writer records where each batch landed in `spill`
+(`audit_spill.AuditSpill`), so events evicted from the logger's in-memory
+buffer can be read back by sequence number.
+
+Rotation happens while the process runs. The JSONL file rolls into compressed
+segments by size and age (`audit_segments.SegmentRoller`,
+`AEGIS_AUDIT_SEGMENT_BYTES` / `AEGIS_AUDIT_SEGMENT_SECONDS`). The SQLite
+database is reopened as soon as `sqlite_path()` (the date-rotated path) changes.
+
+Rolling and JSONL read-back assume this process is the file's only writer
+(`audit_segments.WriterLock`). If another process has the same file open, the
+writer keeps appending but does not roll it, and those batches are recorded
+as gaps, so they are read back from SQLite or not at all.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Tuple
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import json
+import time
+
+from ..metrics import metric
+from .audit_segments import SegmentRoller, WriterLock
+from .audit_spill import AuditSpill
+
+AUDIT_BATCHES = metric("Counter", "aegis_audit_write_batches_total", "Audit writer batches committed")
+AUDIT_WRITE_ERRORS = metric("Counter", "aegis_audit_write_errors_total", "Audit writer sink errors", ["sink"])
+AUDIT_BACKPRESSURE = metric("Counter", "aegis_audit_backpressure_total", "Audit emits that waited for queue space")
+AUDIT_QUEUE_DEPTH = metric("Gauge", "aegis_audit_queue_depth", "Audit events waiting for the writer")
+
+
+FSYNC_POLICIES = ("batch", "interval", "off")
+_CLOSE = object()
+_ROTATION_CHECK_S = 1.0
+
+# (json line, sqlite row) per event; rows are None when SQLite is not configured
+Record = Tuple[str, Optional[Tuple[Any, ...]]]
+
+_INSERT = "INSERT INTO audit_events (timestamp, actor, action, params_hash, outcome, prev_hash, signature) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        *,
+        jsonl_path: Optional[str] = None,
+        open_sqlite: Optional[Callable[[], sqlite3.Connection]] = None,
+        fsync: str = "batch",
+        fsync_interval_s: float = 1.0,
+        max_queue: int = 10000,
+        max_batch: int = 1000,
+        checkpoint_interval_s: float = 30.0,
+        segment_bytes: int = 0,
+        segment_seconds: float = 0.0,
+        sqlite_path: Optional[Callable[[], str]] = None,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.jsonl_path = jsonl_path
+        self.open_sqlite = open_sqlite
+        self.fsync = fsync
+        self.fsync_interval_s = max(0.0, float(fsync_interval_s))
+        self.max_batch = max(1, int(max_batch))
+        self.max_queue = max(1, int(max_queue))
+        self.checkpoint_interval_s = max(0.0, float(checkpoint_interval_s))
+        self._last_checkpoint = time.monotonic()
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue)
+        self._fh: Any = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_path = ""
+        self.sqlite_path = sqlite_path
+        self._db_target = ""
+        self._next_rotation_check = 0.0
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.spill = AuditSpill()
+        self._writers = WriterLock(jsonl_path) if jsonl_path else None
+        self._roller: Optional[SegmentRoller] = None
+        if jsonl_path and (segment_bytes > 0 or segment_seconds > 0):
+            self._roller = SegmentRoller(
+                jsonl_path,
+                max_bytes=segment_bytes if segment_bytes > 0 else 1 << 62,
+                max_age_s=segment_seconds,
+                on_move=self.spill.relocate,
+            )
+        self.log = logging.getLogger("aegis.audit.writer")
+        self._thread = threading.Thread(target=self._run, name="aegis-audit-writer", daemon=True)
+        self._thread.start()
+
+    # Producer side
+    def submit(self, record: Record) -> None:
+        """Queue one event for writing; blocks while the queue is full."""
+        if self._closed:
+            raise RuntimeError("audit writer is closed")
+        try:
+            self._q.put_nowait(record)
+        except queue.Full:
+            AUDIT_BACKPRESSURE.inc()
+            self._q.put(record)
+        AUDIT_QUEUE_DEPTH.set(self._q.qsize())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every event submitted so far is written; False on timeout."""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._q.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def pending(self) -> int:
+        return self._q.qsize()
+
+    # Writer thread
+    def _run(self) -> None:
+        while True:
+            timeout = self.fsync_interval_s if (self.fsync == "interval" and self._dirty) else None
+            try:
+                first = self._q.get(timeout=timeout)
+            except queue.Empty:
+                self._sync_files()
+                continue
+            items = [first]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            AUDIT_QUEUE_DEPTH.set(self._q.qsize())
+            records: List[Record] = []
+            barriers: List[threading.Event] = []
+            stop = False
+            for item in items:
+                if item is _CLOSE:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    records.append(item)
+            if records:
+                self._write(records)
+            if self._dirty and (barriers or stop or self.fsync == "batch" or self._fsync_due()):
+                self._sync_files()
+            for b in barriers:
+                b.set()
+            if stop:
+                self._close_sinks()
+                return
+
+    def _fsync_due(self) -> bool:
+        return self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval_s
+
+    def _write(self, records: List[Record]) -> None:
+        seq = self.written  # sequence number of records[0]
+        if self.jsonl_path:
+            offset = -1
+            try:
+                assert self._writers is not None
+                if self._fh is None:
+                    if not self._writers.acquire():
+                        self.log.warning(
+                            "audit log %s is open in another process: not rolling it, events are not read back from it",
+                            self.jsonl_path,
+                        )
+                    self._fh = self._roller.open() if self._roller is not None else open(self.jsonl_path, "ab")
+                with self._writers.alone() as alone:
+                    if alone and self._roller is not None and self._roller.due():
+                        self._fh = self._roller.roll(self._fh, sync=self.fsync != "off")
+                        self._dirty = False
+                    # The real end of file, not our last write: another process may have appended since
+                    offset = self._fh.seek(0, os.SEEK_END)
+                    data = "".join(line + "\n" for line, _row in records).encode()
+                    self._fh.write(data)
+                    self._fh.flush()
+                    self._dirty = True
+                    if self._roller is not None:
+                        self._roller.wrote(records[0][0], records[-1][0], len(records), len(data))
+                    # Marks are read forward line by line, so they only hold while no other process appends
+                    self.spill.jsonl_written(seq, len(records), self.jsonl_path, offset, ok=alone)
+            except Exception:
+                AUDIT_WRITE_ERRORS.labels("jsonl").inc()
+                self.log.exception("audit JSONL write failed")
+                self.spill.jsonl_written(seq, len(records), self.jsonl_path, offset, ok=False)
+        if self.open_sqlite is not None:
+            rows = [row for _line, row in records if row is not None]
+            try:
+                if self._conn is not None and self._sqlite_rotated():
+                    self._checkpoint("TRUNCATE")
+                    self._conn.close()
+                    self._conn = None
+                if self._conn is None:
+                    self._db_target = self.sqlite_path() if self.sqlite_path is not None else ""
+                    self._conn = self.open_sqlite()
+                    self._db_path = next((r[2] for r in self._conn.execute("PRAGMA database_list") if r[1] == "main"), "")
+                    if self.fsync == "off":
+                        self._conn.execute("PRAGMA synchronous=OFF")
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_INSERT, rows)
+                last_rowid = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                self._conn.execute("COMMIT")
+                if self._db_path and rows and len(rows) == len(records):
+                    self.spill.sqlite_written(seq, len(rows), self._db_path, last_rowid - len(rows) + 1)
+                if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval_s:
+                    self._checkpoint("PASSIVE")
+            except Exception:
+                AUDIT_WRITE_ERRORS.labels("sqlite").inc()
+                self.log.exception("audit SQLite write failed")
+                if self._conn is not None and self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+        self.written += len(records)
+        self.spill.advance(len(records), self._timestamp(records[0][0]))
+        self.batches += 1
+        AUDIT_BATCHES.inc()
+
+    @staticmethod
+    def _timestamp(line: str) -> Optional[str]:
+        try:
+            ts = json.loads(line).get("timestamp")
+        except (ValueError, AttributeError):
+            return None
+        return ts if isinstance(ts, str) else None
+
+    def _sqlite_rotated(self) -> bool:
+        """True once the date-rotated target path differs from the open database (checked once a second)."""
+        if self.sqlite_path is None or time.monotonic() < self._next_rotation_check:
+            return False
+        self._next_rotation_check = time.monotonic() + _ROTATION_CHECK_S
+        return self.sqlite_path() != self._db_target
+
+    def _sync_files(self) -> None:
+        if self._fh is not None and self.fsync != "off":
+            try:
+                os.fsync(self._fh.fileno())
+            except Exception:
+                AUDIT_WRITE_ERRORS.labels("jsonl").inc()
+                self.log.exception("audit JSONL fsync failed")
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _checkpoint(self, mode: str) -> None:
+        assert self._conn is not None
+        try:
+            self._conn.execute(f"PRAGMA wal_checkpoint({mode})")
+        except Exception:
+            AUDIT_WRITE_ERRORS.labels("sqlite").inc()
+            self.log.exception("audit WAL checkpoint failed")
+        self._last_checkpoint = time.monotonic()
+
+    def _close_sinks(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._writers is not None:
+            self._writers.release()
+        if self._roller is not None:
+            self._roller.wait(5.0)
+        if self._conn is not None:
+            self._checkpoint("TRUNCATE")
+            self._conn.close()
+            self._conn = None
+
+
+def writer_from_env(
+    jsonl_path: Optional[str],
+    open_sqlite: Optional[Callable[[], sqlite3.Connection]],
+    sqlite_path: Optional[Callable[[], str]] = None,
+) -> Optional[AuditWriter]:
+    """Writer configured from AEGIS_AUDIT_FSYNC / _FSYNC_INTERVAL_S / _QUEUE_SIZE / _WAL_CHECKPOINT_S /
+    _SEGMENT_BYTES / _SEGMENT_SECONDS; None without sinks."""
+    if not jsonl_path and open_sqlite is None:
+        return None
+    return AuditWriter(
+        jsonl_path=jsonl_path,
+        open_sqlite=open_sqlite,
+        fsync=os.environ.get("AEGIS_AUDIT_FSYNC", "batch").lower(),
+        fsync_interval_s=float(os.environ.get("AEGIS_AUDIT_FSYNC_INTERVAL_S", "1.0")),
+        max_queue=int(os.environ.get("AEGIS_AUDIT_QUEUE_SIZE", "10000")),
+        checkpoint_interval_s=float(os.environ.get("AEGIS_AUDIT_WAL_CHECKPOINT_S", "30")),
+        segment_bytes=int(os.environ.get("AEGIS_AUDIT_SEGMENT_BYTES", str(256 << 20))),
+        segment_seconds=float(os.environ.get("AEGIS_AUDIT_SEGMENT_SECONDS", "86400")),
+        sqlite_path=sqlite_path,
+    )
+
+
+__all__ = ["AuditWriter", "FSYNC_POLICIES", "writer_from_env"]
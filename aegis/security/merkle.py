@@ -0,0 +1,251 @@
+"""
+Append-only Merkle tree over audit events (RFC 6962 / RFC 9162 hashing).
+
+Leaves are hashed as `SHA256(0x00 || data)` and interior nodes as
+`SHA256(0x01 || left || right)`, so proofs can be checked with any Certificate
+Transparency-style verifier. The tree stores only the hashes of *complete*
+subtrees, level by level, packed into one `bytearray` per level (32 bytes per
+node). Appending touches O(log n) nodes. The current root is computed at most
+once per tree size and cached, so repeated reads are O(1). The hash of any
+other range (an older tree size, or the ragged right edge) is folded from at
+most O(log n) stored nodes.
+
+With `prune_below=P`, nodes below level P are kept only for the newest,
+incomplete block of 2**P leaves. An older node is recomputed on demand from its
+block's leaves, which come from the `leaves(start, end)` callback (the audit
+log reads them back from its durable sink). Memory is then about 64/2**P bytes
+per event instead of 64.
+
+- `inclusion_proof(index, size)`: audit path for one leaf (RFC 6962 §2.1.1)
+- `consistency_proof(first, second)`: proof that tree `first` is a prefix of tree `second` (§2.1.2)
+- `verify_inclusion` / `verify_consistency`: the client-side checks (RFC 9162 §2.1.3.2, §2.1.4.2)
+"""
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence, Tuple
+import hashlib
+import threading
+
+HASH_LEN = 32
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than n (n >= 2)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def _fold(hashes: Sequence[bytes]) -> bytes:
+    """Root of a perfect subtree given its leaf hashes (len is a power of two)."""
+    level = list(hashes)
+    while len(level) > 1:
+        level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+class MerkleTree:
+    def __init__(self, *, prune_below: int = 0, leaves: Optional[Callable[[int, int], List[bytes]]] = None) -> None:
+        if prune_below and leaves is None:
+            raise ValueError("pruning needs a leaves(start, end) callback")
+        self._levels: List[bytearray] = [bytearray()]
+        # Index of the first node still stored per level (> 0 once older blocks are pruned)
+        self._offsets: List[int] = [0]
+        self._prune_below = max(0, int(prune_below))
+        self._leaves = leaves
+        self._block: Optional[Tuple[int, List[bytes]]] = None  # last block read back through `leaves`
+        self._size = 0
+        self._root: Optional[bytes] = EMPTY_ROOT
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def root(self) -> bytes:
+        """Root of the current tree (cached until the next append)."""
+        root = self._root
+        if root is None:
+            with self._lock:
+                root = self._root = self._range_hash(0, self._size)
+        return root
+
+    def append(self, data: bytes) -> int:
+        """Add a leaf; returns its index."""
+        return self.append_hash(leaf_hash(data))
+
+    def append_hash(self, h: bytes) -> int:
+        with self._lock:
+            idx = self._size
+            self._levels[0] += h
+            i, level = idx, 0
+            while i & 1:  # this node completes a pair: store the parent
+                parent = node_hash(self._node(level, i - 1), h)
+                if len(self._levels) == level + 1:
+                    self._levels.append(bytearray())
+                    self._offsets.append(0)
+                self._levels[level + 1] += parent
+                h, i, level = parent, i >> 1, level + 1
+            self._size = idx + 1
+            p = self._prune_below
+            if p and self._size % (1 << p) == 0:
+                # Block complete: its level-P node is stored, the nodes beneath it can go
+                for lvl in range(p):
+                    self._levels[lvl] = bytearray()
+                    self._offsets[lvl] = self._size >> lvl
+            self._root = None
+            return idx
+
+    def _node(self, level: int, index: int) -> bytes:
+        i = index - self._offsets[level]
+        if i < 0:
+            return self._pruned_node(level, index)
+        return bytes(self._levels[level][i * HASH_LEN: (i + 1) * HASH_LEN])
+
+    def _pruned_node(self, level: int, index: int) -> bytes:
+        assert self._leaves is not None
+        span = 1 << level
+        first = index * span
+        block = first >> self._prune_below
+        cached = self._block
+        if cached is None or cached[0] != block:
+            start = block << self._prune_below
+            hashes = self._leaves(start, start + (1 << self._prune_below))
+            if len(hashes) != 1 << self._prune_below:
+                raise IndexError(f"leaves {start}..{start + (1 << self._prune_below)} are no longer available")
+            cached = self._block = (block, hashes)
+        first -= block << self._prune_below
+        return _fold(cached[1][first: first + span])
+
+    def _range_hash(self, start: int, end: int) -> bytes:
+        """MTH(D[start:end]) for a range whose start is aligned to its left-subtree split."""
+        n = end - start
+        if n == 0:
+            return EMPTY_ROOT
+        if n & (n - 1) == 0 and start % n == 0:
+            return self._node(n.bit_length() - 1, start // n)
+        k = _split(n)
+        return node_hash(self._range_hash(start, start + k), self._range_hash(start + k, end))
+
+    def _check_size(self, size: int) -> int:
+        if not 0 <= size <= self._size:
+            raise ValueError(f"tree size must be between 0 and {self._size}")
+        return size
+
+    def root_at(self, size: int) -> bytes:
+        """Root of the tree as it was when it held `size` leaves."""
+        return self._range_hash(0, self._check_size(size))
+
+    def leaf(self, index: int) -> bytes:
+        if not 0 <= index < self._size:
+            raise IndexError("leaf index out of range")
+        return self._node(0, index)
+
+    def inclusion_proof(self, index: int, size: int) -> List[bytes]:
+        """Audit path for leaf `index` in the tree of `size` leaves."""
+        self._check_size(size)
+        if not 0 <= index < size:
+            raise IndexError("leaf index out of range")
+        path: List[bytes] = []
+        start, end, m = 0, size, index
+        while end - start > 1:
+            k = _split(end - start)
+            if m < k:
+                path.append(self._range_hash(start + k, end))
+                end = start + k
+            else:
+                path.append(self._range_hash(start, start + k))
+                start, m = start + k, m - k
+        path.reverse()  # leaf-to-root order
+        return path
+
+    def consistency_proof(self, first: int, second: int) -> List[bytes]:
+        """Proof that the tree of `first` leaves is a prefix of the tree of `second` leaves."""
+        self._check_size(second)
+        if not 0 <= first <= second:
+            raise ValueError("first must be between 0 and second")
+        if first == 0 or first == second:
+            return []
+        path: List[bytes] = []
+        start, end, m, complete = 0, second, first, True
+        while m != end - start:
+            k = _split(end - start)
+            if m <= k:
+                path.append(self._range_hash(start + k, end))
+                end = start + k
+            else:
+                path.append(self._range_hash(start, start + k))
+                start, m, complete = start + k, m - k, False
+        if not complete:
+            path.append(self._range_hash(start, end))
+        path.reverse()
+        return path
+
+
+def verify_inclusion(leaf: bytes, index: int, size: int, proof: Sequence[bytes], root: bytes) -> bool:
+    """Check an audit path (`leaf` is the leaf *hash*)."""
+    if not 0 <= index < size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for p in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            if not fn & 1:
+                while fn and not fn & 1:
+                    fn, sn = fn >> 1, sn >> 1
+        else:
+            r = node_hash(r, p)
+        fn, sn = fn >> 1, sn >> 1
+    return sn == 0 and r == root
+
+
+def verify_consistency(first: int, second: int, first_root: bytes, second_root: bytes, proof: Sequence[bytes]) -> bool:
+    if not 0 <= first <= second:
+        return False
+    if first == second:
+        return not proof and first_root == second_root
+    if first == 0:
+        return not proof
+    path = list(proof)
+    if first & (first - 1) == 0:
+        path.insert(0, first_root)
+    if not path:
+        return False
+    fn, sn = first - 1, second - 1
+    while fn & 1:
+        fn, sn = fn >> 1, sn >> 1
+    fr = sr = path[0]
+    for c in path[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr, sr = node_hash(c, fr), node_hash(c, sr)
+            if not fn & 1:
+                while fn and not fn & 1:
+                    fn, sn = fn >> 1, sn >> 1
+        else:
+            sr = node_hash(sr, c)
+        fn, sn = fn >> 1, sn >> 1
+    return sn == 0 and fr == first_root and sr == second_root
+
+
+__all__ = [
+    "EMPTY_ROOT",
+    "MerkleTree",
+    "leaf_hash",
+    "node_hash",
+    "verify_inclusion",
+    "verify_consistency",
+]
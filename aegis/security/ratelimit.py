@@ -0,0 +1,195 @@
+"""
+Sliding-window-counter rate limiting.
+
+Each key keeps only two counters: the current fixed window and the previous
+one. A request is allowed when
+
+    previous * (1 - elapsed_fraction_of_current_window) + current < limit
+
+This closely approximates a true sliding log, and every check is O(1) in
+memory and time, however many requests fall in a window.
+
+Backends:
+- `MemoryRateLimiter`: per-process dict of counters, guarded by a lock
+- `RedisRateLimiter`: one atomic server-side Lua script per check, issued over a
+  shared connection pool (one round trip, no read-modify-write race between workers).
+  Window keys look like `aegis:rl:{training:start}:<window index>`; the braces
+  are a hash tag, so both windows of a key share a Redis Cluster slot
+
+Redis errors are never swallowed silently. They are logged and counted
+(`aegis_rate_limit_errors_total`), and then handled by the configured
+`fail_mode`: `memory` falls back to a local limiter (the default), `open` allows
+the request, and `closed` rejects it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import importlib
+import logging
+import math
+import os
+import threading
+import time
+
+from ..metrics import metric
+
+try:  # optional shared backend
+    _redis: Any = importlib.import_module("redis")
+except Exception:  # pragma: no cover - optional
+    _redis = None
+
+RATE_DECISIONS = metric("Counter", "aegis_rate_limit_decisions_total", "Rate limiter decisions", ["key", "decision"])
+RATE_ERRORS = metric("Counter", "aegis_rate_limit_errors_total", "Rate limiter backend errors", ["backend"])
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    retry_after_s: float
+
+
+def _decide(prev: float, curr: float, frac: float, limit: int) -> Tuple[bool, float]:
+    est = prev * (1.0 - frac) + curr
+    return est < limit, est
+
+
+def _retry_after(prev: float, curr: float, frac: float, limit: int, window_s: float) -> float:
+    # Time until the weighted previous window has decayed enough for one more request
+    if prev <= 0 or curr >= limit:
+        return (1.0 - frac) * window_s
+    need = 1.0 - (limit - curr) / prev
+    return max(0.0, (need - frac) * window_s)
+
+
+class RateLimiter:
+    def hit(self, key: str, limit: int, window_s: float, *, now: Optional[float] = None) -> RateLimitDecision:
+        raise NotImplementedError
+
+
+class MemoryRateLimiter(RateLimiter):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # key -> (window index, previous window count, current window count)
+        self._state: Dict[str, Tuple[int, int, int]] = {}
+
+    def hit(self, key: str, limit: int, window_s: float, *, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        idx = int(now // window_s)
+        frac = (now - idx * window_s) / window_s
+        with self._lock:
+            w, prev, curr = self._state.get(key, (idx, 0, 0))
+            if w != idx:
+                prev, curr = (curr if w == idx - 1 else 0), 0
+            allowed, est = _decide(prev, curr, frac, limit)
+            if allowed:
+                curr += 1
+            self._state[key] = (idx, prev, curr)
+        if allowed:
+            return RateLimitDecision(True, max(0, int(limit - est - 1)), 0.0)
+        return RateLimitDecision(False, 0, _retry_after(prev, curr, frac, limit, window_s))
+
+
+# KEYS[1] previous window counter, KEYS[2] current window counter
+# ARGV[1] elapsed fraction of the current window, ARGV[2] limit, ARGV[3] counter TTL (ms)
+_LUA_SLIDING_WINDOW = """
+local prev = tonumber(redis.call('GET', KEYS[1]) or '0')
+local curr = tonumber(redis.call('GET', KEYS[2]) or '0')
+local frac = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local est = prev * (1 - frac) + curr
+if est >= limit then
+  return {0, prev, curr}
+end
+curr = redis.call('INCR', KEYS[2])
+if curr == 1 then
+  redis.call('PEXPIRE', KEYS[2], ARGV[3])
+end
+return {1, prev, curr}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_connections: int = 32,
+        prefix: str = "aegis:rl:",
+        fail_mode: str = "memory",
+    ) -> None:
+        if _redis is None:
+            raise RuntimeError("Redis rate limiting requires 'redis'. Install via: pip install redis")
+        if fail_mode not in {"memory", "open", "closed"}:
+            raise ValueError("fail_mode must be 'memory', 'open' or 'closed'")
+        self.pool = _redis.ConnectionPool.from_url(url, max_connections=max_connections)
+        self.client = _redis.Redis(connection_pool=self.pool)
+        self.script = self.client.register_script(_LUA_SLIDING_WINDOW)
+        self.prefix = prefix
+        self.fail_mode = fail_mode
+        self.fallback = MemoryRateLimiter()
+        self.log = logging.getLogger("aegis.ratelimit")
+
+    def hit(self, key: str, limit: int, window_s: float, *, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        idx = int(now // window_s)
+        frac = (now - idx * window_s) / window_s
+        ttl_ms = int(math.ceil(window_s * 2 * 1000))
+        # Hash-tag the key so both windows map to one Redis Cluster slot (the script touches both)
+        tag = f"{self.prefix}{{{key}}}"
+        try:
+            allowed, prev, curr = self.script(
+                keys=[f"{tag}:{idx - 1}", f"{tag}:{idx}"],
+                args=[repr(frac), int(limit), ttl_ms],
+            )
+        except Exception:
+            RATE_ERRORS.labels("redis").inc()
+            self.log.warning("redis rate limiter unavailable; fail_mode=%s", self.fail_mode, exc_info=True)
+            if self.fail_mode == "open":
+                return RateLimitDecision(True, 0, 0.0)
+            if self.fail_mode == "closed":
+                return RateLimitDecision(False, 0, 1.0)
+            return self.fallback.hit(key, limit, window_s, now=now)
+        if int(allowed):
+            est = int(prev) * (1.0 - frac) + int(curr)
+            return RateLimitDecision(True, max(0, int(limit - est)), 0.0)
+        return RateLimitDecision(False, 0, _retry_after(int(prev), int(curr), frac, limit, window_s))
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """Parse `"training:start=100/60,report:generate=10/60"` into `{key: (limit, window_s)}`."""
+    out: Dict[str, Tuple[int, float]] = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, rule = item.rpartition("=")
+        limit, _, window = rule.partition("/")
+        if not key or not limit:
+            raise ValueError(f"bad rate limit spec: {item!r}")
+        out[key] = (int(limit), float(window or 60))
+    return out
+
+
+def limiter_from_env() -> RateLimiter:
+    backend = os.environ.get("AEGIS_RATE_LIMIT_BACKEND", "memory").lower()
+    url = os.environ.get("REDIS_URL")
+    if backend == "redis" and url:
+        return RedisRateLimiter(
+            url,
+            max_connections=int(os.environ.get("AEGIS_RATE_LIMIT_REDIS_POOL", "32")),
+            fail_mode=os.environ.get("AEGIS_RATE_LIMIT_FAIL_MODE", "memory").lower(),
+        )
+    if backend == "redis":
+        logging.getLogger("aegis.ratelimit").warning("AEGIS_RATE_LIMIT_BACKEND=redis without REDIS_URL; using memory")
+    return MemoryRateLimiter()
+
+
+__all__ = [
+    "RateLimitDecision",
+    "RateLimiter",
+    "MemoryRateLimiter",
+    "RedisRateLimiter",
+    "RATE_DECISIONS",
+    "RATE_ERRORS",
+    "parse_limits",
+    "limiter_from_env",
+]
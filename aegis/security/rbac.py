@@ -26,6 +26,7 @@ ROLE_PERMS: Dict[Role, List[str]] = {
     "compliance:gdpr",
     "compliance:hipaa",
     "audit:read",
+    "update:submit",
     ],
     Role.operator: [
         "participant:register",
@@ -38,6 +39,7 @@ ROLE_PERMS: Dict[Role, List[str]] = {
         "strategy:select",
     "compliance:gdpr",
     "compliance:hipaa",
+    "update:submit",
     ],
     Role.viewer: [
         "training:status",
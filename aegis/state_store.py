@@ -0,0 +1,392 @@
+"""
+Shared API state (participants, sessions, datasets, config) for multi-worker deployments.
+
+Each gunicorn worker used to hold its own module-level dicts, so a request that
+landed on a different worker than the one that wrote the state saw nothing.
+`StateStore` keeps the state in namespaces of JSON values, and every namespace
+has a version counter that goes up on each write:
+
+- `MemoryStateStore`: process-local (default; single worker / tests)
+- `SQLiteStateStore`: one file shared by the workers of a host (WAL mode)
+- `RedisStateStore`: shared across hosts (requires 'redis')
+
+`StoreMapping` is the per-worker read-through cache the API uses. It behaves
+like a dict and reloads a namespace only when the namespace version changes,
+so reads cost one small version lookup (or nothing within `ttl_s`). Values are
+plain JSON. To change a nested value, assign the whole value back
+(`sessions[sid] = meta`) or use `update_key` for read-modify-write.
+
+Select a backend with `AEGIS_STATE_BACKEND=memory|sqlite|redis`, plus
+`AEGIS_STATE_SQLITE_PATH` or `REDIS_URL`.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, MutableMapping, Optional, Tuple
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:  # optional shared backend
+    _redis: Any = importlib.import_module("redis")
+except Exception:  # pragma: no cover - optional
+    _redis = None
+
+
+UpdateFn = Callable[[Optional[Any]], Optional[Any]]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True)
+
+
+class StateStore(ABC):
+    """Namespaced JSON key/value store with a per-namespace version counter."""
+
+    @abstractmethod
+    def get(self, ns: str, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    def items(self, ns: str) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def put_many(self, ns: str, values: Dict[str, Any]) -> int:
+        """Write several keys atomically; returns the new namespace version."""
+
+    @abstractmethod
+    def delete(self, ns: str, key: str) -> int: ...
+
+    @abstractmethod
+    def update_versioned(self, ns: str, key: str, fn: UpdateFn) -> Tuple[Optional[Any], int]:
+        """Atomically replace `key` with `fn(current)`; `None` deletes. Returns the new value and namespace version."""
+
+    @abstractmethod
+    def version(self, ns: str) -> int: ...
+
+    def update(self, ns: str, key: str, fn: UpdateFn) -> Optional[Any]:
+        """Atomically replace `key` with `fn(current)`; `None` deletes. Returns the new value."""
+        return self.update_versioned(ns, key, fn)[0]
+
+    def put(self, ns: str, key: str, value: Any) -> int:
+        return self.put_many(ns, {key: value})
+
+    def version_sum(self, namespaces: Iterable[str]) -> int:
+        """Combined version of several namespaces; increases whenever any of them is written."""
+        return sum(self.version(ns) for ns in namespaces)
+
+    def close(self) -> None:
+        return None
+
+
+class MemoryStateStore(StateStore):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def _bump(self, ns: str) -> int:
+        self._versions[ns] = self._versions.get(ns, 0) + 1
+        return self._versions[ns]
+
+    def get(self, ns: str, key: str) -> Optional[Any]:
+        with self._lock:
+            raw = self._data.get(ns, {}).get(key)
+        return None if raw is None else json.loads(raw)
+
+    def items(self, ns: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = dict(self._data.get(ns, {}))
+        return {k: json.loads(v) for k, v in rows.items()}
+
+    def put_many(self, ns: str, values: Dict[str, Any]) -> int:
+        encoded = {k: _dumps(v) for k, v in values.items()}
+        with self._lock:
+            self._data.setdefault(ns, {}).update(encoded)
+            return self._bump(ns)
+
+    def delete(self, ns: str, key: str) -> int:
+        with self._lock:
+            self._data.get(ns, {}).pop(key, None)
+            return self._bump(ns)
+
+    def update_versioned(self, ns: str, key: str, fn: UpdateFn) -> Tuple[Optional[Any], int]:
+        with self._lock:
+            bucket = self._data.setdefault(ns, {})
+            raw = bucket.get(key)
+            new = fn(None if raw is None else json.loads(raw))
+            if new is None:
+                bucket.pop(key, None)
+            else:
+                bucket[key] = _dumps(new)
+            return new, self._bump(ns)
+
+    def version(self, ns: str) -> int:
+        with self._lock:
+            return self._versions.get(ns, 0)
+
+
+class SQLiteStateStore(StateStore):
+    """SQLite-backed store; safe across processes on one host (WAL, busy timeout)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS state (ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (ns, key)) WITHOUT ROWID")
+        conn.execute("CREATE TABLE IF NOT EXISTS state_versions (ns TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; writes take the lock up front with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, ns: str) -> int:
+        conn.execute(
+            "INSERT INTO state_versions (ns, version) VALUES (?, 1) ON CONFLICT(ns) DO UPDATE SET version = version + 1",
+            (ns,),
+        )
+        return int(conn.execute("SELECT version FROM state_versions WHERE ns = ?", (ns,)).fetchone()[0])
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            out = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return out
+
+    def get(self, ns: str, key: str) -> Optional[Any]:
+        row = self._conn().execute("SELECT value FROM state WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def items(self, ns: str) -> Dict[str, Any]:
+        rows = self._conn().execute("SELECT key, value FROM state WHERE ns = ?", (ns,)).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def put_many(self, ns: str, values: Dict[str, Any]) -> int:
+        rows = [(ns, k, _dumps(v)) for k, v in values.items()]
+
+        def _tx(conn: sqlite3.Connection) -> int:
+            conn.executemany("INSERT OR REPLACE INTO state (ns, key, value) VALUES (?, ?, ?)", rows)
+            return self._bump(conn, ns)
+
+        return int(self._write(_tx))
+
+    def delete(self, ns: str, key: str) -> int:
+        def _tx(conn: sqlite3.Connection) -> int:
+            conn.execute("DELETE FROM state WHERE ns = ? AND key = ?", (ns, key))
+            return self._bump(conn, ns)
+
+        return int(self._write(_tx))
+
+    def update_versioned(self, ns: str, key: str, fn: UpdateFn) -> Tuple[Optional[Any], int]:
+        def _tx(conn: sqlite3.Connection) -> Tuple[Optional[Any], int]:
+            row = conn.execute("SELECT value FROM state WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            new = fn(None if row is None else json.loads(row[0]))
+            if new is None:
+                conn.execute("DELETE FROM state WHERE ns = ? AND key = ?", (ns, key))
+            else:
+                conn.execute("INSERT OR REPLACE INTO state (ns, key, value) VALUES (?, ?, ?)", (ns, key, _dumps(new)))
+            return new, self._bump(conn, ns)
+
+        new, version = self._write(_tx)
+        return new, int(version)
+
+    def version(self, ns: str) -> int:
+        row = self._conn().execute("SELECT version FROM state_versions WHERE ns = ?", (ns,)).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def version_sum(self, namespaces: Iterable[str]) -> int:
+        names = list(namespaces)
+        marks = ",".join("?" * len(names))
+        row = self._conn().execute(f"SELECT COALESCE(SUM(version), 0) FROM state_versions WHERE ns IN ({marks})", names).fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisStateStore(StateStore):
+    """Redis-backed store: one hash per namespace plus an INCR version key."""
+
+    def __init__(self, url: str, *, prefix: str = "aegis:state:") -> None:
+        if _redis is None:
+            raise RuntimeError("Redis state backend requires 'redis'. Install via: pip install redis")
+        self.client = _redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _h(self, ns: str) -> str:
+        return f"{self.prefix}{ns}"
+
+    def _v(self, ns: str) -> str:
+        return f"{self.prefix}{ns}:v"
+
+    def get(self, ns: str, key: str) -> Optional[Any]:
+        raw = self.client.hget(self._h(ns), key)
+        return None if raw is None else json.loads(raw)
+
+    def items(self, ns: str) -> Dict[str, Any]:
+        return {(k.decode() if isinstance(k, bytes) else k): json.loads(v) for k, v in self.client.hgetall(self._h(ns)).items()}
+
+    def put_many(self, ns: str, values: Dict[str, Any]) -> int:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(self._h(ns), mapping={k: _dumps(v) for k, v in values.items()})
+        pipe.incr(self._v(ns))
+        return int(pipe.execute()[-1])
+
+    def delete(self, ns: str, key: str) -> int:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hdel(self._h(ns), key)
+        pipe.incr(self._v(ns))
+        return int(pipe.execute()[-1])
+
+    def update_versioned(self, ns: str, key: str, fn: UpdateFn) -> Tuple[Optional[Any], int]:
+        h = self._h(ns)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(h)
+                    raw = pipe.hget(h, key)
+                    new = fn(None if raw is None else json.loads(raw))
+                    pipe.multi()
+                    if new is None:
+                        pipe.hdel(h, key)
+                    else:
+                        pipe.hset(h, key, _dumps(new))
+                    pipe.incr(self._v(ns))
+                    return new, int(pipe.execute()[-1])
+                except _redis.WatchError:
+                    continue
+
+    def version(self, ns: str) -> int:
+        raw = self.client.get(self._v(ns))
+        return 0 if raw is None else int(raw)
+
+    def version_sum(self, namespaces: Iterable[str]) -> int:
+        names = list(namespaces)
+        return sum(int(v) for v in self.client.mget([self._v(ns) for ns in names]) if v is not None) if names else 0
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def store_from_env() -> StateStore:
+    backend = os.environ.get("AEGIS_STATE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteStateStore(os.environ.get("AEGIS_STATE_SQLITE_PATH", "aegis_state.db"))
+    if backend == "redis":
+        url = os.environ.get("REDIS_URL")
+        if not url:
+            raise RuntimeError("AEGIS_STATE_BACKEND=redis requires REDIS_URL")
+        return RedisStateStore(url)
+    if backend != "memory":
+        raise ValueError(f"unknown AEGIS_STATE_BACKEND: {backend}")
+    return MemoryStateStore()
+
+
+class StoreMapping(MutableMapping[str, Any]):
+    """Dict view of one namespace with a version-invalidated, per-worker cache."""
+
+    def __init__(
+        self,
+        store: StateStore,
+        ns: str,
+        *,
+        ttl_s: float = 0.0,
+        encode: Callable[[Any], Any] = lambda v: v,
+        decode: Callable[[Any], Any] = lambda v: v,
+    ) -> None:
+        self.store = store
+        self.ns = ns
+        self.ttl_s = float(ttl_s)
+        self._encode = encode
+        self._decode = decode
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self._version = -1
+        self._checked = 0.0
+
+    def _view(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            if self._version < 0 or now - self._checked >= self.ttl_s:
+                v = self.store.version(self.ns)
+                if v != self._version:
+                    self._data = {k: self._decode(val) for k, val in self.store.items(self.ns).items()}
+                    self._version = v
+                self._checked = now
+            return self._data
+
+    def _wrote(self, version: int, apply: Callable[[Dict[str, Any]], None]) -> None:
+        # Patch the cache only if nobody else wrote in between; otherwise reload on next read
+        if version == self._version + 1:
+            apply(self._data)
+            self._version = version
+        else:
+            self._version = -1
+
+    def __getitem__(self, key: str) -> Any:
+        return self._view()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            v = self.store.put(self.ns, key, self._encode(value))
+            self._wrote(v, lambda d: d.__setitem__(key, value))
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            if key not in self._view():
+                raise KeyError(key)
+            v = self.store.delete(self.ns, key)
+            self._wrote(v, lambda d: d.pop(key, None))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._view()))
+
+    def __len__(self) -> int:
+        return len(self._view())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._view()
+
+    def set_many(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            v = self.store.put_many(self.ns, {k: self._encode(val) for k, val in values.items()})
+            self._wrote(v, lambda d: d.update(values))
+
+    def update_key(self, key: str, fn: UpdateFn) -> Optional[Any]:
+        """Atomic read-modify-write of one key across workers."""
+
+        def _fn(raw: Optional[Any]) -> Optional[Any]:
+            new = fn(None if raw is None else self._decode(raw))
+            return None if new is None else self._encode(new)
+
+        with self._lock:
+            out, v = self.store.update_versioned(self.ns, key, _fn)
+            new = None if out is None else self._decode(out)
+            self._wrote(v, lambda d: d.pop(key, None) if new is None else d.__setitem__(key, new))
+        return new
+
+
+__all__ = [
+    "StateStore",
+    "MemoryStateStore",
+    "SQLiteStateStore",
+    "RedisStateStore",
+    "StoreMapping",
+    "store_from_env",
+]
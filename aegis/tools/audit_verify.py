@@ -5,6 +5,24 @@ Supports:
 - JSONL hash-chained logs (file-backed)
 - SQLite logs with HMAC signatures
 
+Large logs are verified in parallel (`--workers N`): the JSONL file is split into
+byte ranges and the table into id ranges. Each chunk is checked (linkage, curr
+hashes, HMAC signatures) in its own process, and rows are streamed with
+`fetchmany`. Only the first record of each chunk depends on its predecessor, so
+those records are re-checked in order when the chunks are stitched together. The
+result is identical to a sequential run, including the first failing index.
+JSONL files are memory-mapped and scanned in windows of whole lines. Lines in
+the compact `AuditEvent` layout are linked a window at a time from numpy hash
+columns, without a JSON parse (see `security.audit_scan`). SQLite rows are checked a
+`fetchmany` batch at a time: one tuple comparison for the linkage and one constant-time
+comparison for the HMAC signatures, computed from a pre-keyed signer (see
+`security.audit_sign`). Throughput is reported in MB/s.
+
+After a successful run, the CLI writes an HMAC-signed checkpoint (last index,
+last hash and byte offset / row id). `--since-checkpoint` checks the signature,
+confirms the anchor record still carries the recorded hash, and then verifies
+only the records appended since, so a nightly run costs one day's traffic.
+
 Exit codes:
  0 - OK
  1 - Integrity failure
@@ -18,9 +36,20 @@ import json
 import os
 import sqlite3
 import sys
-from dataclasses import dataclass
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ..security.audit_scan import chain_hashes, iter_windows, skip_records
+from ..security.audit_segments import Segment, load_manifest, open_segment
+from ..security.audit_sign import RowSigner
+
+_MIN_CHUNK_BYTES = 1 << 20
+_FETCH_ROWS = 10_000
 
 
 @dataclass
@@ -29,89 +58,427 @@ class VerifyResult:
     checked: int
     failed_index: Optional[int] = None
     message: str = ""
+    bytes: int = 0
+    seconds: float = 0.0
+    # Where a later `since=` run can resume (set on success once anything was verified)
+    checkpoint: Optional["Checkpoint"] = None
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+
+@dataclass
+class _Chunk:
+    """One chunk verified on its own; its first record is re-checked against the previous chunk."""
+
+    count: int = 0
+    first: Any = None
+    last: Optional[str] = None  # link value of the last record
+    last_id: int = 0  # SQLite row id of the last record
+    failed_at: Optional[int] = None  # records verified in this chunk before the failure
+    failed_index: Optional[int] = None
+    message: str = ""
+
+
+def _is_generic(rec: dict) -> bool:
+    return "curr_hash" in rec or "payload" in rec
+
+
+def _link(rec: dict) -> Optional[str]:
+    """The value the next record chains to."""
+    return rec.get("curr_hash") if _is_generic(rec) else rec.get("params_hash")
+
+
+def _check_record(rec: dict, prev_curr: Optional[str], first: bool) -> Optional[str]:
+    """Error message for one JSONL record given the previous record's link value, or None."""
+    # Support two schemas:
+    # 1) Generic: {payload, prev_hash, curr_hash}
+    # 2) Aegis:  {timestamp, actor, action, params_hash, outcome, prev_hash}
+    if _is_generic(rec):
+        payload = rec.get("payload")
+        chain_prev = rec.get("prev_hash")
+        chain_curr = rec.get("curr_hash")
+        if payload is None or chain_curr is None:
+            return "Missing payload or curr_hash"
+        m = hashlib.sha256()
+        if prev_curr:
+            m.update(prev_curr.encode())
+        if chain_prev and prev_curr and chain_prev != prev_curr:
+            return "prev_hash mismatch"
+        m.update(json.dumps(payload, sort_keys=True).encode())
+        if m.hexdigest() != chain_curr:
+            return "curr_hash mismatch"
+        return None
+    # Aegis schema: verify linkage prev_hash == previous params_hash
+    if not rec.get("params_hash"):
+        return "Missing params_hash"
+    # For first record, any prev_hash is accepted; for others, it must match previous params_hash
+    if not first and rec.get("prev_hash") != prev_curr:
+        return "prev_hash linkage mismatch"
+    return None
+
+
+def _take(out: _Chunk, line: bytes) -> bool:
+    """Add one JSONL line to a chunk; False once the chunk has failed."""
+    line = line.strip()
+    if not line:
+        return True
+    rec = json.loads(line)
+    if out.count:
+        err = _check_record(rec, out.last, False)
+        if err:
+            out.failed_at, out.message = out.count, err
+            return False
+    else:
+        out.first = rec
+    out.last = _link(rec)
+    out.count += 1
+    return True
+
+
+def _take_window(out: _Chunk, window: bytes) -> bool:
+    """Add a block of whole lines; compact Aegis lines are linked as arrays without parsing them."""
+    columns = chain_hashes(window)
+    if columns is None:
+        return all(_take(out, line) for line in window.split(b"\n"))
+    hashes, prevs = columns
+    first_prev = prevs[0].tobytes().decode()
+    if out.count:
+        if first_prev != out.last:
+            out.failed_at, out.message = out.count, "prev_hash linkage mismatch"
+            return False
+    else:
+        out.first = {"params_hash": hashes[0].tobytes().decode(), "prev_hash": first_prev}
+    broken = np.flatnonzero((prevs[1:] != hashes[:-1]).any(axis=1))
+    if len(broken):
+        out.failed_at, out.message = out.count + 1 + int(broken[0]), "prev_hash linkage mismatch"
+        return False
+    out.last = hashes[-1].tobytes().decode()
+    out.count += len(hashes)
+    return True
+
+
+def _jsonl_chunk(path: str, start: int, end: int) -> _Chunk:
+    """Verify the records whose lines start in [start, end); the first one is left to the stitcher."""
+    out = _Chunk()
+    with open(path, "rb") as f:
+        f.seek(start)
+        # align: the line straddling `start` belongs to the previous chunk
+        for window in iter_windows(f, end, align=True):
+            if not _take_window(out, window):
+                break
+    return out
+
+
+def _segment_chunk(path: str, skip: int) -> _Chunk:
+    """Verify a whole closed (possibly compressed) segment, after its first `skip` records."""
+    out = _Chunk()
+    with open_segment(path) as f:
+        for window in iter_windows(f):
+            if skip:
+                pos, passed = skip_records(window, skip)
+                window, skip = window[pos:], skip - passed
+            if not _take_window(out, window):
+                break
+    return out
+
+
+def _ranges(lo: int, hi: int, parts: int) -> List[Tuple[int, int]]:
+    step = max(1, -(-(hi - lo) // max(1, parts)))
+    return [(a, min(hi, a + step)) for a in range(lo, hi, step)]
+
+
+def _run_chunks(jobs: List[Tuple[Callable[..., _Chunk], Tuple[Any, ...]]], workers: int) -> List[_Chunk]:
+    """Run `(fn, args)` chunk jobs, in a process pool when `workers` > 1; results keep job order."""
+    if workers <= 1 or len(jobs) <= 1:
+        return [fn(*args) for fn, args in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in jobs]
+        return [f.result() for f in futures]
 
 
-def _iter_jsonl(path: Path) -> Iterator[dict]:
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            yield json.loads(line)
+@dataclass
+class Checkpoint:
+    """Position after a successful verification, HMAC-signed when written to disk."""
+
+    kind: str  # "jsonl" or "sqlite"
+    source: str  # basename of the verified log
+    last_index: int  # index of the last verified record
+    last_hash: Optional[str]  # its link value (params_hash / curr_hash)
+    offset: int  # JSONL: byte offset just past it; SQLite: its row id
+    segment_start: int = 0  # JSONL archives: index of the active file's first record when `offset` was taken
+
+    def _payload(self) -> bytes:
+        return json.dumps(asdict(self), sort_keys=True, separators=(",", ":")).encode()
+
+    def signature(self, key: str) -> str:
+        return hmac.new(key.encode(), self._payload(), hashlib.sha256).hexdigest()
+
+
+def write_checkpoint(path: str, cp: Checkpoint, key: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(asdict(cp), signature=cp.signature(key)), f)
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path: str, key: str) -> Checkpoint:
+    """Load a checkpoint; raises ValueError if it is malformed or its signature does not match."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    try:
+        sig = data.pop("signature")
+        cp = Checkpoint(**data)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"malformed checkpoint: {path}") from e
+    if not isinstance(sig, str) or not hmac.compare_digest(sig, cp.signature(key)):
+        raise ValueError(f"checkpoint signature mismatch: {path}")
+    return cp
+
+
+def _last_record_before(path: str, offset: int) -> Optional[dict]:
+    """The last non-blank JSONL record ending at or before `offset`."""
+    window = 1 << 16
+    with open(path, "rb") as f:
+        while True:
+            start = max(0, offset - window)
+            f.seek(start)
+            lines = f.read(offset - start).split(b"\n")
+            if start:
+                lines = lines[1:]  # may be cut off by the window
+            for line in reversed(lines):
+                if line.strip():
+                    rec: dict = json.loads(line)
+                    return rec
+            if not start:
+                return None
+            window *= 4
+
+
+def _resume_error(since: Checkpoint, kind: str, source: str) -> Optional[str]:
+    if since.kind != kind or since.source != os.path.basename(source):
+        return f"checkpoint is for {since.kind} log {since.source!r}"
+    return None
+
+
+def _matches_manifest(seg: Segment, start: int, c: _Chunk) -> bool:
+    if start == seg.first_index and c.first is not None:
+        if _link(c.first) != seg.first_hash or c.first.get("prev_hash") != seg.first_prev_hash:
+            return False
+    if c.failed_at is None:  # read to the end
+        return c.count == seg.first_index + seg.count - start and c.last == seg.last_hash
+    return True
+
 
+def verify_jsonl(
+    path: str,
+    workers: int = 1,
+    chunk_bytes: Optional[int] = None,
+    since: Optional[Checkpoint] = None,
+) -> VerifyResult:
+    """Verify a JSONL chain, split into byte ranges across `workers` processes.
 
-def verify_jsonl(path: str) -> VerifyResult:
+    A segmented archive (`<path>.manifest.json`) is verified segment by segment.
+    Each closed segment is one job, checked against its manifest entry, and
+    followed by the active file. With `since`, only the records after the
+    checkpoint are verified: older segments are not opened, and the active file
+    is read from the checkpoint's offset. `checked` counts only these records;
+    `failed_index` stays absolute.
+    """
     p = Path(path)
-    if not p.exists():
+    segments = load_manifest(path)
+    if not p.exists() and not segments:
         return VerifyResult(False, 0, None, f"File not found: {path}")
+    t0 = time.perf_counter()
+    size = p.stat().st_size if p.exists() else 0
+    active_first = segments[-1].first_index + segments[-1].count if segments else 0
+    start, base, prev_curr = 0, 0, None
+    if since is not None:
+        err = _resume_error(since, "jsonl", path)
+        if err is None and since.segment_start == active_first:
+            if since.offset > size:
+                err = "log is shorter than the checkpoint"
+            else:
+                anchor = _last_record_before(path, since.offset) if since.offset else None
+                if since.offset and (anchor is None or _link(anchor) != since.last_hash):
+                    err = "checkpoint anchor mismatch"
+                start = since.offset
+        elif err is None and since.last_index >= active_first:
+            err = "checkpoint anchor mismatch"
+        if err:
+            return VerifyResult(False, 0, since.last_index, err)
+        base, prev_curr = since.last_index + 1, since.last_hash
 
-    prev_curr: Optional[str] = None
-    checked = 0
-    for idx, rec in enumerate(_iter_jsonl(p)):
-        # Support two schemas:
-        # 1) Generic: {payload, prev_hash, curr_hash}
-        # 2) Aegis:  {timestamp, actor, action, params_hash, outcome, prev_hash}
-        if "curr_hash" in rec or "payload" in rec:
-            payload = rec.get("payload")
-            chain_prev = rec.get("prev_hash")
-            chain_curr = rec.get("curr_hash")
-            if payload is None or chain_curr is None:
-                return VerifyResult(False, checked, idx, "Missing payload or curr_hash")
-            m = hashlib.sha256()
-            if prev_curr:
-                m.update(prev_curr.encode())
-            if chain_prev and prev_curr and chain_prev != prev_curr:
-                return VerifyResult(False, checked, idx, "prev_hash mismatch")
-            m.update(json.dumps(payload, sort_keys=True).encode())
-            computed = m.hexdigest()
-            if computed != chain_curr:
-                return VerifyResult(False, checked, idx, "curr_hash mismatch")
-            prev_curr = chain_curr
-        else:
-            # Aegis schema: verify linkage prev_hash == previous params_hash
-            params_hash = rec.get("params_hash")
-            chain_prev = rec.get("prev_hash")
-            if not params_hash:
-                return VerifyResult(False, checked, idx, "Missing params_hash")
-            # For first record, any prev_hash is accepted; for others, it must match previous params_hash
-            if checked > 0 and chain_prev != prev_curr:
-                return VerifyResult(False, checked, idx, "prev_hash linkage mismatch")
-            prev_curr = params_hash
-        checked += 1
-
-    return VerifyResult(True, checked, None, "OK")
-
-
-def verify_sqlite(db_path: str, hmac_key_env: str = "AEGIS_AUDIT_HMAC_KEY") -> VerifyResult:
+    folder = os.path.dirname(path)
+    jobs: List[Tuple[Callable[..., _Chunk], Tuple[Any, ...]]] = []
+    plan: List[Tuple[Optional[Segment], int]] = []  # (segment, absolute index of its first checked record)
+    nbytes = size - start
+    for closed in segments:
+        if closed.first_index + closed.count <= base:
+            continue
+        skip = max(0, base - closed.first_index)
+        jobs.append((_segment_chunk, (os.path.join(folder, closed.file), skip)))
+        plan.append((closed, closed.first_index + skip))
+        nbytes += closed.bytes
+    if chunk_bytes is None:
+        chunk_bytes = max(_MIN_CHUNK_BYTES, -(-(size - start) // (4 * max(1, workers))))
+    for a, b in _ranges(start, size, -(-(size - start) // max(1, chunk_bytes))):
+        jobs.append((_jsonl_chunk, (path, a, b)))
+        plan.append((None, -1))
+    chunks = _run_chunks(jobs, workers)
+
+    index = base  # absolute index of the next record
+    in_active = False
+    for (seg, seg_start), c in zip(plan, chunks):
+        expected = seg_start if seg is not None else max(base, active_first)
+        if (seg is not None or not in_active and c.first is not None) and index != expected:
+            return VerifyResult(False, index - base, index, "missing segment before index " + str(expected), nbytes, time.perf_counter() - t0)
+        if seg is not None and not _matches_manifest(seg, seg_start, c):
+            return VerifyResult(False, index - base, index, f"segment {seg.file} does not match the manifest", nbytes, time.perf_counter() - t0)
+        in_active = in_active or (seg is None and c.first is not None)
+        if c.first is None:
+            continue
+        err = _check_record(c.first, prev_curr, index == 0)
+        if err:
+            return VerifyResult(False, index - base, index, err, nbytes, time.perf_counter() - t0)
+        if c.failed_at is not None:
+            index += c.failed_at
+            return VerifyResult(False, index - base, index, c.message, nbytes, time.perf_counter() - t0)
+        prev_curr = c.last
+        index += c.count
+    res = VerifyResult(True, index - base, None, "OK", nbytes, time.perf_counter() - t0)
+    if index:
+        res.checkpoint = Checkpoint("jsonl", p.name, index - 1, prev_curr, size, segment_start=active_first)
+    return res
+
+
+def _sqlite_chunk(db_path: str, key: str, lo: int, hi: int) -> _Chunk:
+    """Verify rows with lo <= id < hi a `fetchmany` batch at a time; the first row's linkage is left to the stitcher."""
+    out = _Chunk()
+    signer = RowSigner(key)
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.execute(
+            "SELECT id, params_hash, prev_hash, signature FROM audit_events WHERE id >= ? AND id < ? ORDER BY id ASC",
+            (lo, hi),
+        )
+        while True:
+            rows = cur.fetchmany(_FETCH_ROWS)
+            if not rows:
+                return out
+            ids, hashes, prevs, sigs = zip(*rows)
+            if not out.count:
+                out.first = (ids[0], prevs[0])
+                links, start = hashes[:-1], 1
+            else:
+                links, start = (out.last,) + hashes[:-1], 0
+            # Whole-batch checks first; positions are only searched for once a batch fails
+            broken = None
+            if prevs[start:] != links:
+                broken = next(i for i in range(start, len(rows)) if prevs[i] != links[i - start])
+            end = len(rows) if broken is None else broken
+            bad_sig = signer.first_bad(hashes[:end], prevs[:end], sigs[:end])
+            if bad_sig is not None:
+                out.failed_at, out.failed_index, out.message = out.count + bad_sig, ids[bad_sig], "HMAC signature mismatch"
+                return out
+            if broken is not None:
+                out.failed_at, out.failed_index, out.message = out.count + broken, ids[broken], "prev_hash linkage mismatch"
+                return out
+            out.last, out.last_id = hashes[-1], ids[-1]
+            out.count += len(rows)
+    finally:
+        conn.close()
+
+
+def verify_sqlite(
+    db_path: str,
+    hmac_key_env: str = "AEGIS_AUDIT_HMAC_KEY",
+    workers: int = 1,
+    chunk_rows: Optional[int] = None,
+    since: Optional[Checkpoint] = None,
+) -> VerifyResult:
+    """Verify a SQLite log, split into id ranges across `workers` processes (`since`: rows after a checkpoint)."""
     if not os.path.exists(db_path):
         return VerifyResult(False, 0, None, f"DB not found: {db_path}")
     key = os.getenv(hmac_key_env)
     if not key:
         return VerifyResult(False, 0, None, f"HMAC key env var not set: {hmac_key_env}")
-
+    t0 = time.perf_counter()
+    size = os.path.getsize(db_path)
+    after, base, prev_params = 0, 0, None
     conn = sqlite3.connect(db_path)
     try:
-        cur = conn.cursor()
-        # Aegis schema
-        cur.execute("SELECT id, params_hash, prev_hash, signature FROM audit_events ORDER BY id ASC")
-        rows = cur.fetchall()
-        checked = 0
-        prev_params: Optional[str] = None
-        for row in rows:
-            idx, params_hash, prev_hash, signature = row
-            # Linkage check
-            if checked > 0 and prev_hash != prev_params:
-                return VerifyResult(False, checked, idx, "prev_hash linkage mismatch")
-            # HMAC check if signature present
-            if signature is not None:
-                mac = hmac.new(key.encode(), (params_hash + (prev_hash or "")).encode(), hashlib.sha256).hexdigest()
-                if mac != signature:
-                    return VerifyResult(False, checked, idx, "HMAC signature mismatch")
-            prev_params = params_hash
-            checked += 1
-        return VerifyResult(True, checked, None, "OK")
+        first_id, hi = conn.execute("SELECT MIN(id), MAX(id) FROM audit_events").fetchone()
+        if since is not None:
+            err = _resume_error(since, "sqlite", db_path)
+            if err is None:
+                anchor = conn.execute("SELECT params_hash FROM audit_events WHERE id = ?", (since.offset,)).fetchone()
+                if anchor is None or anchor[0] != since.last_hash:
+                    err = "checkpoint anchor mismatch"
+            if err:
+                return VerifyResult(False, 0, since.offset, err)
+            after, base, prev_params = since.offset, since.last_index + 1, since.last_hash
+        lo = conn.execute("SELECT MIN(id) FROM audit_events WHERE id > ?", (after,)).fetchone()[0]
     finally:
         conn.close()
+    if lo is None:
+        res = VerifyResult(True, 0, None, "OK", 0, time.perf_counter() - t0)
+        res.checkpoint = since
+        return res
+    span = hi + 1 - lo
+    size = size * span // (hi + 1 - first_id)  # the share of the file this run reads
+    parts = -(-span // chunk_rows) if chunk_rows else 4 * max(1, workers)
+    chunks = _run_chunks([(_sqlite_chunk, (db_path, key, a, b)) for a, b in _ranges(lo, hi + 1, parts)], workers)
+
+    checked, last_id = 0, after
+    for c in chunks:
+        if c.first is None:
+            continue
+        chunk_first_id, first_prev = c.first
+        if base + checked > 0 and first_prev != prev_params:
+            return VerifyResult(False, checked, chunk_first_id, "prev_hash linkage mismatch", size, time.perf_counter() - t0)
+        if c.failed_at is not None:
+            return VerifyResult(False, checked + c.failed_at, c.failed_index, c.message, size, time.perf_counter() - t0)
+        prev_params, last_id = c.last, c.last_id
+        checked += c.count
+    res = VerifyResult(True, checked, None, "OK", size, time.perf_counter() - t0)
+    res.checkpoint = Checkpoint("sqlite", os.path.basename(db_path), base + checked - 1, prev_params, last_id)
+    return res
+
+
+def verify_resumable(
+    kind: str,
+    path: str,
+    *,
+    workers: int = 1,
+    hmac_key_env: str = "AEGIS_AUDIT_HMAC_KEY",
+    checkpoint_path: Optional[str] = None,
+    since_checkpoint: bool = False,
+) -> VerifyResult:
+    """Verify a log (from its checkpoint with `since_checkpoint`) and write a signed checkpoint on success.
+
+    The checkpoint defaults to `<path>.checkpoint` and is signed with the key in
+    `hmac_key_env`; without that key no checkpoint is written and resuming fails.
+    """
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    key = os.getenv(hmac_key_env)
+    since: Optional[Checkpoint] = None
+    if since_checkpoint:
+        if not key:
+            return VerifyResult(False, 0, None, f"HMAC key env var not set: {hmac_key_env}")
+        if os.path.exists(checkpoint_path):
+            try:
+                since = read_checkpoint(checkpoint_path, key)
+            except ValueError as e:
+                return VerifyResult(False, 0, None, str(e))
+    if kind == "jsonl":
+        res = verify_jsonl(path, workers=workers, since=since)
+    else:
+        res = verify_sqlite(path, hmac_key_env, workers=workers, since=since)
+    if res.ok and key and res.checkpoint is not None:
+        write_checkpoint(checkpoint_path, res.checkpoint, key)
+    return res
 
 
 def main(argv: list[str]) -> int:
@@ -122,24 +489,34 @@ def main(argv: list[str]) -> int:
 
     p_jsonl = sub.add_parser("jsonl", help="Verify JSONL hash-chained logs")
     p_jsonl.add_argument("path", help="Path to JSONL log file")
+    p_jsonl.add_argument("--workers", type=int, default=1, help="Verifier processes")
+    p_jsonl.add_argument("--hmac-key-env", default="AEGIS_AUDIT_HMAC_KEY", help="Env var name for the checkpoint HMAC key")
 
     p_sqlite = sub.add_parser("sqlite", help="Verify SQLite HMAC logs")
     p_sqlite.add_argument("db", help="Path to SQLite DB file")
     p_sqlite.add_argument("--hmac-key-env", default="AEGIS_AUDIT_HMAC_KEY", help="Env var name for HMAC key")
+    p_sqlite.add_argument("--workers", type=int, default=1, help="Verifier processes")
+    for p in (p_jsonl, p_sqlite):
+        p.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <log>.checkpoint)")
+        p.add_argument("--since-checkpoint", action="store_true", help="Verify only what was appended after the checkpoint")
 
     args = parser.parse_args(argv)
 
     try:
-        if args.mode == "jsonl":
-            res = verify_jsonl(args.path)
-        else:
-            res = verify_sqlite(args.db, args.hmac_key_env)
+        res = verify_resumable(
+            args.mode,
+            args.path if args.mode == "jsonl" else args.db,
+            workers=args.workers,
+            hmac_key_env=args.hmac_key_env,
+            checkpoint_path=args.checkpoint,
+            since_checkpoint=args.since_checkpoint,
+        )
     except Exception as e:  # noqa: BLE001
         print(f"Error: {e}", file=sys.stderr)
         return 2
 
     if res.ok:
-        print(f"OK - checked={res.checked}")
+        print(f"OK - checked={res.checked} throughput={res.mb_per_s:.1f}MB/s")
         return 0
     else:
         print(f"FAIL - checked={res.checked} idx={res.failed_index} msg={res.message}", file=sys.stderr)
@@ -0,0 +1,445 @@
+"""
+Background training-session executor.
+
+`SessionExecutor` is a small supervisor: one asyncio event loop on a daemon
+thread owns a task per running session, and the CPU-bound part of every round
+(local updates, verification, aggregation, checkpointing) runs on a bounded
+thread pool. At most `max_concurrent_sessions` run at once; further sessions
+wait in a FIFO queue with status "queued". Stopping a session is cooperative:
+the flag is checked between rounds and while a round waits out its minimum
+period, so a round that has started always finishes or fails cleanly. A
+resubmitted session waits for the run it replaces to return from its round
+before its own first round, so two runs never share per-session state.
+
+`FederatedRoundRunner` is the default round function. Each round it collects
+one signed `UpdateEnvelope` per participant (from the pluggable update
+source), aggregates them with a per-session `FederatedCoordinator`, publishes
+the result as the next global version and commits a checkpoint when a store
+is configured. With an `UpdateInbox`, rounds aggregate the updates participants
+uploaded since the previous round; a round without uploads falls back to the
+update source.
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Set
+import asyncio
+import logging
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from .checkpoint import CheckpointStore
+from .federated_coordinator import FederatedCoordinator, UpdateEnvelope
+from .simulation import local_update, synthetic_partition
+from .update_inbox import UpdateInbox
+
+
+@dataclass
+class RoundResult:
+    updates: int = 0
+    checkpoint_id: Optional[str] = None
+
+
+@dataclass
+class RoundTiming:
+    round: int
+    started_at: float
+    duration_s: float  # compute time of the round (excludes pacing)
+    updates: int
+    checkpoint_id: Optional[str] = None
+
+
+@dataclass
+class SessionState:
+    session_id: str
+    total_rounds: int
+    start_round: int = 0
+    current_round: int = 0
+    status: str = "queued"  # queued | running | stopped | completed | failed
+    min_round_s: float = 0.0
+    simulate: bool = False  # train on synthetic participant data instead of uploaded updates
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    checkpoint_id: Optional[str] = None
+    timings: List[RoundTiming] = field(default_factory=list)
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def avg_round_s(self) -> float:
+        """Mean wall time per round including pacing; falls back to the minimum period."""
+        done = self.current_round - self.start_round
+        if done > 0 and self.started_at is not None:
+            return (time.time() - self.started_at) / done if self.finished_at is None else (self.finished_at - self.started_at) / done
+        return self.min_round_s
+
+    def eta_seconds(self) -> float:
+        if self.status not in {"queued", "running"}:
+            return 0.0
+        return max(0.0, (self.total_rounds - self.current_round) * self.avg_round_s())
+
+    def snapshot(self) -> Dict[str, object]:
+        last = self.timings[-1] if self.timings else None
+        return {
+            "status": self.status,
+            "total_rounds": self.total_rounds,
+            "current_round": self.current_round,
+            "start_round": self.start_round,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "eta_seconds": self.eta_seconds(),
+            "last_round_s": last.duration_s if last else None,
+            "last_round_updates": last.updates if last else 0,
+            "avg_round_s": self.avg_round_s(),
+            "checkpoint_id": self.checkpoint_id,
+            "error": self.error,
+        }
+
+
+RoundFn = Callable[[str, int], RoundResult]
+UpdateFn = Callable[[SessionState], None]
+
+
+class SessionExecutor:
+    def __init__(
+        self,
+        round_fn: RoundFn,
+        *,
+        max_concurrent_sessions: int = 64,
+        max_workers: int = 4,
+        on_update: Optional[UpdateFn] = None,
+        cancelled: Optional[Callable[[str], bool]] = None,
+        on_start: Optional[UpdateFn] = None,
+        on_finish: Optional[UpdateFn] = None,
+    ) -> None:
+        self.round_fn = round_fn
+        self.cancelled = cancelled  # external stop signal (e.g. a stop issued on another worker)
+        self.on_start = on_start  # on the pool, before the first round (after a replaced run has drained)
+        self.on_finish = on_finish  # once the last round has returned, unless the session was resubmitted
+        self.max_concurrent_sessions = max(1, int(max_concurrent_sessions))
+        self.on_update = on_update
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="aegis-round")
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, SessionState] = {}
+        self._queue: Deque[SessionState] = deque()
+        self._inflight: Dict[str, SessionState] = {}  # the run that owns a session id's round state
+        self._active = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.log = logging.getLogger("aegis.training_executor")
+
+    # Supervisor loop
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                t = threading.Thread(target=loop.run_forever, name="aegis-session-supervisor", daemon=True)
+                t.start()
+                self._loop, self._thread = loop, t
+            return self._loop
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            states = list(self._sessions.values())
+        for st in states:
+            st._cancel.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._pool.shutdown(wait=wait)
+
+    # Public API (thread-safe)
+    def submit(self, session_id: str, total_rounds: int, *, start_round: int = 0, min_round_s: float = 0.0, simulate: bool = False) -> SessionState:
+        """Schedule a session; replaces (and cancels) an existing session with the same id."""
+        st = SessionState(
+            session_id=session_id,
+            total_rounds=int(total_rounds),
+            start_round=int(start_round),
+            current_round=int(start_round),
+            min_round_s=float(min_round_s),
+            simulate=bool(simulate),
+        )
+        loop = self._ensure_loop()
+        with self._lock:
+            prev = self._sessions.get(session_id)
+            if prev is not None:
+                prev._cancel.set()
+                if prev in self._queue:
+                    self._queue.remove(prev)
+            self._sessions[session_id] = st
+            run_now = self._active < self.max_concurrent_sessions
+            if run_now:
+                self._active += 1
+                st.status = "running"
+                st.started_at = time.time()
+            else:
+                self._queue.append(st)
+        if run_now:
+            asyncio.run_coroutine_threadsafe(self._run(st), loop)
+        self._publish(st)
+        return st
+
+    def stop(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            st = self._sessions.get(session_id)
+            if st is None:
+                return None
+            st._cancel.set()
+            if st in self._queue:
+                self._queue.remove(st)
+            if st.status in {"queued", "running"}:
+                st.status = "stopped"
+                st.finished_at = time.time()
+        self._publish(st)
+        return st
+
+    def status(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self._active, "queued": len(self._queue), "sessions": len(self._sessions)}
+
+    # Internals
+    def _publish(self, st: SessionState) -> None:
+        with self._lock:
+            current = self._sessions.get(st.session_id) is st
+        if current and self.on_update is not None:
+            try:
+                self.on_update(st)
+            except Exception:  # a broken observer must not kill the session
+                self.log.exception("session update callback failed")
+
+    def _release_slot(self) -> None:
+        nxt: Optional[SessionState] = None
+        with self._lock:
+            self._active -= 1
+            while self._queue and nxt is None:
+                cand = self._queue.popleft()
+                if not cand.cancelled:
+                    nxt = cand
+            if nxt is not None:
+                self._active += 1
+                nxt.status = "running"
+                nxt.started_at = time.time()
+        if nxt is not None:
+            assert self._loop is not None
+            self._loop.create_task(self._run(nxt))
+            self._publish(nxt)
+
+    def _should_stop(self, st: SessionState) -> bool:
+        if not st.cancelled and self.cancelled is not None:
+            try:
+                if self.cancelled(st.session_id):
+                    st._cancel.set()
+            except Exception:
+                self.log.exception("external cancel check failed")
+        return st.cancelled
+
+    async def _pace(self, st: SessionState, until: float) -> None:
+        while not self._should_stop(st):
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 0.1))
+
+    async def _claim(self, st: SessionState) -> bool:
+        """Wait until no other run of the same session id is inside a round; False if cancelled meanwhile."""
+        while not self._should_stop(st):
+            with self._lock:
+                owner = self._inflight.get(st.session_id)
+                if owner is None or owner is st:
+                    self._inflight[st.session_id] = st
+                    return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def _run(self, st: SessionState) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            if not await self._claim(st):
+                return
+            if self.on_start is not None:
+                await loop.run_in_executor(self._pool, self.on_start, st)
+            for rnd in range(st.start_round + 1, st.total_rounds + 1):
+                if self._should_stop(st):
+                    break
+                t0 = time.monotonic()
+                wall0 = time.time()
+                res = await loop.run_in_executor(self._pool, self.round_fn, st.session_id, rnd)
+                dur = time.monotonic() - t0
+                st.timings.append(RoundTiming(round=rnd, started_at=wall0, duration_s=dur, updates=res.updates, checkpoint_id=res.checkpoint_id))
+                if res.checkpoint_id:
+                    st.checkpoint_id = res.checkpoint_id
+                # Rounds are held open for at least min_round_s (the client collection window).
+                await self._pace(st, t0 + st.min_round_s)
+                if self._should_stop(st):
+                    break
+                st.current_round = rnd
+                self._publish(st)
+            with self._lock:
+                if st.status == "running":
+                    st.status = "stopped" if st.cancelled else "completed"
+                    st.finished_at = time.time()
+        except Exception as e:  # noqa: BLE001
+            self.log.exception("session failed", extra={"session_id": st.session_id})
+            with self._lock:
+                st.status = "failed"
+                st.error = str(e)
+                st.finished_at = time.time()
+        finally:
+            self._finish(st)
+            self._publish(st)
+            self._release_slot()
+
+    def _finish(self, st: SessionState) -> None:
+        with self._lock:
+            if st.status == "running":  # cancelled before it claimed the session
+                st.status = "stopped"
+                st.finished_at = time.time()
+            if self._inflight.get(st.session_id) is not st:
+                return
+            del self._inflight[st.session_id]
+            current = self._sessions.get(st.session_id) is st
+        if current and self.on_finish is not None:
+            try:
+                self.on_finish(st)
+            except Exception:
+                self.log.exception("session finish callback failed")
+
+
+# ------------------------------- Round runner ------------------------------- #
+
+UpdateSource = Callable[[str, int, Dict[str, bytes], np.ndarray], List[UpdateEnvelope]]
+
+
+def simulated_updates(dim: int, *, samples: int = 64, lr: float = 0.1, steps: int = 1) -> UpdateSource:
+    """Update source that trains each registered participant locally on a synthetic partition."""
+
+    def _source(session_id: str, rnd: int, keys: Dict[str, bytes], weights: np.ndarray) -> List[UpdateEnvelope]:
+        seed = zlib.crc32(session_id.encode())
+        out: List[UpdateEnvelope] = []
+        for idx, (cid, key) in enumerate(sorted(keys.items())):
+            X, y = synthetic_partition(seed, idx, dim, samples)
+            w = local_update(weights, X, y, lr=lr, steps=steps)
+            out.append(UpdateEnvelope.sign(cid, rnd, w.tolist(), key))
+        return out
+
+    return _source
+
+
+class FederatedRoundRunner:
+    """Round function for `SessionExecutor` backed by a `FederatedCoordinator` per session.
+
+    With an `inbox`, rounds aggregate the uploaded updates, and a round without
+    uploads is skipped: nothing is published or checkpointed. `source` (e.g.
+    `simulated_updates`) feeds only sessions started with `simulate=True`, or
+    every session of a runner that has no inbox.
+    """
+
+    def __init__(
+        self,
+        *,
+        keys: Callable[[], Dict[str, bytes]],
+        aggregator: Callable[[], str],
+        source: UpdateSource,
+        dim: int,
+        checkpoints: Optional[CheckpointStore] = None,
+        inbox: Optional[UpdateInbox] = None,
+    ) -> None:
+        self.keys = keys
+        self.aggregator = aggregator
+        self.source = source
+        self.dim = int(dim)
+        self.checkpoints = checkpoints
+        self.inbox = inbox
+        self._lock = threading.Lock()
+        self._coordinators: Dict[str, FederatedCoordinator] = {}
+        self._weights: Dict[str, np.ndarray] = {}
+        self._simulated: Set[str] = set()
+
+    def _session(self, session_id: str, start_round: int = 0) -> FederatedCoordinator:
+        with self._lock:
+            coord = self._coordinators.get(session_id)
+            if coord is None:
+                coord = FederatedCoordinator(aggregator=self.aggregator(), checkpoints=self.checkpoints)
+                self._coordinators[session_id] = coord
+                info = self.checkpoints.at_round(session_id, start_round) if (self.checkpoints is not None and start_round > 0) else None
+                ckpt = self.checkpoints.load(info.checkpoint_id) if (self.checkpoints is not None and info is not None) else None
+                if ckpt is not None and ckpt.flat().size == self.dim:
+                    self._weights[session_id] = np.array(ckpt.flat(), dtype="float64")
+                    coord.publish_global(ckpt.info.round, self._weights[session_id])
+                else:
+                    self._weights[session_id] = np.zeros((self.dim,), dtype="float64")
+            return coord
+
+    def begin(self, st: SessionState) -> None:
+        """`SessionExecutor.on_start`: fresh per-session state, from the checkpoint of `start_round` (zeros for 0)."""
+        with self._lock:
+            self._coordinators.pop(st.session_id, None)
+            self._weights.pop(st.session_id, None)
+            if st.simulate:
+                self._simulated.add(st.session_id)
+            else:
+                self._simulated.discard(st.session_id)
+        self._session(st.session_id, st.start_round)
+
+    def finish(self, st: SessionState) -> None:
+        """`SessionExecutor.on_finish`: drop the state of a session that reached a terminal status."""
+        self.forget(st.session_id)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._coordinators.pop(session_id, None)
+            self._weights.pop(session_id, None)
+            self._simulated.discard(session_id)
+        if self.inbox is not None:
+            self.inbox.discard(session_id)
+
+    def __call__(self, session_id: str, rnd: int) -> RoundResult:
+        coord = self._session(session_id)
+        keys = dict(self.keys())
+        coord.auth_keys = keys
+        coord.aggregator = self.aggregator()
+        weights = self._weights[session_id]
+        arena = self.inbox.drain(session_id) if self.inbox is not None else None
+        if arena is not None:
+            try:
+                agg = coord.aggregate_arena(arena)
+                result = RoundResult(updates=len(arena))
+                agg = np.array(agg, dtype="float64") if agg is not None else None
+            finally:
+                assert self.inbox is not None
+                self.inbox.recycle(session_id, arena)
+        elif self.inbox is None or session_id in self._simulated:
+            envelopes = self.source(session_id, rnd, keys, weights)
+            agg = coord.aggregate_array(envelopes) if envelopes else None
+            result = RoundResult(updates=len(envelopes))
+        else:  # no uploads this round: keep the current model rather than train on synthetic data
+            agg, result = None, RoundResult(updates=0)
+        if agg is not None:
+            weights = np.array(agg, dtype="float64")
+            self._weights[session_id] = weights
+            coord.publish_global(rnd, weights)
+            info = coord.commit_round(session_id, rnd, weights)
+            result.checkpoint_id = info.checkpoint_id if info is not None else None
+        return result
+
+
+__all__ = [
+    "RoundResult",
+    "RoundTiming",
+    "SessionState",
+    "SessionExecutor",
+    "simulated_updates",
+    "FederatedRoundRunner",
+]
@@ -0,0 +1,129 @@
+"""
+Preallocated per-round update buffer for the coordinator.
+
+Instead of building a fresh Python list per client, a `valid_updates` list and
+an output list every round, the coordinator owns one `(max_clients, d)` float64
+matrix. Each accepted client claims a row, its update is decoded straight into
+that row, the aggregators work on the filled prefix in place (using the
+preallocated scratch and output rows), and `reset()` makes the arena ready for
+the next round without freeing anything.
+
+`release` moves the last row into the freed one, so it must not run while other
+rows are being written. `vacate` frees a row in place for the next `claim` to
+reuse, and `compact` closes those holes once writing has stopped.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class ArenaFullError(RuntimeError):
+    """Raised when more clients claim a slot than the arena was sized for."""
+
+
+class UpdateArena:
+    NO_BASE = -1
+
+    def __init__(self, max_clients: int, dim: int) -> None:
+        if max_clients < 1 or dim < 0:
+            raise ValueError("max_clients must be >= 1 and dim >= 0")
+        self.max_clients = int(max_clients)
+        self.dim = int(dim)
+        self.buffer = np.zeros((self.max_clients, self.dim), dtype="float64")
+        self.scratch = np.empty_like(self.buffer)  # working copy for sort-based aggregators
+        self.out = np.zeros((self.dim,), dtype="float64")
+        # Global-model version each row is a delta against (NO_BASE = full update)
+        self.base_versions = np.full((self.max_clients,), self.NO_BASE, dtype=np.int64)
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []  # vacated rows below `count`
+        self.count = 0
+
+    def reset(self) -> None:
+        self._slots.clear()
+        self._free.clear()
+        self.count = 0
+
+    def claim(self, client_id: str, base_version: Optional[int] = None) -> np.ndarray:
+        """Reserve the next row for `client_id` and return it as a writable view."""
+        if client_id in self._slots:
+            raise ValueError(f"duplicate update from {client_id} in this round")
+        if self._free:
+            idx = self._free.pop()
+        elif self.count >= self.max_clients:
+            raise ArenaFullError(f"arena holds at most {self.max_clients} updates")
+        else:
+            idx = self.count
+            self.count += 1
+        self._slots[client_id] = idx
+        self.base_versions[idx] = self.NO_BASE if base_version is None else int(base_version)
+        row: np.ndarray = self.buffer[idx]
+        return row
+
+    def release(self, client_id: str) -> None:
+        """Drop a claimed row (e.g. its MAC failed); the last row is moved into the hole."""
+        idx = self._slots.pop(client_id)
+        last = self.count - 1
+        if idx != last:
+            moved = next(cid for cid, i in self._slots.items() if i == last)
+            self.buffer[idx] = self.buffer[last]
+            self.base_versions[idx] = self.base_versions[last]
+            self._slots[moved] = idx
+        self.count = last
+
+    def vacate(self, client_id: str) -> None:
+        """Free a claimed row in place (no other row moves); the next `claim` reuses it."""
+        self._free.append(self._slots.pop(client_id))
+
+    def compact(self) -> None:
+        """Close the holes left by `vacate` so the filled rows form a prefix again."""
+        for idx in sorted(self._free, reverse=True):  # highest first: rows above idx are all filled
+            last = self.count - 1
+            if idx != last:
+                moved = next(cid for cid, i in self._slots.items() if i == last)
+                self.buffer[idx] = self.buffer[last]
+                self.base_versions[idx] = self.base_versions[last]
+                self._slots[moved] = idx
+            self.count = last
+        self._free.clear()
+
+    def rename(self, client_id: str, new_id: str) -> None:
+        """Move a claimed row to another key without touching its data."""
+        if new_id in self._slots:
+            raise ValueError(f"slot {new_id} already claimed")
+        self._slots[new_id] = self._slots.pop(client_id)
+
+    def write(self, client_id: str, values, base_version: Optional[int] = None) -> np.ndarray:
+        row = self.claim(client_id, base_version)
+        try:
+            row[:] = values
+        except ValueError:
+            self.release(client_id)
+            raise
+        return row
+
+    def grown(self, max_clients: int) -> "UpdateArena":
+        """Return a larger arena holding this round's rows (used when a round outgrows the buffer)."""
+        bigger = UpdateArena(max(max_clients, self.max_clients), self.dim)
+        bigger.buffer[: self.count] = self.buffer[: self.count]
+        bigger.base_versions[: self.count] = self.base_versions[: self.count]
+        bigger._slots = dict(self._slots)
+        bigger._free = list(self._free)
+        bigger.count = self.count
+        return bigger
+
+    def rows(self) -> np.ndarray:
+        return self.buffer[: self.count]
+
+    def clients(self) -> Dict[str, int]:
+        return dict(self._slots)
+
+    def __len__(self) -> int:
+        return self.count - len(self._free)
+
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self._slots
+
+
+__all__ = ["ArenaFullError", "UpdateArena"]
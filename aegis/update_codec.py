@@ -0,0 +1,404 @@
+"""
+Binary wire format for participant model updates.
+
+JSON envelopes (`UpdateEnvelope`) serialise every float as text, roughly 20
+bytes per parameter. This codec carries the parameters as a raw little-endian
+buffer, optionally as a *delta* against a global-model version the coordinator
+has cached, and optionally zstd-compressed. Round-over-round deltas are small
+and often sparse, so delta + zstd cuts uplink bytes substantially.
+
+Layout::
+
+    b"AEGU" | version:u8 | flags:u8 | reserved:u16 | header_len:u32 (big endian)
+    header  (compact JSON: client_id, round, n, dtype, encoding, base_version,
+             compression, body_len)
+    body    (body_len bytes; raw or zstd-compressed parameter buffer)
+    mac     (32 bytes, HMAC-SHA256 over everything before it)
+
+The MAC trails the data so a receiver can verify incrementally while bytes
+arrive and reject the update once the last 32 bytes are in.
+`StreamingUpdateDecoder` does exactly that for request bodies that arrive in
+chunks: it hashes and decodes each chunk into the destination row, so the
+update is never held in memory whole.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, cast
+import hashlib
+import hmac
+import importlib
+import json
+import struct
+
+import numpy as np
+
+try:  # optional compression dependency
+    zstd: Any = importlib.import_module("zstandard")
+except Exception:  # pragma: no cover - optional
+    zstd = None
+
+
+MAGIC = b"AEGU"
+WIRE_VERSION = 1
+PREFIX = struct.Struct(">4sBBHI")
+MAC_LEN = 32
+_DTYPES = {"<f8", "<f4"}
+
+
+class UpdateFormatError(ValueError):
+    """Raised when a binary update is malformed."""
+
+
+class UpdateAuthError(ValueError):
+    """Raised when an update's client is unknown or its MAC does not match."""
+
+
+def _require_zstd() -> None:
+    if zstd is None:
+        raise RuntimeError("zstd compression requires 'zstandard'. Install via: pip install zstandard")
+
+
+@dataclass
+class WireUpdate:
+    client_id: str
+    round: int
+    encoding: str  # "full" | "delta"
+    base_version: Optional[int]
+    n: int
+    dtype: str
+    compression: str
+    body: memoryview
+    mac: bytes
+    signed: memoryview  # prefix + header + body, the MAC input
+
+    @property
+    def is_delta(self) -> bool:
+        return self.encoding == "delta"
+
+    @property
+    def values(self) -> np.ndarray:
+        out = np.empty((self.n,), dtype="float64")
+        return self.decode_into(out)
+
+    def decode_into(self, out: np.ndarray) -> np.ndarray:
+        """Decode the parameter buffer straight into `out` (a contiguous float64 vector)."""
+        if out.shape != (self.n,):
+            raise UpdateFormatError("output buffer does not match update size")
+        if self.compression == "zstd":
+            _require_zstd()
+            target = out if self.dtype == "<f8" else np.empty((self.n,), dtype=self.dtype)
+            mv = memoryview(target.data).cast("B")
+            got = 0
+            try:
+                with zstd.ZstdDecompressor().stream_reader(self.body) as reader:
+                    while got < len(mv):
+                        k = reader.readinto(mv[got:])
+                        if not k:
+                            break
+                        got += k
+                    extra = reader.read(1)
+            except zstd.ZstdError as e:
+                raise UpdateFormatError("corrupt zstd body") from e
+            if got != len(mv) or extra:
+                raise UpdateFormatError("body size does not match header")
+            if target is not out:
+                out[:] = target
+            return out
+        if len(self.body) != self.n * np.dtype(self.dtype).itemsize:
+            raise UpdateFormatError("body size does not match header")
+        out[:] = np.frombuffer(self.body, dtype=self.dtype)
+        return out
+
+    def verify(self, key: bytes) -> bool:
+        exp = hmac.new(key, self.signed, hashlib.sha256).digest()
+        return hmac.compare_digest(exp, self.mac)
+
+
+def encode_update(
+    client_id: str,
+    round: int,
+    params: Sequence[float] | np.ndarray,
+    key: bytes,
+    *,
+    base: Optional[Sequence[float] | np.ndarray] = None,
+    base_version: Optional[int] = None,
+    compression: Optional[str] = None,
+    dtype: str = "<f8",
+) -> bytes:
+    """Serialise and sign an update; with `base` set the body is `params - base`."""
+    if dtype not in _DTYPES:
+        raise ValueError(f"unsupported dtype: {dtype}")
+    values = np.asarray(params, dtype="float64")
+    encoding = "full"
+    if base is not None:
+        if base_version is None:
+            raise ValueError("base_version is required for delta encoding")
+        base_arr = np.asarray(base, dtype="float64")
+        if base_arr.shape != values.shape:
+            raise ValueError("base and params must have the same shape")
+        values = values - base_arr
+        encoding = "delta"
+    raw = values.astype(dtype, copy=False).tobytes()
+    if compression == "zstd":
+        _require_zstd()
+        body = cast(bytes, zstd.ZstdCompressor(level=3).compress(raw))
+    elif compression in (None, "none"):
+        compression = "none"
+        body = raw
+    else:
+        raise ValueError(f"unsupported compression: {compression}")
+    header = json.dumps(
+        {
+            "client_id": client_id,
+            "round": int(round),
+            "n": int(values.size),
+            "dtype": dtype,
+            "encoding": encoding,
+            "base_version": base_version if encoding == "delta" else None,
+            "compression": compression,
+            "body_len": len(body),
+        },
+        separators=(",", ":"),
+    ).encode()
+    signed = PREFIX.pack(MAGIC, WIRE_VERSION, 0, 0, len(header)) + header + body
+    return signed + hmac.new(key, signed, hashlib.sha256).digest()
+
+
+def _int_field(header: Dict[str, Any], key: str, *, optional: bool = False) -> Optional[int]:
+    value = header.get(key)
+    if value is None and optional:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise UpdateFormatError(f"bad header field: {key}")
+    return value
+
+
+def parse_header(prefix_and_header: bytes) -> Dict[str, Any]:
+    """Validate the fixed prefix and decode the JSON header that follows it."""
+    if len(prefix_and_header) < PREFIX.size:
+        raise UpdateFormatError("truncated prefix")
+    magic, version, _flags, _res, hlen = PREFIX.unpack_from(prefix_and_header)
+    if magic != MAGIC or version != WIRE_VERSION:
+        raise UpdateFormatError("not an Aegis update")
+    raw = prefix_and_header[PREFIX.size: PREFIX.size + hlen]
+    if len(raw) != hlen:
+        raise UpdateFormatError("truncated header")
+    try:
+        header = json.loads(raw)
+    except ValueError as e:
+        raise UpdateFormatError("bad header") from e
+    if not isinstance(header, dict):
+        raise UpdateFormatError("bad header")
+    if not isinstance(header.get("client_id"), str):
+        raise UpdateFormatError("bad header field: client_id")
+    for key in ("round", "n", "body_len"):
+        _int_field(header, key)
+    _int_field(header, "base_version", optional=True)
+    if header.get("dtype") not in _DTYPES or header.get("encoding") not in {"full", "delta"}:
+        raise UpdateFormatError("unsupported dtype or encoding")
+    if header.get("compression") not in {"none", "zstd"}:
+        raise UpdateFormatError("unsupported compression")
+    if header["compression"] == "none" and header["body_len"] != header["n"] * np.dtype(header["dtype"]).itemsize:
+        raise UpdateFormatError("body size does not match header")
+    return cast(Dict[str, Any], header)
+
+
+def header_length(prefix: bytes) -> int:
+    """Total size of prefix + header given at least the fixed prefix bytes."""
+    return PREFIX.size + int(PREFIX.unpack_from(prefix)[4])
+
+
+def parse_update(data: bytes) -> WireUpdate:
+    """Parse a complete binary update without decoding or verifying it."""
+    if len(data) < PREFIX.size + MAC_LEN:
+        raise UpdateFormatError("truncated update")
+    hl = header_length(data)
+    header = parse_header(data[:hl])
+    end = hl + int(header["body_len"])
+    if len(data) != end + MAC_LEN:
+        raise UpdateFormatError("length does not match header")
+    view = memoryview(data)
+    return WireUpdate(
+        client_id=str(header["client_id"]),
+        round=int(header["round"]),
+        encoding=str(header["encoding"]),
+        base_version=header.get("base_version"),
+        n=int(header["n"]),
+        dtype=str(header["dtype"]),
+        compression=str(header["compression"]),
+        body=view[hl:end],
+        mac=bytes(view[end:]),
+        signed=view[:end],
+    )
+
+
+def decode_update(data: bytes, key: bytes) -> WireUpdate:
+    """Parse a complete binary update, verify its MAC with `key`, then check its body decodes.
+
+    Nothing is decompressed or allocated from the header's `n` until the MAC matches.
+    """
+    upd = parse_update(data)
+    if not upd.verify(key):
+        raise UpdateAuthError("MAC mismatch")
+    _ = upd.values
+    return upd
+
+
+class _DecodeSink:
+    """File-like target for the zstd stream writer; output arrives in bounded chunks."""
+
+    def __init__(self, fn: Callable[[bytes], None]) -> None:
+        self.fn = fn
+
+    def write(self, data: bytes) -> int:
+        self.fn(data)
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+
+class StreamingUpdateDecoder:
+    """Incremental parse, HMAC and decode of one binary update arriving in chunks.
+
+    `feed` chunks as they arrive. Once `header` is set, `attach` the float64
+    destination vector (e.g. an arena row). From then on, body bytes are hashed
+    and decoded straight into it, and bytes that came before `attach` are
+    flushed first. `finish` checks the total length and the trailing MAC.
+    Decompressed output goes through a bounded writer, so a zstd bomb fails
+    as soon as it exceeds the header size.
+    """
+
+    def __init__(self, key_for: Callable[[str], Optional[bytes]], *, max_header_len: int = 64 * 1024) -> None:
+        self.key_for = key_for
+        self.max_header_len = int(max_header_len)
+        self.header: Optional[Dict[str, Any]] = None
+        self.bytes_received = 0
+        self._head = bytearray()
+        self._pending = bytearray()
+        self._tag = bytearray()
+        self._mac: Any = None
+        self._dz: Any = None
+        self._out: Optional[np.ndarray] = None
+        self._dtype = "<f8"
+        self._n = 0
+        self._pos = 0
+        self._carry = b""
+        self._body_left = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        view = memoryview(chunk)
+        if self.header is None:
+            view = self._feed_head(view)
+            if self.header is None:
+                return
+        if self._out is None:
+            self._pending += view
+            return
+        self._feed_body(view)
+
+    def attach(self, out: np.ndarray) -> None:
+        """Set the destination vector (shape `(n,)`, float64) and decode any buffered body bytes."""
+        if self.header is None:
+            raise RuntimeError("header not parsed yet")
+        if out.shape != (self._n,) or out.dtype != np.float64:
+            raise UpdateFormatError("output buffer does not match update size")
+        self._out = out
+        if self._pending:
+            pending, self._pending = bytes(self._pending), bytearray()
+            self._feed_body(memoryview(pending))
+
+    def finish(self) -> Dict[str, Any]:
+        """Verify completeness and the MAC; returns the header of the accepted update."""
+        if self.header is None or self._out is None or self._body_left or len(self._tag) != MAC_LEN:
+            raise UpdateFormatError("truncated update")
+        if self._dz is not None:
+            try:
+                self._dz.flush()
+            except zstd.ZstdError as e:
+                raise UpdateFormatError("corrupt zstd body") from e
+        if self._pos != self._n or self._carry:
+            raise UpdateFormatError("body size does not match header")
+        if not hmac.compare_digest(self._mac.digest(), bytes(self._tag)):
+            raise UpdateAuthError("MAC mismatch")
+        return self.header
+
+    def _feed_head(self, view: memoryview) -> memoryview:
+        need = PREFIX.size
+        while True:
+            take = max(0, need - len(self._head))
+            self._head += view[:take]
+            view = view[take:]
+            if len(self._head) < need:
+                return view
+            if need > PREFIX.size:
+                break
+            magic, version, _flags, _res, hlen = PREFIX.unpack_from(self._head)
+            if magic != MAGIC or version != WIRE_VERSION:
+                raise UpdateFormatError("not an Aegis update")
+            if hlen > self.max_header_len:
+                raise UpdateFormatError("header too large")
+            need = PREFIX.size + hlen
+        header = parse_header(bytes(self._head))
+        key = self.key_for(str(header.get("client_id")))
+        if key is None:
+            raise UpdateAuthError("unknown client")
+        self._n = int(header["n"])
+        self._dtype = str(header["dtype"])
+        self._body_left = int(header["body_len"])
+        if header["compression"] == "zstd":
+            _require_zstd()
+            self._dz = zstd.ZstdDecompressor().stream_writer(_DecodeSink(self._decode), write_size=1 << 16)
+        self._mac = hmac.new(key, self._head, hashlib.sha256)
+        self.header = header
+        return view
+
+    def _feed_body(self, view: memoryview) -> None:
+        if self._body_left:
+            part = view[: self._body_left]
+            view = view[len(part):]
+            self._body_left -= len(part)
+            self._mac.update(part)
+            if self._dz is not None:
+                try:
+                    self._dz.write(part)
+                except zstd.ZstdError as e:
+                    raise UpdateFormatError("corrupt zstd body") from e
+            else:
+                self._decode(part)
+        if len(view):
+            if len(self._tag) + len(view) > MAC_LEN:
+                raise UpdateFormatError("trailing bytes after MAC")
+            self._tag += view
+
+    def _decode(self, raw: Any) -> None:
+        if self._carry:
+            raw = self._carry + bytes(raw)
+            self._carry = b""
+        itemsize = np.dtype(self._dtype).itemsize
+        k = len(raw) // itemsize
+        if self._pos + k > self._n:
+            raise UpdateFormatError("body size does not match header")
+        if k:
+            assert self._out is not None
+            self._out[self._pos: self._pos + k] = np.frombuffer(raw, dtype=self._dtype, count=k)
+            self._pos += k
+        if len(raw) > k * itemsize:
+            self._carry = bytes(raw[k * itemsize:])
+
+
+__all__ = [
+    "MAGIC",
+    "MAC_LEN",
+    "UpdateFormatError",
+    "UpdateAuthError",
+    "WireUpdate",
+    "StreamingUpdateDecoder",
+    "encode_update",
+    "parse_update",
+    "decode_update",
+    "parse_header",
+    "header_length",
+]
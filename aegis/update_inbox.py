@@ -0,0 +1,264 @@
+"""
+Per-session landing zone for model updates uploaded through the API.
+
+Uploads are streamed, not buffered: once an upload's header has been parsed, it
+claims a row of the session's `UpdateArena` and its body is decoded into that
+row chunk by chunk while the HMAC is updated (`StreamingUpdateDecoder`). The
+decoding runs on the default executor, off the event loop.
+
+The header is not authenticated until the trailing MAC verifies, so a claim is
+provisional: it holds a row under its own slot name, not under the client id.
+Committing a verified upload renames its row to the client id and cancels the
+client's other in-flight uploads, so a forged header cannot lock the real
+client out of the round. Each client has at most `max_uploads_per_client`
+uploads in flight; a newer claim cancels the oldest. A failed or cancelled
+upload gives its row back as soon as its last write has finished
+(`UpdateArena.vacate`), so rejected uploads never use up the round's capacity;
+the holes are compacted away when the round drains. Many uploads write into
+their own rows concurrently; only the claim and the commit take the session
+lock.
+
+At round time `drain` swaps in the spare arena for new uploads. It cancels
+uploads still in flight (each one's row lock guarantees no further writes), then
+hands the filled arena to the coordinator. After aggregating, the caller gives
+the arena back with `recycle`, so steady-state rounds allocate nothing.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+import asyncio
+import itertools
+import threading
+
+import numpy as np
+
+from .update_arena import UpdateArena
+from .update_codec import StreamingUpdateDecoder, UpdateFormatError
+
+
+class InboxClosed(RuntimeError):
+    """Raised when an upload targets a closed round or its round drained mid-upload."""
+
+
+class DuplicateUpdateError(ValueError):
+    """Raised when a client uploads twice for the same round."""
+
+
+@dataclass(eq=False)
+class InboxTicket:
+    session_id: str
+    client_id: str
+    row: np.ndarray
+    slot: str = ""  # provisional arena key until the upload commits
+    cancelled: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def cancel(self) -> None:
+        """Stop further writes; returns once a write in progress has finished."""
+        with self._lock:
+            self.cancelled = True
+
+    @contextmanager
+    def writing(self) -> Iterator[np.ndarray]:
+        """Hold the row for one write; raises `InboxClosed` once the round has drained."""
+        with self._lock:
+            if self.cancelled:
+                raise InboxClosed("round closed while the update was uploading")
+            yield self.row
+
+
+class _SessionInbox:
+    def __init__(self, max_clients: int, dim: int) -> None:
+        self.lock = threading.Lock()
+        self.arena = UpdateArena(max_clients, dim)
+        self.spare: Optional[UpdateArena] = None
+        self.writing: Dict[str, InboxTicket] = {}  # by slot, oldest first
+
+    def evict(self, ticket: InboxTicket) -> None:
+        """Cancel an in-flight upload and free its row (caller holds `lock`)."""
+        del self.writing[ticket.slot]
+        ticket.cancel()  # waits out a write in progress, so the row can be reused
+        self.arena.vacate(ticket.slot)
+
+
+class UpdateInbox:
+    def __init__(self, dim: int, *, max_clients: int = 256, max_uploads_per_client: int = 2) -> None:
+        self.dim = int(dim)
+        self.max_clients = max(1, int(max_clients))
+        self.max_uploads_per_client = max(1, int(max_uploads_per_client))
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _SessionInbox] = {}
+        self._slots = itertools.count()
+
+    def _session(self, session_id: str) -> _SessionInbox:
+        with self._lock:
+            box = self._sessions.get(session_id)
+            if box is None:
+                box = self._sessions[session_id] = _SessionInbox(self.max_clients, self.dim)
+            return box
+
+    def claim(self, session_id: str, client_id: str, n: int, base_version: Optional[int] = None) -> InboxTicket:
+        """Reserve an arena row for one upload (raises `ArenaFullError` when the round is full)."""
+        if n != self.dim:
+            raise UpdateFormatError(f"update has {n} parameters, model has {self.dim}")
+        box = self._session(session_id)
+        with box.lock:
+            if client_id in box.arena:
+                raise DuplicateUpdateError(f"duplicate update from {client_id} in this round")
+            mine = [t for t in box.writing.values() if t.client_id == client_id]
+            for old in mine[: max(0, len(mine) - self.max_uploads_per_client + 1)]:
+                box.evict(old)
+            slot = f"\0upload:{next(self._slots)}"
+            row = box.arena.claim(slot, base_version)
+            ticket = InboxTicket(session_id, client_id, row, slot)
+            box.writing[slot] = ticket
+        return ticket
+
+    def commit(self, ticket: InboxTicket) -> None:
+        """Accept a verified upload under its client id, cancelling the client's other uploads."""
+        box = self._session(ticket.session_id)
+        with box.lock:
+            if ticket.cancelled or box.writing.get(ticket.slot) is not ticket:
+                raise InboxClosed("round closed while the update was uploading")
+            if ticket.client_id in box.arena:
+                box.evict(ticket)
+                raise DuplicateUpdateError(f"duplicate update from {ticket.client_id} in this round")
+            del box.writing[ticket.slot]
+            box.arena.rename(ticket.slot, ticket.client_id)
+            for other in [t for t in box.writing.values() if t.client_id == ticket.client_id]:
+                box.evict(other)
+
+    def abort(self, ticket: InboxTicket) -> None:
+        """Give up an upload and free its row for the next claim."""
+        box = self._session(ticket.session_id)
+        with box.lock:
+            if box.writing.get(ticket.slot) is ticket:
+                box.evict(ticket)
+            else:
+                ticket.cancel()
+
+    def drain(self, session_id: str) -> Optional[UpdateArena]:
+        """Close the round: return the arena of verified updates (None if empty) and start a new one."""
+        with self._lock:
+            box = self._sessions.get(session_id)
+        if box is None:
+            return None
+        with box.lock:
+            arena = box.arena
+            if arena.count == 0:
+                return None
+            box.arena = box.spare or UpdateArena(self.max_clients, self.dim)
+            box.spare = None
+            in_flight, box.writing = box.writing, {}
+        for ticket in in_flight.values():
+            ticket.cancel()
+            arena.vacate(ticket.slot)
+        arena.compact()
+        if arena.count:
+            return arena
+        self._recycled(box, arena)
+        return None
+
+    def _recycled(self, box: _SessionInbox, arena: UpdateArena) -> None:
+        arena.reset()
+        with box.lock:
+            if box.spare is None:
+                box.spare = arena
+
+    def recycle(self, session_id: str, arena: UpdateArena) -> None:
+        """Return a drained arena once its round has been aggregated."""
+        with self._lock:
+            box = self._sessions.get(session_id)
+        if box is not None:
+            self._recycled(box, arena)
+
+    def pending(self, session_id: str) -> int:
+        with self._lock:
+            box = self._sessions.get(session_id)
+        if box is None:
+            return 0
+        with box.lock:
+            return len(box.arena) - len(box.writing)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            box = self._sessions.pop(session_id, None)
+        if box is not None:
+            with box.lock:
+                tickets = list(box.writing.values())
+            for ticket in tickets:
+                ticket.cancel()
+
+
+async def ingest_update(
+    inbox: UpdateInbox,
+    session_id: str,
+    chunks: AsyncIterator[bytes],
+    key_for: Callable[[str], Optional[bytes]],
+    *,
+    min_round: int = 0,
+    timeout_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Stream one binary update from `chunks` into the session inbox; returns its header.
+
+    Raises `UpdateFormatError` / `UpdateAuthError` for bad uploads (nothing is kept),
+    `InboxClosed` for stale rounds, `DuplicateUpdateError` and `ArenaFullError`.
+    With `timeout_s`, an upload that takes longer raises `asyncio.TimeoutError`.
+    """
+    if timeout_s is None:
+        return await _ingest(inbox, session_id, chunks, key_for, min_round)
+    return await asyncio.wait_for(_ingest(inbox, session_id, chunks, key_for, min_round), timeout_s)
+
+
+async def _ingest(
+    inbox: UpdateInbox,
+    session_id: str,
+    chunks: AsyncIterator[bytes],
+    key_for: Callable[[str], Optional[bytes]],
+    min_round: int,
+) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    dec = StreamingUpdateDecoder(key_for)
+    ticket: Optional[InboxTicket] = None
+
+    def _attach(t: InboxTicket) -> None:
+        with t.writing() as row:
+            dec.attach(row)
+
+    def _feed(t: InboxTicket, chunk: bytes) -> None:
+        with t.writing():
+            dec.feed(chunk)
+
+    def _finish(t: InboxTicket) -> Dict[str, Any]:
+        with t.writing():  # flushing the zstd stream still writes into the row
+            return dec.finish()
+
+    try:
+        async for chunk in chunks:
+            if ticket is None:
+                dec.feed(chunk)  # until the header is parsed, body bytes are only buffered
+                if dec.header is None:
+                    continue
+                if int(dec.header["round"]) < min_round:
+                    raise InboxClosed(f"round {dec.header['round']} is closed")
+                ticket = inbox.claim(session_id, str(dec.header["client_id"]), int(dec.header["n"]), dec.header.get("base_version"))
+                await loop.run_in_executor(None, _attach, ticket)
+            else:
+                # Decompression and the HMAC are CPU work on the whole chunk; keep them off the event loop
+                await loop.run_in_executor(None, _feed, ticket, chunk)
+        if ticket is None:
+            dec.finish()  # raises: the header never arrived
+            raise UpdateFormatError("truncated update")  # pragma: no cover
+        header = await loop.run_in_executor(None, _finish, ticket)
+        inbox.commit(ticket)
+        header["bytes"] = dec.bytes_received
+        return header
+    except BaseException:
+        if ticket is not None:
+            inbox.abort(ticket)
+        raise
+
+
+__all__ = ["DuplicateUpdateError", "InboxClosed", "InboxTicket", "UpdateInbox", "ingest_update"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, Tuple
+from datetime import datetime, timedelta, timezone
+
+_ACTORS = ("admin", "operator", "viewer")
+_ACTIONS = ("training:status", "training:start", "dp:configure", "report:generate", "gdpr:export")
+_INSERT = "INSERT INTO audit_events (timestamp, actor, action, params_hash, outcome, prev_hash) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def _build(template: str, events: int, days: int) -> None:
+    """`events` spread evenly over `days` daily databases, through the logger's schema (rollup trigger included)."""
+    from aegis.security.audit import AuditLogger
+    from aegis.security.audit_query import dated_path
+
+    os.environ["AEGIS_AUDIT_SQLITE_PATH"] = template
+    os.environ.pop("AEGIS_AUDIT_LOG_FILE", None)
+    log = AuditLogger()
+    start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    step = timedelta(days=days) / events
+    per_day = -(-events // days)
+    for d in range(days):
+        day = (start + timedelta(days=d)).strftime("%Y%m%d")
+        setattr(log, "_rotated_sqlite_path", lambda day=day: dated_path(template, day))
+        conn = log._open_sqlite()
+        conn.execute("BEGIN")
+        conn.executemany(_INSERT, (
+            ((start + step * i).isoformat(), _ACTORS[i % 3], _ACTIONS[i % 11 % 5], "0" * 64, "denied" if i % 13 == 0 else "ok", "0" * 64)
+            for i in range(d * per_day, min(events, (d + 1) * per_day))
+        ))
+        conn.execute("COMMIT")
+        conn.close()
+    log.close()
+
+
+def run(events: int = 1_000_000, days: int = 31, output: str | None = None):
+    """`/audit/query` latency over SQLite: counts, group-bys and event pages across a month of daily databases."""
+    from aegis.security.audit_query import AuditFilter, query_sqlite
+
+    month = dict(since="2025-03-01T00:00:00+00:00", until="2025-03-31T23:59:59.999999+00:00")
+    mid = dict(since="2025-03-10T07:42:13+00:00", until="2025-03-20T16:05:00+00:00")  # partial edge hours
+    cases: Dict[str, Tuple[AuditFilter, Dict[str, Any]]] = {
+        "count_action_month": (AuditFilter(action="dp:configure", **month), dict(limit=0, count=True)),
+        "group_actor_outcome_range": (AuditFilter(**mid), dict(limit=0, count=True, group_by=("actor", "outcome"))),
+        "group_day_action_actor": (AuditFilter(actor="operator", action="dp:configure", **month), dict(limit=0, group_by=("day",))),
+        "page_action_actor_range": (AuditFilter(actor="operator", action="dp:configure", **mid), dict(limit=100)),
+        "page_outcome_range": (AuditFilter(outcome="denied", **mid), dict(limit=100)),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "audit.{date}.db")
+        t0 = time.perf_counter()
+        _build(template, events, days)
+        build_s = time.perf_counter() - t0
+        for name, (flt, opts) in cases.items():
+            query_sqlite(template, flt, **opts)  # warm the page cache
+            t0 = time.perf_counter()
+            for _ in range(5):
+                query_sqlite(template, flt, **opts)
+            results[f"{name}_ms"] = (time.perf_counter() - t0) / 5 * 1000
+    print(f"{events} events over {days} daily databases (built in {build_s:.1f}s)")
+    for k, v in results.items():
+        print(f"  {k}: {v:.2f}")
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            for k, v in results.items():
+                f.write(f"audit_query_{k},{v:.3f}\n")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000, help="e.g. 30000000 for a production-sized month")
+    ap.add_argument("--days", type=int, default=31)
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(events=args.events, days=args.days, output=args.output)
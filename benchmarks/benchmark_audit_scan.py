@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def _build(path: str, lines: int) -> None:
+    from aegis.security.audit import AuditEvent
+
+    prev = None
+    with open(path, "w") as f:
+        for i in range(lines):
+            h = hashlib.sha256(f"{prev}{i}".encode()).hexdigest()
+            f.write(AuditEvent(f"2025-01-01T00:00:{i % 60:02d}.{i % 1000000:06d}+00:00", "operator", "training:status", h, "ok", prev).to_json() + "\n")
+            prev = h
+
+
+def _legacy_verify(path: str) -> int:
+    """The text-mode loop the scanner replaced: strip and json.loads every line."""
+    prev, n = None, 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            if n and rec.get("prev_hash") != prev:
+                raise AssertionError("chain broken")
+            prev = rec.get("params_hash")
+            n += 1
+    return n
+
+
+def _scan_events(path: str) -> int:
+    from aegis.security.audit_scan import iter_windows, parse_events
+
+    with open(path, "rb") as f:
+        return sum(len(parse_events(window)) for window in iter_windows(f))
+
+
+def _legacy_events(path: str) -> int:
+    n = 0
+    with open(path, "rb") as f:
+        for line in f:
+            json.loads(line)
+            n += 1
+    return n
+
+
+def run(lines: int = 1_000_000, output: str | None = None):
+    """Sequential JSONL verify and event read-back: mmap scanner vs line-by-line json.loads."""
+    from aegis.tools.audit_verify import verify_jsonl
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audit.jsonl")
+        _build(path, lines)
+        mb = os.path.getsize(path) / 1e6
+
+        def timed(fn):
+            t0 = time.perf_counter()
+            assert fn(path) == lines
+            return time.perf_counter() - t0
+
+        legacy = timed(_legacy_verify)
+        scanned = timed(lambda p: verify_jsonl(p).checked)
+        results.update(verify_legacy_mb_per_s=mb / legacy, verify_scan_mb_per_s=mb / scanned, verify_speedup=legacy / scanned)
+        legacy = timed(_legacy_events)
+        scanned = timed(_scan_events)
+        results.update(read_legacy_mb_per_s=mb / legacy, read_scan_mb_per_s=mb / scanned, read_speedup=legacy / scanned)
+    print(
+        f"verify: {results['verify_legacy_mb_per_s']:.1f} -> {results['verify_scan_mb_per_s']:.1f} MB/s "
+        f"({results['verify_speedup']:.1f}x); read: {results['read_legacy_mb_per_s']:.1f} -> "
+        f"{results['read_scan_mb_per_s']:.1f} MB/s ({results['read_speedup']:.1f}x) over {lines} lines"
+    )
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            for k, v in results.items():
+                f.write(f"audit_scan_{k},{v:.2f}\n")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=1_000_000, help="e.g. 10000000 for a production-sized day")
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(lines=args.lines, output=args.output)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import os
+import sqlite3
+import tempfile
+import time
+
+_SELECT = "SELECT id, params_hash, prev_hash, signature FROM audit_events ORDER BY id ASC"
+_KEY = "bench-key"
+
+
+def _build(path: str, rows: int) -> None:
+    from aegis.security.audit_sign import RowSigner
+
+    signer = RowSigner(_KEY)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, params_hash TEXT, prev_hash TEXT, signature TEXT)")
+    prev = None
+    batch = []
+    for i in range(rows):
+        h = hashlib.sha256(f"{prev}{i}".encode()).hexdigest()
+        batch.append((h, prev, signer.sign(h, prev)))
+        prev = h
+        if len(batch) == 100_000:
+            conn.executemany("INSERT INTO audit_events (params_hash, prev_hash, signature) VALUES (?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO audit_events (params_hash, prev_hash, signature) VALUES (?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def _read_only(path: str) -> int:
+    """The floor: stream the rows with fetchmany and touch nothing."""
+    conn = sqlite3.connect(path)
+    cur, n = conn.execute(_SELECT), 0
+    while True:
+        rows = cur.fetchmany(10_000)
+        if not rows:
+            break
+        n += len(rows)
+    conn.close()
+    return n
+
+
+def _legacy(path: str) -> int:
+    """The loop the batched path replaced: a fresh hmac.new per row, compared with !=."""
+    conn = sqlite3.connect(path)
+    cur, n, last = conn.execute(_SELECT), 0, None
+    while True:
+        rows = cur.fetchmany(10_000)
+        if not rows:
+            break
+        for _idx, params_hash, prev_hash, signature in rows:
+            if n and prev_hash != last:
+                raise AssertionError("chain broken")
+            if signature is not None:
+                mac = hmac.new(_KEY.encode(), (params_hash + (prev_hash or "")).encode(), hashlib.sha256).hexdigest()
+                if mac != signature:
+                    raise AssertionError("bad signature")
+            last = params_hash
+            n += 1
+    conn.close()
+    return n
+
+
+def run(rows: int = 1_000_000, workers: int = 1, output: str | None = None):
+    """SQLite audit verification: fetchmany read floor vs per-row hmac.new vs the pre-keyed, batched RowSigner path."""
+    from aegis.security.audit_sign import RowSigner
+    from aegis.tools.audit_verify import verify_sqlite
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audit.sqlite")
+        _build(path, rows)
+        os.environ["AEGIS_BENCH_HMAC_KEY"] = _KEY
+
+        def rate(fn):
+            t0 = time.perf_counter()
+            assert fn(path) == rows
+            return rows / (time.perf_counter() - t0)
+
+        results["read_rows_per_s"] = rate(_read_only)
+        results["legacy_rows_per_s"] = rate(_legacy)
+        chunk_rows = None if workers > 1 else rows  # one in-process chunk, or the default split across workers
+        results["batched_rows_per_s"] = rate(lambda p: verify_sqlite(p, "AEGIS_BENCH_HMAC_KEY", workers, chunk_rows).checked)
+        results["batched_share_of_read"] = results["batched_rows_per_s"] / results["read_rows_per_s"]
+    msg = ("a" * 64 + "b" * 64)
+    signer = RowSigner(_KEY)
+    n = 200_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        hmac.new(_KEY.encode(), msg.encode(), hashlib.sha256).hexdigest()
+    results["sign_legacy_us"] = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n):
+        signer.sign(msg[:64], msg[64:])
+    results["sign_prekeyed_us"] = (time.perf_counter() - t0) / n * 1e6
+    print(
+        f"verify over {rows} rows: read floor {results['read_rows_per_s']:.0f} rows/s, "
+        f"legacy {results['legacy_rows_per_s']:.0f} rows/s, batched {results['batched_rows_per_s']:.0f} rows/s "
+        f"({results['batched_rows_per_s'] / results['legacy_rows_per_s']:.2f}x, {workers} worker(s), "
+        f"{results['batched_share_of_read']:.0%} of read speed); "
+        f"sign {results['sign_legacy_us']:.2f} -> {results['sign_prekeyed_us']:.2f} us/event"
+    )
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            for k, v in results.items():
+                f.write(f"audit_sign_{k},{v:.2f}\n")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000, help="e.g. 50000000 for a full re-verification")
+    ap.add_argument("--workers", type=int, default=1, help="verify processes; signatures are CPU-bound per core")
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(rows=args.rows, workers=args.workers, output=args.output)
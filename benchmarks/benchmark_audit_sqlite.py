@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+
+def run(events: int = 50_000, output: str | None = None):
+    """Sustained audit throughput: emit (hash chain + HMAC) through the group-commit writer into SQLite."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "audit.sqlite")
+        os.environ["AEGIS_AUDIT_SQLITE_PATH"] = db
+        os.environ.setdefault("AEGIS_AUDIT_HMAC_KEY", "bench")
+        os.environ.pop("AEGIS_AUDIT_LOG_FILE", None)
+        from aegis.security.audit import AuditLogger
+
+        log = AuditLogger()
+        t0 = time.perf_counter()
+        for i in range(events):
+            log.emit(actor="operator", action="training:status", params={"i": i, "session_id": "bench"}, outcome="ok")
+        log.flush()
+        elapsed = time.perf_counter() - t0
+        log.close()
+        path = log._rotated_sqlite_path()
+        with sqlite3.connect(path) as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM audit_events").fetchone()[0]
+            t1 = time.perf_counter()
+            conn.execute("SELECT COUNT(*) FROM audit_events WHERE actor = ? AND action = ?", ("operator", "training:status")).fetchone()
+            query_ms = (time.perf_counter() - t1) * 1000
+    rate = events / elapsed
+    assert stored == events
+    print(f"audit_sqlite_events_per_s={rate:.0f} (target >= 10000) actor_action_query_ms={query_ms:.2f}")
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            f.write(f"audit_sqlite_events_per_s,{rate:.1f}\n")
+            f.write(f"audit_sqlite_actor_action_query_ms,{query_ms:.3f}\n")
+    return rate
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=50_000)
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(events=args.events, output=args.output)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import tempfile
+
+
+def _build(tmp: str, events: int, key: str):
+    jsonl = os.path.join(tmp, "audit.jsonl")
+    db = os.path.join(tmp, "audit.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, actor TEXT, action TEXT, params_hash TEXT, outcome TEXT, prev_hash TEXT, signature TEXT)")
+    prev = None
+    rows = []
+    with open(jsonl, "w") as f:
+        for i in range(events):
+            h = hashlib.sha256((prev or "").encode() + str(i).encode()).hexdigest()
+            rec = {"timestamp": f"2025-01-01T00:00:{i % 60:02d}+00:00", "actor": "operator", "action": "training:status", "params_hash": h, "outcome": "ok", "prev_hash": prev}
+            f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            sig = hmac.new(key.encode(), (h + (prev or "")).encode(), hashlib.sha256).hexdigest()
+            rows.append((rec["timestamp"], "operator", "training:status", h, "ok", prev, sig))
+            prev = h
+    conn.executemany("INSERT INTO audit_events (timestamp, actor, action, params_hash, outcome, prev_hash, signature) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return jsonl, db
+
+
+def run(events: int = 500_000, workers: int = 0, output: str | None = None):
+    """Audit verification throughput (MB/s), sequential vs chunked across a process pool."""
+    from aegis.tools.audit_verify import verify_jsonl, verify_sqlite
+
+    workers = workers or (os.cpu_count() or 1)
+    os.environ.setdefault("AEGIS_AUDIT_HMAC_KEY", "bench")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl, db = _build(tmp, events, os.environ["AEGIS_AUDIT_HMAC_KEY"])
+        for kind, fn, path in (("jsonl", verify_jsonl, jsonl), ("sqlite", verify_sqlite, db)):
+            for n in (1, workers):
+                res = fn(path, workers=n)
+                assert res.ok and res.checked == events
+                results[f"{kind}_w{n}_mb_per_s"] = res.mb_per_s
+            print(
+                f"verify_{kind}: {results[f'{kind}_w1_mb_per_s']:.1f} MB/s sequential, "
+                f"{results[f'{kind}_w{workers}_mb_per_s']:.1f} MB/s with {workers} workers"
+            )
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            for k, v in results.items():
+                f.write(f"audit_verify_{k},{v:.2f}\n")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=500_000)
+    ap.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(events=args.events, workers=args.workers, output=args.output)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from aegis.metrics import MetricsMiddleware
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"status":"ok"}'})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    return None
+
+
+async def _loop(app, scopes, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        await app(dict(scopes[i % len(scopes)]), _receive, _send)
+    return time.perf_counter() - t0
+
+
+def run(iterations: int = 200_000, output: str | None = None):
+    """Per-request overhead of MetricsMiddleware over a bare ASGI endpoint, using the real route table."""
+    from aegis.api import app as api
+
+    paths = [("GET", "/training/status"), ("GET", "/healthz"), ("GET", "/compliance/report/jobs/abc123"), ("POST", "/federated/run1/updates"), ("GET", "/no/such/path")]
+    scopes = [{"type": "http", "method": m, "path": p, "app": api} for m, p in paths]
+    wrapped = MetricsMiddleware(_endpoint)
+    asyncio.run(_loop(wrapped, scopes, 1000))  # warm label children
+    bare_s = min(asyncio.run(_loop(_endpoint, scopes, iterations)) for _ in range(3))
+    wrapped_s = min(asyncio.run(_loop(wrapped, scopes, iterations)) for _ in range(3))
+    overhead_us = (wrapped_s - bare_s) / iterations * 1e6
+    print(f"metrics_middleware_overhead_us={overhead_us:.2f} (budget 20.00)")
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            f.write(f"metrics_middleware_overhead_us,{overhead_us:.3f}\n")
+    return overhead_us
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=200_000)
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(iterations=args.iterations, output=args.output)
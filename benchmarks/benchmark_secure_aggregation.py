@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from aegis.secure_aggregation import simulate_secure_round
+
+
+def run(clients: int = 100, dim: int = 1_000_000, dropouts: int = 0, neighbors: int | None = 8, output: str | None = None):
+    x = np.random.default_rng(0).normal(size=(clients, dim))
+    res = simulate_secure_round(x, dropouts=dropouts, neighbors=neighbors)
+    ratio = res.server_s / max(res.plain_mean_s, 1e-9)
+    print(
+        f"clients={clients}, dim={dim}, dropouts={dropouts}, server_s={res.server_s:.4f}, "
+        f"plain_mean_s={res.plain_mean_s:.4f}, ratio={ratio:.2f}, client_mask_s={res.client_mask_s:.4f}"
+    )
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            f.write(f"server_seconds,{res.server_s:.6f}\n")
+            f.write(f"plain_mean_seconds,{res.plain_mean_s:.6f}\n")
+            f.write(f"server_to_plain_ratio,{ratio:.4f}\n")
+            f.write(f"client_mask_seconds,{res.client_mask_s:.6f}\n")
+            f.write(f"setup_seconds,{res.setup_s:.6f}\n")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=100)
+    ap.add_argument("--dim", type=int, default=1_000_000)
+    ap.add_argument("--dropouts", type=int, default=0)
+    ap.add_argument("--neighbors", type=int, default=8)
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(clients=args.clients, dim=args.dim, dropouts=args.dropouts, neighbors=args.neighbors, output=args.output)
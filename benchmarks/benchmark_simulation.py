@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import argparse
+
+from aegis.simulation import SimulationConfig, run_simulation
+
+
+def run(clients: int = 100, rounds: int = 3, dim: int = 100, workers: int | None = None, output: str | None = None):
+    rep = run_simulation(SimulationConfig(num_clients=clients, rounds=rounds, dim=dim, workers=workers))
+    summary = rep.summary()
+    print(", ".join(f"{k}={v:.4f}" for k, v in summary.items()))
+    if output:
+        with open(output, "w") as f:
+            f.write("metric,value\n")
+            for k, v in summary.items():
+                f.write(f"{k},{v:.6f}\n")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=100)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--dim", type=int, default=100)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--output", type=str, default=None)
+    args = ap.parse_args()
+    run(clients=args.clients, rounds=args.rounds, dim=args.dim, workers=args.workers, output=args.output)
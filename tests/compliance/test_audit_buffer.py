@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from aegis.security.audit import AuditLogger
+from aegis.security.audit_spill import AuditSpill
+from aegis.security.merkle import verify_consistency, verify_inclusion
+
+
+def _fill(monkeypatch, n, **sinks):
+    for var in ("AEGIS_AUDIT_LOG_FILE", "AEGIS_AUDIT_SQLITE_PATH"):
+        monkeypatch.delenv(var, raising=False)
+    for var, value in sinks.items():
+        monkeypatch.setenv(var, value)
+    monkeypatch.setenv("AEGIS_AUDIT_QUEUE_SIZE", "10")
+    monkeypatch.setenv("AEGIS_AUDIT_BUFFER_EVENTS", "1")  # raised to the writer's queue + batch
+    log = AuditLogger()
+    for i in range(n):
+        log.emit(actor="admin" if i % 2 else "viewer", action=f"a{i % 3}", params={"i": i}, outcome="ok")
+    return log
+
+
+@pytest.mark.parametrize("sink", ["AEGIS_AUDIT_LOG_FILE", "AEGIS_AUDIT_SQLITE_PATH"])
+def test_evicted_events_are_served_from_the_durable_sink(tmp_path, monkeypatch, sink):
+    log = _fill(monkeypatch, 3000, **{sink: str(tmp_path / "audit.log")})
+    cap = log._capacity
+    assert cap == 1010 and len(log._ring) == cap
+    assert log.count() == 3000 and len(log.events()) == cap
+    assert log.events()[0] is log.event(3000 - cap)
+    # Old events read back intact, and queries span the sink and the buffer
+    assert log.event(0).prev_hash is None and log.event(1).prev_hash == log.event(0).params_hash
+    seqs = [seq for seq, _ in log.query(action="a0")]
+    assert seqs == list(range(0, 3000, 3))
+    assert [seq for seq, _ in log.query(after=1499, actor="admin")][:2] == [1501, 1503]
+    assert [seq for seq, _ in log.query(since=log.event(700).timestamp)][0] <= 700
+    with pytest.raises(IndexError):
+        log.event(3000)
+    # Incremental state still covers every event
+    hashes = [evt.params_hash for _seq, evt in log.query()]
+    assert len(hashes) == 3000 and log.verify_chain()
+    assert log.checksum() == hashlib.sha256("".join(hashes).encode()).hexdigest()
+    # Merkle nodes of completed blocks are pruned and recomputed for old proofs
+    assert len(log._merkle._levels[0]) < 1024 * 32
+    p = log.inclusion_proof(5, 2000)
+    assert verify_inclusion(bytes.fromhex(p["leaf_hash"]), 5, 2000, [bytes.fromhex(h) for h in p["proof"]], bytes.fromhex(p["root"]))
+    c = log.consistency_proof(100)
+    assert verify_consistency(100, 3000, bytes.fromhex(c["first_root"]), bytes.fromhex(c["second_root"]), [bytes.fromhex(h) for h in c["proof"]])
+    log.close()
+
+
+def test_logger_without_durable_sink_keeps_everything(monkeypatch):
+    log = _fill(monkeypatch, 50)
+    assert log._capacity is None and len(log.events()) == 50 and log.event(0).prev_hash is None
+
+
+def test_spill_skips_failed_writes(tmp_path):
+    path = tmp_path / "a.jsonl"
+    spill = AuditSpill(mark_every=2)
+    lines = [f'{{"timestamp":"t{i}","actor":"a","action":"x","params_hash":"h{i}","outcome":"ok","prev_hash":null}}\n' for i in range(6)]
+    path.write_text("".join(lines[:2]) + "".join(lines[4:]))
+    spill.jsonl_written(0, 2, str(path), 0)
+    spill.jsonl_written(2, 2, str(path), -1, ok=False)
+    spill.jsonl_written(4, 2, str(path), len("".join(lines[:2])))
+    spill.advance(6)
+    assert [(seq, f["params_hash"]) for seq, f in spill.read(0, 6)] == [(0, "h0"), (1, "h1"), (4, "h4"), (5, "h5")]
+    assert [seq for seq, _ in spill.read(5, 6)] == [5]
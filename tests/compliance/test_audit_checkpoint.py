@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+from aegis.cli import aegis
+from aegis.security.audit import AuditLogger
+from aegis.tools.audit_verify import read_checkpoint, verify_resumable
+
+
+def _logger(monkeypatch, **sinks):
+    for var in ("AEGIS_AUDIT_LOG_FILE", "AEGIS_AUDIT_SQLITE_PATH"):
+        monkeypatch.delenv(var, raising=False)
+    for var, value in sinks.items():
+        monkeypatch.setenv(var, value)
+    monkeypatch.setenv("AEGIS_AUDIT_HMAC_KEY", "k")
+    return AuditLogger()
+
+
+def _emit(log, n):
+    for i in range(n):
+        log.emit(actor="admin", action="x", params={"i": i}, outcome="ok")
+    assert log.flush(5)
+
+
+def test_jsonl_resumes_from_signed_checkpoint(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, AEGIS_AUDIT_LOG_FILE=str(path))
+    _emit(log, 100)
+    first = verify_resumable("jsonl", str(path), since_checkpoint=True)  # no checkpoint yet: full run
+    assert first.ok and first.checked == 100
+    cp = read_checkpoint(f"{path}.checkpoint", "k")
+    assert (cp.last_index, cp.offset, cp.last_hash) == (99, path.stat().st_size, log.event(99).params_hash)
+
+    _emit(log, 50)
+    tail = path.stat().st_size - cp.offset
+    res = verify_resumable("jsonl", str(path), since_checkpoint=True, workers=2)
+    assert res.ok and res.checked == 50 and res.bytes == tail
+    assert read_checkpoint(f"{path}.checkpoint", "k").last_index == 149
+    again = verify_resumable("jsonl", str(path), since_checkpoint=True)
+    assert again.ok and again.checked == 0
+
+    # A broken record after the checkpoint is reported by its absolute index
+    with open(path, "a") as f:
+        f.write(json.dumps({"params_hash": "h", "prev_hash": "nope"}) + "\n")
+    res = verify_resumable("jsonl", str(path), since_checkpoint=True)
+    assert not res.ok and res.failed_index == 150 and res.checked == 0
+    log.close()
+
+
+def test_tampered_checkpoint_or_anchor_is_rejected(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, AEGIS_AUDIT_LOG_FILE=str(path))
+    _emit(log, 20)
+    log.close()
+    assert verify_resumable("jsonl", str(path)).ok
+    ckpt = tmp_path / "audit.jsonl.checkpoint"
+    data = json.loads(ckpt.read_text())
+    ckpt.write_text(json.dumps(dict(data, offset=0)))
+    res = verify_resumable("jsonl", str(path), since_checkpoint=True)
+    assert not res.ok and "signature" in res.message
+    ckpt.write_text(json.dumps(data))
+    lines = path.read_text().splitlines()
+    lines[-1] = lines[-1].replace(json.loads(lines[-1])["params_hash"], "0" * 64)
+    path.write_text("\n".join(lines) + "\n")
+    res = verify_resumable("jsonl", str(path), since_checkpoint=True)
+    assert not res.ok and res.message == "checkpoint anchor mismatch"
+    monkeypatch.delenv("AEGIS_AUDIT_HMAC_KEY")
+    assert not verify_resumable("jsonl", str(path), since_checkpoint=True).ok
+
+
+def test_sqlite_and_cli_resume(tmp_path, monkeypatch):
+    log = _logger(monkeypatch, AEGIS_AUDIT_SQLITE_PATH=str(tmp_path / "audit.sqlite"))
+    _emit(log, 40)
+    db = log._rotated_sqlite_path()
+    runner = CliRunner()
+    out = runner.invoke(aegis, ["audit", "verify-sqlite", db])
+    assert out.exit_code == 0 and "checked=40" in out.output
+    _emit(log, 15)
+    out = runner.invoke(aegis, ["audit", "verify-sqlite", db, "--since-checkpoint", "--workers", "2"])
+    assert out.exit_code == 0 and "checked=15" in out.output
+    cp = read_checkpoint(f"{db}.checkpoint", "k")
+    assert (cp.kind, cp.last_index, cp.offset) == ("sqlite", 54, 55)
+    res = verify_resumable("jsonl", db, checkpoint_path=f"{db}.checkpoint", since_checkpoint=True)
+    assert not res.ok and "sqlite" in res.message
+    log.close()
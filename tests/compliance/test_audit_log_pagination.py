@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import replace
+
+import httpx
+
+from aegis.security.audit import AuditLogger
+from tests.utils import get_free_port
+
+
+def test_query_filters_cursor_and_incremental_chain_flag(monkeypatch):
+    for var in ("AEGIS_AUDIT_LOG_FILE", "AEGIS_AUDIT_SQLITE_PATH"):
+        monkeypatch.delenv(var, raising=False)
+    log = AuditLogger()
+    for i in range(10):
+        log.emit(actor="admin" if i % 2 else "viewer", action=f"a{i % 3}", params={"i": i}, outcome="ok")
+    assert log.chain_valid and log.verify_chain()
+    seqs = [seq for seq, _ in log.query(actor="admin")]
+    assert seqs == [1, 3, 5, 7, 9]
+    assert [seq for seq, _ in log.query(after=5, action="a0")] == [6, 9]
+    ts = log.events()[4].timestamp
+    assert [seq for seq, _ in log.query(since=ts, until=log.events()[6].timestamp)] == [4, 5, 6]
+    # An out-of-chain append flips the flag without rescanning
+    log._append(replace(log.events()[0], prev_hash="bogus"))
+    assert not log.chain_valid and not log.verify_chain()
+
+
+def test_audit_logs_pagination_and_ndjson_stream():
+    import uvicorn
+    from aegis.api import app
+
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    viewer = {"X-Role": "viewer"}
+    for i in range(5):
+        httpx.post(f"{base}/compliance/gdpr", headers={"X-Role": "admin"}, json={"action": "export", "subject_id": f"pg{i}"}).raise_for_status()
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, "action": "gdpr:export"}
+        if cursor:
+            params["cursor"] = cursor
+        data = httpx.get(f"{base}/audit/logs", headers=viewer, params=params).json()
+        assert data["valid_chain"] is True
+        pages.append(data["events"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    flat = [json.loads(e) for page in pages for e in page]
+    assert all(len(p) <= 2 for p in pages) and len(flat) >= 5
+    assert {e["action"] for e in flat} == {"gdpr:export"}
+
+    with httpx.stream("GET", f"{base}/audit/logs", headers=viewer, params={"format": "ndjson", "action": "gdpr:export"}) as r:
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        assert r.headers["x-audit-chain-valid"] == "true"
+        lines = [json.loads(line) for line in r.iter_lines() if line]
+    assert lines == flat
+    future = httpx.get(f"{base}/audit/logs", headers=viewer, params={"since": "2999-01-01T00:00:00Z"}).json()
+    assert future["events"] == [] and future["next_cursor"] is None
+    assert httpx.get(f"{base}/audit/logs", headers=viewer, params={"since": "yesterday"}).status_code == 422
+    server.should_exit = True
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+
+import httpx
+import pytest
+
+from aegis.security.audit import AuditLogger
+from aegis.security.merkle import MerkleTree, leaf_hash, node_hash, verify_consistency, verify_inclusion
+from tests.utils import get_free_port
+
+
+def _reference_root(leaves):
+    # RFC 6962 §2.1 MTH, straight from the definition
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    if len(leaves) == 1:
+        return leaf_hash(leaves[0])
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return node_hash(_reference_root(leaves[:k]), _reference_root(leaves[k:]))
+
+
+def test_tree_matches_rfc6962_and_proofs_verify():
+    data = [f"event-{i}".encode() for i in range(37)]
+    tree = MerkleTree()
+    for i, d in enumerate(data):
+        tree.append(d)
+        assert tree.root() == _reference_root(data[: i + 1])
+    for size in (1, 2, 7, 8, 9, 37):
+        root = tree.root_at(size)
+        for idx in range(size):
+            proof = tree.inclusion_proof(idx, size)
+            assert len(proof) <= size.bit_length()
+            assert verify_inclusion(leaf_hash(data[idx]), idx, size, proof, root)
+            assert not verify_inclusion(leaf_hash(b"forged"), idx, size, proof, root)
+        for first in range(size + 1):
+            proof = tree.consistency_proof(first, size)
+            assert verify_consistency(first, size, tree.root_at(first), root, proof)
+    assert not verify_consistency(5, 37, tree.root_at(6), tree.root(), tree.consistency_proof(5, 37))
+
+
+def test_pruned_tree_recomputes_old_nodes_from_leaves():
+    data = [f"event-{i}".encode() for i in range(45)]
+    reads = []
+
+    def _leaves(start, end):
+        reads.append((start, end))
+        return [leaf_hash(d) for d in data[start:end]]
+
+    full, pruned = MerkleTree(), MerkleTree(prune_below=3, leaves=_leaves)
+    for d in data:
+        full.append(d)
+        pruned.append(d)
+    assert len(pruned._levels[0]) < 8 * 32 and not reads
+    assert pruned.root() == full.root() and not reads  # the current root never needs pruned nodes
+    for size in (3, 8, 20, 45):
+        assert pruned.root_at(size) == full.root_at(size)
+        for idx in range(0, size, 3):
+            assert pruned.inclusion_proof(idx, size) == full.inclusion_proof(idx, size)
+        assert pruned.consistency_proof(size // 2, size) == full.consistency_proof(size // 2, size)
+    assert reads and all(end - start == 8 for start, end in reads)
+    with pytest.raises(ValueError):
+        MerkleTree(prune_below=3)
+
+
+def test_logger_checksum_is_incremental_and_matches_full_rehash(monkeypatch):
+    for var in ("AEGIS_AUDIT_LOG_FILE", "AEGIS_AUDIT_SQLITE_PATH"):
+        monkeypatch.delenv(var, raising=False)
+    log = AuditLogger()
+    for i in range(20):
+        log.emit(actor="admin", action="x", params={"i": i}, outcome="ok")
+    full = hashlib.sha256(b"".join(e.params_hash.encode() for e in log.events())).hexdigest()
+    assert log.checksum() == full
+    leaves = [e.to_json().encode() for e in log.events()]
+    assert log.merkle_root() == _reference_root(leaves).hex()
+    with pytest.raises(IndexError):
+        log.inclusion_proof(20)
+
+
+def test_proof_endpoints(monkeypatch):
+    import uvicorn
+    from aegis.api import app, audit
+
+    on_loop = []
+
+    def _off_loop(fn):
+        def wrapped(*a, **kw):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(fn.__name__)
+            except RuntimeError:
+                pass
+            return fn(*a, **kw)
+
+        return wrapped
+
+    for name in ("inclusion_proof", "consistency_proof", "event"):  # these may read old leaves back from disk
+        monkeypatch.setattr(audit, name, _off_loop(getattr(audit, name)))
+
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    for i in range(3):
+        httpx.post(f"{base}/compliance/gdpr", headers={"X-Role": "admin"}, json={"action": "export", "subject_id": f"mk{i}"}).raise_for_status()
+    viewer = {"X-Role": "viewer"}
+    head = httpx.get(f"{base}/audit/checksum", headers=viewer).json()
+    size = head["count"]
+    p = httpx.get(f"{base}/audit/proof", headers=viewer, params={"index": size - 2}).json()
+    assert p["tree_size"] == size and p["root"] == head["merkle_root"]
+    assert leaf_hash(p["event"].encode()).hex() == p["leaf_hash"]
+    assert verify_inclusion(bytes.fromhex(p["leaf_hash"]), p["index"], size, [bytes.fromhex(h) for h in p["proof"]], bytes.fromhex(p["root"]))
+    c = httpx.get(f"{base}/audit/consistency", headers=viewer, params={"first": size - 2, "second": size}).json()
+    assert verify_consistency(c["first"], c["second"], bytes.fromhex(c["first_root"]), bytes.fromhex(c["second_root"]), [bytes.fromhex(h) for h in c["proof"]])
+    assert httpx.get(f"{base}/audit/proof", headers=viewer, params={"index": 10**9}).status_code == 404
+    assert httpx.get(f"{base}/audit/consistency", headers=viewer, params={"first": 5, "second": 2}).status_code == 422
+    assert on_loop == []
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from aegis.security.audit import AuditLogger
+from aegis.security.audit_query import AuditFilter, dated_path, query_records, query_sqlite, sqlite_files
+from tests.utils import get_free_port
+
+ACTORS = ("admin", "operator", "viewer")
+ACTIONS = ("dp:configure", "training:start", "report:generate")
+_INSERT = "INSERT INTO audit_events (timestamp, actor, action, params_hash, outcome, prev_hash) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def _records(n=600, start=datetime(2025, 3, 30, 21, tzinfo=timezone.utc)):
+    """Every ~7 minutes over three and a half days, so ranges cross hours and daily files."""
+    out = []
+    for i in range(n):
+        ts = (start + timedelta(seconds=421 * i)).isoformat()
+        out.append(dict(timestamp=ts, actor=ACTORS[i % 3], action=ACTIONS[i % 7 % 3], params_hash=f"{i:064x}",
+                        outcome="denied" if i % 5 == 0 else "ok", prev_hash=f"{i - 1:064x}" if i else None))
+    return out
+
+
+def _populate(tmp_path, monkeypatch, records, *, backfill_day=None):
+    """Write `records` into daily databases through the logger's own schema (trigger-maintained rollup)."""
+    template = str(tmp_path / "audit.{date}.db")
+    monkeypatch.setenv("AEGIS_AUDIT_SQLITE_PATH", template)
+    monkeypatch.delenv("AEGIS_AUDIT_LOG_FILE", raising=False)
+    log = AuditLogger()
+    by_day = {}
+    for rec in records:
+        # The writer notices midnight late, so the first minutes of a day can sit in the previous file
+        late = datetime.fromisoformat(rec["timestamp"]) - timedelta(minutes=10)
+        by_day.setdefault(late.strftime("%Y%m%d"), []).append(rec)
+    for day, recs in by_day.items():
+        rows = [tuple(r.values()) for r in recs]
+        if day == backfill_day:  # a database written before the rollup existed
+            conn = sqlite3.connect(dated_path(template, day))
+            conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, "
+                         "actor TEXT NOT NULL, action TEXT NOT NULL, params_hash TEXT NOT NULL, outcome TEXT NOT NULL, "
+                         "prev_hash TEXT, signature TEXT)")
+            conn.executemany(_INSERT, rows)
+            conn.commit()
+            conn.close()
+        monkeypatch.setattr(log, "_rotated_sqlite_path", lambda day=day: dated_path(template, day))
+        conn = log._open_sqlite()
+        if day != backfill_day:
+            conn.execute("BEGIN")
+            conn.executemany(_INSERT, rows)
+            conn.execute("COMMIT")
+        conn.close()
+    return log, template
+
+
+def _expected(records, flt, group_by):
+    hits = [r for r in records if flt.matches(r)]
+    key = {"day": lambda r: r["timestamp"][:10], "hour": lambda r: r["timestamp"][:13]}
+    return hits, Counter(tuple(key[g](r) if g in key else r[g] for g in group_by) for r in hits)
+
+
+FILTERS = [
+    AuditFilter(),
+    AuditFilter(action="dp:configure"),
+    AuditFilter(actor="operator"),
+    AuditFilter(actor="operator", action="dp:configure", outcome="ok"),
+    AuditFilter(outcome="denied", since="2025-03-31T10:13:00+00:00", until="2025-04-01T03:59:59+00:00"),
+    AuditFilter(actor="admin", since="2025-03-31T00:00:00+00:00", until="2025-03-31T23:59:59.999999+00:00"),
+    AuditFilter(since="2025-04-01T05:07:00+00:00", until="2025-04-01T05:48:00+00:00"),  # within one hour
+    AuditFilter(action="training:start", since="2025-04-02T00:00:00+00:00"),
+    AuditFilter(until="2025-03-30T22:30:00+00:00"),
+    AuditFilter(since="2026-01-01T00:00:00+00:00"),
+]
+
+
+@pytest.mark.parametrize("flt", FILTERS)
+@pytest.mark.parametrize("group_by", [(), ("action",), ("day", "outcome"), ("hour",)])
+def test_sqlite_counts_match_a_scan(tmp_path, monkeypatch, flt, group_by):
+    records = _records()
+    log, template = _populate(tmp_path, monkeypatch, records, backfill_day="20250331")
+    hits, groups = _expected(records, flt, group_by)
+    res = query_sqlite(template, flt, limit=0, count=True, group_by=group_by)
+    assert res.backend == "sqlite" and res.events == [] and res.next_cursor is None
+    assert res.count == len(hits)
+    if group_by:
+        assert {tuple(g[f] for f in group_by): g["count"] for g in res.groups} == groups
+        assert [g["count"] for g in res.groups] == sorted(groups.values(), reverse=True)
+    log.close()
+
+
+@pytest.mark.parametrize("flt", FILTERS[:8])
+def test_sqlite_pages_cross_daily_files(tmp_path, monkeypatch, flt):
+    records = _records()
+    log, template = _populate(tmp_path, monkeypatch, records)
+    hits, _ = _expected(records, flt, ())
+    seen, cursor = [], None
+    while True:
+        res = query_sqlite(template, flt, limit=37, cursor=cursor)
+        assert len(res.events) <= 37
+        seen += res.events
+        cursor = res.next_cursor
+        if cursor is None:
+            break
+    assert seen == hits
+    log.close()
+
+
+def test_rollup_follows_the_writer_and_files_are_pruned(tmp_path, monkeypatch):
+    template = str(tmp_path / "audit.db")
+    monkeypatch.setenv("AEGIS_AUDIT_SQLITE_PATH", template)
+    monkeypatch.delenv("AEGIS_AUDIT_LOG_FILE", raising=False)
+    log = AuditLogger()
+    for i in range(50):
+        log.emit(actor=ACTORS[i % 3], action="dp:configure", params={"i": i}, outcome="ok")
+    res = log.search(AuditFilter(action="dp:configure"), limit=10, count=True, group_by=("actor",))
+    assert res.backend == "sqlite" and res.count == 50 and len(res.events) == 10
+    assert {g["actor"]: g["count"] for g in res.groups} == {"admin": 17, "operator": 17, "viewer": 16}
+    assert res.events[0]["params_hash"] == log.event(0).params_hash
+    path = log._rotated_sqlite_path()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT SUM(n) FROM audit_counts").fetchone()[0] == 50
+    day = path.rsplit(".", 2)[1]
+    assert sqlite_files(template) == [(day, path)]
+    assert sqlite_files(template, since="2999-01-01T00:00:00+00:00") == []
+    with pytest.raises(ValueError):
+        log.search(AuditFilter(), cursor="not-a-cursor")
+    log.close()
+
+
+@pytest.mark.parametrize("sink", ["jsonl", "memory"])
+def test_jsonl_and_memory_backends(tmp_path, monkeypatch, sink):
+    monkeypatch.delenv("AEGIS_AUDIT_SQLITE_PATH", raising=False)
+    if sink == "jsonl":
+        monkeypatch.setenv("AEGIS_AUDIT_LOG_FILE", str(tmp_path / "audit.jsonl"))
+    else:
+        monkeypatch.delenv("AEGIS_AUDIT_LOG_FILE", raising=False)
+    log = AuditLogger()
+    for i in range(40):
+        log.emit(actor=ACTORS[i % 3], action=ACTIONS[i % 2], params={"i": i}, outcome="denied" if i % 4 == 0 else "ok")
+    records = [vars(evt) for evt in log.events()]
+    flt = AuditFilter(action=ACTIONS[0], outcome="ok", since=records[5]["timestamp"])
+    hits, groups = _expected(records, flt, ("actor",))
+    seen, cursor = [], None
+    while True:
+        res = log.search(flt, limit=4, cursor=cursor, count=True, group_by=("actor",))
+        assert res.backend == sink and res.count == len(hits)
+        assert {(g["actor"],): g["count"] for g in res.groups} == groups
+        seen += res.events
+        cursor = res.next_cursor
+        if cursor is None:
+            break
+    assert seen == hits
+    assert query_records("memory", iter(records), AuditFilter(), limit=0, count=True).count == 40
+    log.close()
+
+
+def test_audit_query_endpoint():
+    import uvicorn
+    from aegis.api import app
+
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    viewer = {"X-Role": "viewer"}
+    for i in range(3):
+        httpx.post(f"{base}/compliance/gdpr", headers={"X-Role": "admin"}, json={"action": "export", "subject_id": f"q{i}"}).raise_for_status()
+
+    r = httpx.get(f"{base}/audit/query", headers=viewer,
+                  params={"action": "gdpr:export", "actor": "admin", "count": "true", "group_by": "outcome,day", "limit": 2})
+    assert r.status_code == 200 and r.headers["x-audit-chain-valid"] == "true"
+    data = r.json()
+    assert data["count"] >= 3 and len(data["events"]) == 2 and data["next_cursor"] is not None
+    assert {json.loads(e)["action"] for e in data["events"]} == {"gdpr:export"}
+    assert sum(g["count"] for g in data["groups"]) == data["count"]
+    assert set(data["groups"][0]) == {"outcome", "day", "count"}
+    rest = httpx.get(f"{base}/audit/query", headers=viewer,
+                     params={"action": "gdpr:export", "actor": "admin", "limit": 10000, "cursor": data["next_cursor"]}).json()
+    assert len(data["events"]) + len(rest["events"]) == data["count"] and rest["next_cursor"] is None
+    for bad in ({"group_by": "params_hash"}, {"group_by": "actor,actor"}, {"since": "yesterday"}, {"cursor": "x"}):
+        assert httpx.get(f"{base}/audit/query", headers=viewer, params=bad).status_code == 422
+    server.should_exit = True
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+
+import pytest
+
+from aegis.security import audit_scan
+from aegis.security.audit import AuditEvent
+from aegis.security.audit_scan import chain_hashes, iter_windows, parse_events, skip_records
+from aegis.security.audit_spill import AuditSpill
+from aegis.tools.audit_verify import verify_jsonl
+
+
+def _events(n):
+    prev, out = None, []
+    for i in range(n):
+        h = hashlib.sha256(f"{prev}{i}".encode()).hexdigest()
+        out.append(AuditEvent(f"2025-01-01T00:00:{i % 60:02d}+00:00", "operator", "training:status", h, "ok", prev))
+        prev = h
+    return out
+
+
+ODD_LINES = [
+    AuditEvent("t", 'a"b\\c', "x", "ab", "ok", None).to_json(),  # escapes
+    AuditEvent("t", "Zoë", "x", "ab", "ok", "cd").to_json(),  # \u escape
+    AuditEvent("t", "a", "x", "ab", "ok", "").to_json(),  # empty prev_hash is not null
+    json.dumps(vars(_events(2)[1])),  # default separators
+    '{"timestamp":"t","actor":"a","action":"x","params_hash":"p","outcome":"ok","prev_hash":null,"curr_hash":"c"}',
+    '{"payload":{"i":1},"prev_hash":null,"curr_hash":"c"}',
+]
+
+
+@pytest.mark.parametrize("odd", [None] + ODD_LINES)
+def test_windows_parse_like_json(odd):
+    evts = _events(6)[1:]
+    lines = [e.to_json() for e in evts]
+    if odd is not None:
+        lines.insert(2, odd)
+    window = ("\n".join(lines) + "\n").encode()
+    assert parse_events(window) == [json.loads(line) for line in lines]
+    columns = chain_hashes(window)
+    if odd is None:
+        hashes, prevs = columns
+        assert [h.tobytes().decode() for h in hashes] == [e.params_hash for e in evts]
+        assert [p.tobytes().decode() for p in prevs] == [e.prev_hash for e in evts]
+    else:  # one line outside the compact layout sends the window to the full parse
+        assert columns is None
+    assert chain_hashes(window.rstrip(b"\n")) is None  # torn last line
+    assert chain_hashes(window.replace(b"\n", b"\n\n", 1)) is None  # blank line
+
+
+def test_chain_hashes_rejects_near_misses():
+    evts = _events(3)
+    line = evts[2].to_json()
+    assert chain_hashes((evts[0].to_json() + "\n").encode()) is None  # null prev_hash: full parse
+    for bad in (
+        line.replace('"actor"', '"actr"'),
+        line.replace('"outcome":"ok"', '"outcome":"ok","x":"y"'),
+        line.replace(evts[2].params_hash, evts[2].params_hash[:-1]),
+        line + " ",
+        line.replace(',"action"', ', "action"'),
+    ):
+        assert chain_hashes((line + "\n" + bad + "\n").encode()) is None, bad
+
+
+def test_windows_cover_each_line_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_scan, "_WINDOW", 5)
+    path = tmp_path / "a.jsonl"
+    path.write_bytes(b"one\n\ntwo\nthree-is-long\nfour")  # blank line, no trailing newline
+    with open(path, "rb") as f:
+        assert b"".join(iter_windows(f)) == path.read_bytes()
+    seen = b""
+    for a in range(0, path.stat().st_size, 3):  # every line is read by exactly one range
+        with open(path, "rb") as f:
+            f.seek(a)
+            seen += b"".join(iter_windows(f, a + 3, align=True))
+    assert seen == path.read_bytes()
+    assert skip_records(b"one\n\ntwo\nthree\n", 2) == (9, 2)
+    empty = tmp_path / "empty.jsonl"
+    empty.write_bytes(b"")
+    with open(empty, "rb") as f:
+        assert list(iter_windows(f)) == []
+
+
+@pytest.mark.parametrize("tamper", [None, 0, 40, 99])
+def test_verify_compact_and_mixed_lines(tmp_path, monkeypatch, tamper):
+    monkeypatch.setattr(audit_scan, "_WINDOW", 600)  # a few lines per window
+    evts = _events(100)
+    if tamper is not None:
+        evts[tamper].params_hash = "f" * 64
+    lines = [e.to_json() for e in evts]
+    lines[10] = json.dumps(vars(evts[10]))  # full-parse fallback in the middle of the chain
+    path = tmp_path / "audit.jsonl"
+    path.write_text("\n".join(lines) + "\n")
+    res = verify_jsonl(str(path))
+    assert res.ok == (tamper in (None, 99))
+    assert res.failed_index == (None if tamper in (None, 99) else tamper + 1)
+    for chunk_bytes in (101, 997):
+        chunked = verify_jsonl(str(path), chunk_bytes=chunk_bytes)
+        assert (chunked.ok, chunked.checked, chunked.failed_index) == (res.ok, res.checked, res.failed_index)
+
+
+def test_spill_reads_ranges_across_windows(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_scan, "_WINDOW", 1000)
+    evts = _events(60)
+    path = tmp_path / "audit.jsonl"
+    path.write_text("".join(e.to_json() + "\n" for e in evts))
+    spill = AuditSpill(mark_every=25)
+    spill.jsonl_written(0, 60, str(path), 0)
+    spill.advance(60)
+    for start, end in ((0, 60), (3, 4), (17, 41), (59, 60)):
+        assert [(seq, AuditEvent(**f)) for seq, f in spill.read(start, end)] == list(enumerate(evts))[start:end]
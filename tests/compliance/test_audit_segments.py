@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+
+from aegis.security import audit_writer
+from aegis.security.audit import AuditLogger
+from aegis.security import audit_segments
+from aegis.security.audit_segments import SegmentRoller, WriterLock, load_manifest, read_archive, segment_files
+from aegis.security.audit_writer import AuditWriter
+from aegis.tools.audit_verify import verify_jsonl, verify_resumable
+
+
+def _logger(monkeypatch, path, **env):
+    monkeypatch.delenv("AEGIS_AUDIT_SQLITE_PATH", raising=False)
+    monkeypatch.setenv("AEGIS_AUDIT_LOG_FILE", str(path))
+    monkeypatch.setenv("AEGIS_AUDIT_HMAC_KEY", "k")
+    for var, value in env.items():
+        monkeypatch.setenv(var, value)
+    return AuditLogger()
+
+
+def _emit(log, n, start=0):
+    for i in range(start, start + n):
+        log.emit(actor="admin", action="x", params={"i": i}, outcome="ok")
+    assert log.flush(5)
+
+
+def test_active_file_rolls_into_compressed_segments(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, path, AEGIS_AUDIT_SEGMENT_BYTES="4000", AEGIS_AUDIT_QUEUE_SIZE="10")
+    for i in range(300):  # one event per batch, so the size threshold is hit repeatedly
+        _emit(log, 1, i)
+    log.close()
+    segments = load_manifest(str(path))
+    assert len(segments) >= 5 and path.exists()
+    assert all(s.file.endswith(".jsonl.zst") and (tmp_path / s.file).exists() for s in segments)
+    assert not list(tmp_path.glob("audit.*[0-9].jsonl"))  # uncompressed copies are gone
+    for prev, seg in zip(segments, segments[1:]):
+        assert seg.first_index == prev.first_index + prev.count and seg.first_prev_hash == prev.last_hash
+    assert sum(s.count for s in segments) + len(path.read_text().splitlines()) == 300
+
+    for workers in (1, 2):
+        res = verify_jsonl(str(path), workers=workers)
+        assert res.ok and res.checked == 300, res
+    # Time-range reads open only the overlapping segments
+    since = log.event(200).timestamp
+    assert len(segment_files(str(path), since=since)) < len(segments) + 1
+    assert [r["params_hash"] for r in read_archive(str(path), since=since)][0] == log.event(200).params_hash
+
+
+def test_manifest_mismatch_and_resume_across_rolls(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, path, AEGIS_AUDIT_SEGMENT_BYTES="3000", AEGIS_AUDIT_QUEUE_SIZE="10")
+    for i in range(60):
+        _emit(log, 1, i)
+    assert verify_resumable("jsonl", str(path)).checked == 60
+    for i in range(60, 150):
+        _emit(log, 1, i)
+    log.close()
+    res = verify_resumable("jsonl", str(path), since_checkpoint=True, workers=2)
+    assert res.ok and res.checked == 90, res
+    assert verify_resumable("jsonl", str(path), since_checkpoint=True).checked == 0
+
+    manifest = tmp_path / "audit.jsonl.manifest.json"
+    data = json.loads(manifest.read_text())
+    data["segments"][1]["last_hash"] = "0" * 64
+    manifest.write_text(json.dumps(data))
+    res = verify_jsonl(str(path))
+    assert not res.ok and "manifest" in res.message and res.failed_index == data["segments"][1]["first_index"]
+    del data["segments"][1]
+    manifest.write_text(json.dumps(data))
+    assert "missing segment" in verify_jsonl(str(path)).message
+
+
+def test_evicted_events_are_read_back_from_rolled_segments(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(
+        monkeypatch, path, AEGIS_AUDIT_SEGMENT_BYTES="50000", AEGIS_AUDIT_QUEUE_SIZE="10", AEGIS_AUDIT_BUFFER_EVENTS="1"
+    )
+    _emit(log, 3000)
+    log._writer._roller.wait(5)
+    assert len(load_manifest(str(path))) >= 3
+    assert log.event(0).prev_hash is None and log.event(1).prev_hash == log.event(0).params_hash
+    hashes = [e.params_hash for _seq, e in log.query()]
+    assert len(hashes) == 3000 and len(set(hashes)) == 3000
+    ts = log.event(500).timestamp
+    first_seq, first_evt = next(log.query(since=ts))
+    assert first_seq <= 500 and first_evt.timestamp == ts
+    log.close()
+
+
+def test_file_shared_with_another_process_does_not_roll(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, path, AEGIS_AUDIT_SEGMENT_BYTES="2000", AEGIS_AUDIT_QUEUE_SIZE="10")
+    _emit(log, 1)
+    guest = WriterLock(str(path))  # a second lock file description stands in for another worker
+    assert guest.acquire() is False
+    with open(path, "ab") as other:
+        other.write(b'{"timestamp": "", "params_hash": "guest"}\n')
+    for i in range(1, 40):
+        _emit(log, 1, i)
+    assert load_manifest(str(path)) == [] and path.exists()
+    guest.release()
+    _emit(log, 1, 40)
+    log.close()
+    segments = load_manifest(str(path))
+    assert len(segments) == 1 and segments[0].count == 41  # 40 events plus the guest's line
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_roll_interrupted_before_the_rename_is_finished_on_open(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    real_replace = audit_segments.os.replace
+
+    def _crash(src, dst):
+        if src == str(path):
+            raise OSError("process died")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(audit_segments.os, "replace", _crash)
+    log = _logger(monkeypatch, path, AEGIS_AUDIT_SEGMENT_BYTES="2000", AEGIS_AUDIT_QUEUE_SIZE="10")
+    for i in range(10):
+        _emit(log, 1, i)
+    log.close()
+    monkeypatch.setattr(audit_segments.os, "replace", real_replace)
+    [seg] = load_manifest(str(path))
+    assert path.exists() and not (tmp_path / seg.file).exists()  # recorded, never renamed
+
+    roller = SegmentRoller(str(path))
+    roller.open().close()
+    roller.wait(5)
+    assert not path.read_bytes() and load_manifest(str(path))[0].first_hash == seg.first_hash
+    res = verify_jsonl(str(path))
+    assert res.ok and res.checked == seg.count, res
+
+
+def test_age_based_roll(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    log = _logger(monkeypatch, path, AEGIS_AUDIT_SEGMENT_SECONDS="0.2")
+    _emit(log, 5)
+    time.sleep(0.3)
+    _emit(log, 5, 5)
+    log.close()
+    assert [s.count for s in load_manifest(str(path))] == [5]
+    assert verify_jsonl(str(path)).checked == 10
+
+
+def test_sqlite_reopens_when_the_rotated_path_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_writer, "_ROTATION_CHECK_S", 0.0)
+    target = [str(tmp_path / "audit.day1.sqlite")]
+
+    def _open():
+        conn = sqlite3.connect(target[0], isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS audit_events (id INTEGER PRIMARY KEY, timestamp, actor, action, params_hash, outcome, prev_hash, signature)")
+        return conn
+
+    w = AuditWriter(open_sqlite=_open, sqlite_path=lambda: target[0])
+    row = ("t", "a", "x", "h", "ok", None, None)
+    w.submit(("{}", row))
+    assert w.flush(5)
+    target[0] = str(tmp_path / "audit.day2.sqlite")
+    w.submit(("{}", row))
+    w.submit(("{}", row))
+    w.close()
+    counts = [sqlite3.connect(tmp_path / f"audit.day{d}.sqlite").execute("SELECT COUNT(*) FROM audit_events").fetchone()[0] for d in (1, 2)]
+    assert counts == [1, 2]
+    assert [f["timestamp"] for _seq, f in w.spill.read(0, 3)] == ["t"] * 3
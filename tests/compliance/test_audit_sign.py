@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import sqlite3
+
+import pytest
+
+from aegis.security.audit_sign import RowSigner
+from aegis.tools import audit_verify
+from aegis.tools.audit_verify import verify_sqlite
+
+
+def _reference(key, params_hash, prev_hash):
+    return hmac.new(key.encode(), (params_hash + (prev_hash or "")).encode(), hashlib.sha256).hexdigest()
+
+
+def _rows(n, key="k"):
+    prev, rows = None, []
+    for i in range(n):
+        h = hashlib.sha256(f"{prev}{i}".encode()).hexdigest()
+        rows.append((h, prev, _reference(key, h, prev)))
+        prev = h
+    return rows
+
+
+@pytest.mark.parametrize("key", ["k", "", "x" * 64, "y" * 65, "ключ"])
+def test_signer_matches_hmac_new(key):
+    signer = RowSigner(key)
+    rows = _rows(20, key)
+    for params_hash, prev_hash, sig in rows:
+        assert signer.sign(params_hash, prev_hash) == sig
+        assert signer.verify(params_hash, prev_hash, sig)
+        assert not signer.verify(params_hash, prev_hash, sig[:-1] + ("1" if sig[-1] == "0" else "0"))
+    assert signer.first_bad(*zip(*rows)) is None and signer.first_bad([], [], []) is None
+    assert RowSigner("other").first_bad(*zip(*rows)) == 0
+
+
+@pytest.mark.parametrize(
+    "bad, where",
+    [
+        ("0" * 64, 7),
+        ("bad", 0),
+        (b"\x00" * 64, 19),  # a BLOB where text is expected
+        (12345, 2),
+        ("é" * 64, 3),
+    ],
+)
+def test_first_bad_locates_the_row(bad, where):
+    rows = _rows(20)
+    rows[where] = rows[where][:2] + (bad,)
+    rows[12] = rows[12][:2] + (None,)  # unsigned rows are not checked
+    assert RowSigner("k").first_bad(*zip(*rows)) == where
+
+
+def test_signature_shifted_across_rows_is_caught():
+    rows = _rows(4)
+    s1, s2 = rows[1][2], rows[2][2]
+    rows[1] = rows[1][:2] + (s1 + s2[:10],)
+    rows[2] = rows[2][:2] + (s2[10:],)
+    assert RowSigner("k").first_bad(*zip(*rows)) == 1
+
+
+@pytest.mark.parametrize(
+    "sig_at, link_at",
+    [(None, None), (5, None), (None, 5), (5, 9), (9, 5), (5, 5), (8, 8), (0, None), (None, 1), (16, 17), (29, None)],
+)
+def test_batched_verify_reports_the_first_failure(tmp_path, monkeypatch, sig_at, link_at):
+    monkeypatch.setenv("AEGIS_AUDIT_HMAC_KEY", "k")
+    monkeypatch.setattr(audit_verify, "_FETCH_ROWS", 8)  # failures at, across and inside batch boundaries
+    rows = _rows(30)
+    if sig_at is not None:
+        rows[sig_at] = rows[sig_at][:2] + ("f" * 64,)
+    if link_at is not None:
+        params_hash, _prev, _sig = rows[link_at]
+        rows[link_at] = (params_hash, "0" * 64, _reference("k", params_hash, "0" * 64))
+    db = tmp_path / "audit.sqlite"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, params_hash TEXT, prev_hash TEXT, signature TEXT)")
+        conn.executemany("INSERT INTO audit_events (params_hash, prev_hash, signature) VALUES (?, ?, ?)", rows)
+    conn.close()
+    # Row by row, linkage is checked before the signature
+    failures = [(i, "HMAC signature mismatch") for i in [sig_at] if i is not None]
+    failures += [(i, "prev_hash linkage mismatch") for i in [link_at] if i is not None]
+    failures.sort(key=lambda f: (f[0], f[1] != "prev_hash linkage mismatch"))
+    for kw in ({}, {"chunk_rows": 11}):
+        res = verify_sqlite(str(db), **kw)
+        if not failures:
+            assert res.ok and res.checked == 30
+        else:
+            assert (res.ok, res.checked, res.failed_index, res.message) == (False, failures[0][0], failures[0][0] + 1, failures[0][1])
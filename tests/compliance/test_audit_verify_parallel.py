@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+
+from aegis.cli import aegis
+from aegis.tools.audit_verify import verify_jsonl, verify_sqlite
+
+
+def _aegis_lines(n):
+    prev, lines = None, []
+    for i in range(n):
+        h = hashlib.sha256((prev or "").encode() + json.dumps({"i": i}).encode()).hexdigest()
+        lines.append({"timestamp": f"t{i}", "actor": "a", "action": "x", "params_hash": h, "outcome": "ok", "prev_hash": prev})
+        prev = h
+    return lines
+
+
+def _generic_lines(n):
+    prev, lines = None, []
+    for i in range(n):
+        m = hashlib.sha256((prev or "").encode())
+        m.update(json.dumps({"i": i}, sort_keys=True).encode())
+        lines.append({"payload": {"i": i}, "prev_hash": prev, "curr_hash": m.hexdigest()})
+        prev = lines[-1]["curr_hash"]
+    return lines
+
+
+def _write(path, recs, blank_every=0):
+    with open(path, "w") as f:
+        for i, r in enumerate(recs):
+            f.write(json.dumps(r) + "\n")
+            if blank_every and i % blank_every == 0:
+                f.write("\n")
+
+
+@pytest.mark.parametrize("make", [_aegis_lines, _generic_lines])
+@pytest.mark.parametrize("tamper", [None, 0, 1, 57, 58, 199])
+def test_chunked_jsonl_matches_sequential(tmp_path, make, tamper):
+    recs = make(200)
+    if tamper is not None:
+        key = "params_hash" if "params_hash" in recs[tamper] else "curr_hash"
+        recs[tamper][key] = "f" * 64
+    path = tmp_path / "audit.jsonl"
+    _write(path, recs, blank_every=13)
+    seq = verify_jsonl(str(path))
+    for chunk_bytes in (97, 1000, 7):  # boundaries fall mid-line, on newlines and on blank lines
+        res = verify_jsonl(str(path), chunk_bytes=chunk_bytes)
+        assert (res.ok, res.checked, res.failed_index, res.message) == (seq.ok, seq.checked, seq.failed_index, seq.message)
+    assert seq.ok == (tamper is None or (tamper == 199 and make is _aegis_lines))
+    assert seq.bytes == path.stat().st_size
+
+
+def _db(path, n, key="k"):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, params_hash TEXT, prev_hash TEXT, signature TEXT)")
+    rows = []
+    for rec in _aegis_lines(n):
+        sig = hmac.new(key.encode(), (rec["params_hash"] + (rec["prev_hash"] or "")).encode(), hashlib.sha256).hexdigest()
+        rows.append((rec["params_hash"], rec["prev_hash"], sig))
+    conn.executemany("INSERT INTO audit_events (params_hash, prev_hash, signature) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def test_parallel_sqlite_matches_sequential(tmp_path, monkeypatch):
+    monkeypatch.setenv("AEGIS_AUDIT_HMAC_KEY", "k")
+    db = tmp_path / "audit.sqlite"
+    conn = _db(db, 500)
+    res = verify_sqlite(str(db), workers=2)
+    assert res.ok and res.checked == 500 and res.bytes > 0
+
+    def _same(expected_index, message):
+        whole = verify_sqlite(str(db), chunk_rows=10**9)  # one chunk: the sequential scan
+        assert (whole.failed_index, whole.message) == (expected_index, message)
+        for kw in ({"workers": 2}, {"chunk_rows": 7}, {"chunk_rows": 50}, {"chunk_rows": 131}):
+            res = verify_sqlite(str(db), **kw)
+            assert (res.ok, res.checked, res.failed_index, res.message) == (whole.ok, whole.checked, whole.failed_index, whole.message)
+
+    conn.execute("UPDATE audit_events SET signature = 'bad' WHERE id = 400")
+    conn.commit()
+    _same(400, "HMAC signature mismatch")
+    conn.execute("DELETE FROM audit_events WHERE id BETWEEN 120 AND 150")  # a gap in the id space
+    conn.commit()
+    _same(151, "prev_hash linkage mismatch")
+    conn.execute("DELETE FROM audit_events WHERE id < 151")
+    conn.execute("UPDATE audit_events SET signature = 'bad' WHERE id = 151")  # first row of a chunk
+    conn.commit()
+    _same(151, "HMAC signature mismatch")
+    conn.close()
+
+
+def test_cli_verify_jsonl_with_workers(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    _write(path, _aegis_lines(100))
+    out = CliRunner().invoke(aegis, ["audit", "verify-jsonl", str(path), "--workers", "2"])
+    assert out.exit_code == 0 and "checked=100" in out.output and "MB/s" in out.output
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from aegis.security import audit_writer
+from aegis.security.audit import AuditLogger
+from aegis.security.audit_writer import AuditWriter
+from aegis.tools.audit_verify import verify_jsonl, verify_sqlite
+
+
+def test_events_are_group_committed_in_chain_order(tmp_path, monkeypatch):
+    jsonl = tmp_path / "audit.jsonl"
+    monkeypatch.setenv("AEGIS_AUDIT_LOG_FILE", str(jsonl))
+    monkeypatch.setenv("AEGIS_AUDIT_SQLITE_PATH", str(tmp_path / "audit_{date}.sqlite"))
+    monkeypatch.setenv("AEGIS_AUDIT_HMAC_KEY", "k")
+    log = AuditLogger()
+    threads = [threading.Thread(target=lambda t=t: [log.emit(actor=f"a{t}", action="x", params={"i": i}, outcome="ok") for i in range(250)]) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert log.flush(5)
+    assert log._writer is not None and log._writer.batches < 1000
+    assert verify_jsonl(str(jsonl)).checked == 1000
+    db = next(tmp_path.glob("audit_*.sqlite"))
+    res = verify_sqlite(str(db))
+    assert res.ok and res.checked == 1000
+    with sqlite3.connect(db) as conn:
+        hashes = [r[0] for r in conn.execute("SELECT params_hash FROM audit_events ORDER BY id")]
+    assert hashes == [e.params_hash for e in log.events()]
+    log.close()
+
+
+def test_full_queue_blocks_instead_of_dropping(tmp_path):
+    gate = threading.Event()
+    path = tmp_path / "audit.sqlite"
+
+    def _open():
+        gate.wait(5)  # a stalled disk
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("CREATE TABLE audit_events (timestamp, actor, action, params_hash, outcome, prev_hash, signature)")
+        return conn
+
+    w = AuditWriter(open_sqlite=_open, max_queue=2, max_batch=1)
+    row = ("t", "a", "x", "h", "ok", None, None)
+    done = threading.Event()
+
+    def _produce():
+        for _ in range(10):
+            w.submit(("{}", row))
+        done.set()
+
+    threading.Thread(target=_produce, daemon=True).start()
+    time.sleep(0.2)
+    assert not done.is_set()  # producer is held back, nothing dropped
+    gate.set()
+    assert done.wait(5) and w.flush(5)
+    w.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM audit_events").fetchone()[0] == 10
+
+
+def test_fsync_policies(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(audit_writer.os, "fsync", lambda fd: calls.append(fd))
+    with pytest.raises(ValueError):
+        AuditWriter(jsonl_path=str(tmp_path / "x.jsonl"), fsync="sometimes")
+    off = AuditWriter(jsonl_path=str(tmp_path / "off.jsonl"), fsync="off")
+    for _ in range(5):
+        off.submit(("{}", None))
+    off.close()
+    assert calls == []
+    interval = AuditWriter(jsonl_path=str(tmp_path / "int.jsonl"), fsync="interval", fsync_interval_s=0.2)
+    interval.submit(("{}", None))
+    deadline = time.monotonic() + 2
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(calls) == 1  # synced by the timer, without any flush
+    interval.close()
+    assert (tmp_path / "int.jsonl").read_text() == "{}\n"
+
+
+def test_sqlite_backend_uses_wal_indexes_and_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.delenv("AEGIS_AUDIT_LOG_FILE", raising=False)
+    monkeypatch.setenv("AEGIS_AUDIT_SQLITE_PATH", str(tmp_path / "audit.sqlite"))
+    monkeypatch.setenv("AEGIS_AUDIT_WAL_CHECKPOINT_S", "0")
+    log = AuditLogger()
+    for i in range(50):
+        log.emit(actor="admin", action="x", params={"i": i}, outcome="ok")
+    assert log.flush(5)
+    db = next(tmp_path.glob("audit*.sqlite"))
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {r[1] for r in conn.execute("PRAGMA index_list(audit_events)")}
+        plan = " ".join(str(r) for r in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM audit_events WHERE actor = 'admin' AND action = 'x'"))
+    assert {"idx_audit_events_timestamp", "idx_audit_events_actor_action", "idx_audit_events_prev_hash"} <= indexes
+    assert "idx_audit_events_actor_action" in plan
+    log.close()
+    wal = db.with_name(db.name + "-wal")
+    assert not wal.exists() or wal.stat().st_size == 0
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+
+from tests.utils import get_free_port
+
+
+def _sample(text: str, name: str, **labels: str) -> float:
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(name + "{") and all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name}{{{want}}} not exported")
+
+
+def test_every_route_is_recorded_by_template_with_bounded_labels():
+    import uvicorn
+    from aegis.api import app
+
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    viewer = {"X-Role": "viewer"}
+    before = httpx.get(f"{base}/metrics").text
+    for i in range(3):
+        httpx.get(f"{base}/training/status", headers=viewer, params={"session_id": f"m{i}"})
+        httpx.get(f"{base}/compliance/report/jobs/job-{i}", headers=viewer)
+        httpx.get(f"{base}/random/{i}")
+    text = httpx.get(f"{base}/metrics").text
+
+    def delta(name: str, **labels: str) -> float:
+        try:
+            prev = _sample(before, name, **labels)
+        except AssertionError:
+            prev = 0.0
+        return _sample(text, name, **labels) - prev
+
+    assert delta("aegis_requests_total", endpoint="/training/status", method="GET", status="200") == 3
+    assert delta("aegis_requests_total", endpoint="/compliance/report/jobs/{job_id}", method="GET", status="404") == 3
+    assert delta("aegis_requests_total", endpoint="<unmatched>", method="GET", status="404") == 3
+    assert delta("aegis_request_latency_seconds_count", endpoint="/training/status", method="GET") == 3
+    assert delta("aegis_response_size_bytes_sum", endpoint="/training/status", method="GET") > 0
+    assert _sample(text, "aegis_requests_in_flight", endpoint="/training/status", method="GET") == 0
+    # Raw paths never become label values
+    assert "job-1" not in text and "/random/" not in text
+
+
+def test_middleware_overhead_within_budget():
+    from benchmarks.benchmark_metrics_middleware import run
+
+    # Budget is 20µs; allow headroom for noisy CI machines
+    assert run(iterations=20_000) < 60
+
+
+def test_metrics_fall_back_to_a_no_op_without_prometheus(monkeypatch):
+    from aegis import metrics
+
+    monkeypatch.setattr(metrics, "_prom", None)
+    gauge = metrics.metric("Gauge", "aegis_test_gauge", "unused", ["k"])
+    assert isinstance(gauge, metrics.NullMetric)
+    gauge.labels("a").set(1.0)
+    gauge.labels(k="b").inc()
+    metrics.metric("Histogram", "aegis_test_hist", "unused").observe(0.5)
+    assert metrics.exposition() is None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from aegis.security.ratelimit import MemoryRateLimiter, RedisRateLimiter, parse_limits
+
+
+def test_sliding_window_counter_weights_previous_window():
+    rl = MemoryRateLimiter()
+    allowed = [rl.hit("k", 10, 60.0, now=600.0 + i * 0.1).allowed for i in range(12)]
+    assert allowed == [True] * 10 + [False] * 2
+    limited = rl.hit("k", 10, 60.0, now=601.5)
+    assert not limited.allowed and 0 < limited.retry_after_s <= 60.0
+    # Halfway through the next window the previous 10 count as 5: five more fit
+    later = [rl.hit("k", 10, 60.0, now=690.0).allowed for _ in range(6)]
+    assert later == [True] * 5 + [False]
+    # Two windows later the old traffic is gone entirely
+    assert rl.hit("k", 10, 60.0, now=780.0).remaining == 9
+    assert rl.hit("other", 10, 60.0, now=601.0).allowed  # keys are independent
+
+
+def test_per_key_limit_spec():
+    assert parse_limits("training:start=100/60, report:generate=5/10") == {"training:start": (100, 60.0), "report:generate": (5, 10.0)}
+    assert parse_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_limits("nolimit")
+
+
+def test_redis_errors_are_counted_and_fail_mode_applies():
+    pytest.importorskip("redis")
+    prom = pytest.importorskip("prometheus_client")
+
+    def errors() -> float:
+        return prom.REGISTRY.get_sample_value("aegis_rate_limit_errors_total", {"backend": "redis"}) or 0.0
+
+    before = errors()
+    # Nothing listens on port 1: every call is a backend error handled by fail_mode
+    fallback = RedisRateLimiter("redis://127.0.0.1:1/0", fail_mode="memory")
+    assert [fallback.hit("k", 2, 60.0, now=0.0).allowed for _ in range(3)] == [True, True, False]
+    assert not RedisRateLimiter("redis://127.0.0.1:1/0", fail_mode="closed").hit("k", 2, 60.0).allowed
+    assert RedisRateLimiter("redis://127.0.0.1:1/0", fail_mode="open").hit("k", 0, 60.0).allowed
+    assert errors() == before + 5
+
+
+def test_redis_window_keys_share_a_cluster_slot():
+    pytest.importorskip("redis")
+    from redis.crc import key_slot
+
+    seen = []
+    limiter = RedisRateLimiter("redis://127.0.0.1:1/0", fail_mode="closed")
+    limiter.script = lambda keys, args: seen.append(keys) or [1, 0, 1]
+    assert limiter.hit("training:start", 5, 60.0, now=125.0).allowed
+    assert seen == [["aegis:rl:{training:start}:1", "aegis:rl:{training:start}:2"]]
+    assert key_slot(seen[0][0].encode()) == key_slot(seen[0][1].encode())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import httpx
+
+from tests.utils import get_free_port
+
+
+def _serve() -> str:
+    import uvicorn
+    from aegis.api import app
+
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    return base
+
+
+def test_bulk_participants_are_atomic_and_audited_once():
+    from aegis.api import coordinator, participants
+
+    base = _serve()
+    admin = {"X-Role": "admin"}
+    items = [{"client_id": f"bulk{i}", "key_hex": f"{i % 256:02x}" * 16} for i in range(2000)]
+
+    bad = items[:3] + [{"client_id": "bulk-bad", "key_hex": "zz"}, items[0]]
+    r = httpx.post(f"{base}/participants/bulk", headers=admin, json={"items": bad})
+    assert r.status_code == 422
+    results = r.json()["detail"]["results"]
+    assert [x["status"] for x in results] == ["error", "ok", "ok", "error", "error"]
+    assert "bulk-bad" not in participants and "bulk1" not in participants
+
+    t0 = time.monotonic()
+    r = httpx.post(f"{base}/participants/bulk", headers=admin, json={"items": items}, timeout=30)
+    assert r.status_code == 200, r.text
+    assert time.monotonic() - t0 < 10
+    body = r.json()
+    assert body["committed"] == 2000
+    assert participants["bulk1999"] == bytes.fromhex(items[1999]["key_hex"])
+    assert coordinator.auth_keys["bulk7"] == bytes([7]) * 16
+    evt = json.loads(body["audit"])
+    assert evt["action"] == "participant:register:bulk"
+    logs = httpx.get(f"{base}/audit/logs", headers={"X-Role": "viewer"}, params={"action": "participant:register:bulk"}).json()
+    assert len(logs["events"]) == 1
+
+    # Same RBAC as the single-item endpoint
+    r = httpx.post(f"{base}/participants/bulk", headers={"X-Role": "viewer"}, json={"items": items[:1]})
+    assert r.status_code == 403
+
+
+def test_bulk_datasets_report_per_item_warnings():
+    from aegis.api import datasets
+
+    base = _serve()
+    items = [
+        {"client_id": "bd0", "num_samples": 500, "num_features": 3, "missing_fraction": 0.0, "class_counts": {"0": 250, "1": 250}, "schema": ["a", "b", "c"]},
+        {"client_id": "bd1", "num_samples": 500, "num_features": 3, "missing_fraction": 0.0, "class_counts": {"0": 250, "1": 250}, "schema": ["a", "b", "x"]},
+    ]
+    r = httpx.post(f"{base}/dataset/register/bulk", headers={"X-Role": "admin"}, json={"items": items})
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+    assert results[1]["warnings"] and all(x["item_hash"] for x in results)
+    assert datasets["bd1"]["schema"] == ["a", "b", "x"]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from aegis.checkpoint import CheckpointStore
+from aegis.federated_coordinator import FederatedCoordinator
+
+
+def test_save_load_roundtrip_is_memory_mapped(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    w = np.arange(1000, dtype="float64")
+    info = store.save("s1", 1, {"layer0": w.reshape(10, 100), "bias": np.ones(3, dtype="float32")})
+    ckpt = store.load(info.checkpoint_id)
+    assert ckpt.tensors["layer0"].shape == (10, 100)
+    assert ckpt.tensors["bias"].dtype == np.float32
+    assert np.array_equal(ckpt.tensors["layer0"].reshape(-1), w)
+    # zero-copy: backed by a read-only memory map
+    assert isinstance(ckpt.tensors["layer0"].base, np.memmap)
+    assert not ckpt.tensors["layer0"].flags.writeable
+
+
+def test_unchanged_chunks_are_deduplicated(tmp_path):
+    store = CheckpointStore(str(tmp_path), chunk_bytes=800)  # 100 float64 per chunk
+    w = np.zeros(1000, dtype="float64")
+    first = store.save("s1", 1, w)
+    assert first.bytes_written > 0
+    w[5] = 1.0  # only the first chunk changes
+    second = store.save("s1", 2, w)
+    assert second.bytes_written == 800
+    assert second.bytes_deduplicated == 900 * 8
+    assert np.array_equal(store.load(second.checkpoint_id).flat(), w)
+    assert np.array_equal(store.load(first.checkpoint_id).flat(), np.zeros(1000))
+
+
+def test_coordinator_resume_from_latest(tmp_path):
+    coord = FederatedCoordinator(checkpoints=CheckpointStore(str(tmp_path)))
+    assert coord.resume("s1") is None
+    coord.commit_round("s1", 1, [1.0, 2.0])
+    info = coord.commit_round("s1", 2, [3.0, 4.0])
+    # a fresh coordinator (e.g. after restart) picks up the last committed round
+    restarted = FederatedCoordinator(checkpoints=CheckpointStore(str(tmp_path)))
+    ckpt = restarted.resume("s1")
+    assert ckpt is not None and info is not None
+    assert ckpt.info.checkpoint_id == info.checkpoint_id
+    assert ckpt.info.round == 2
+    assert ckpt.flat().tolist() == [3.0, 4.0]
+
+
+def test_invalid_ids_rejected(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.save("../escape", 1, [1.0])
+    with pytest.raises(KeyError):
+        store.load("s1-r000001-000000000000")
+
+
+def test_default_chunks_dedupe_a_local_change_in_a_large_vector(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    w = np.zeros(1 << 20, dtype="float64")  # 8 MiB: four default-size chunks
+    store.save("s1", 1, w)
+    w[-1] = 1.0
+    info = store.save("s1", 2, w)
+    assert info.bytes_written == 2 << 20 and info.bytes_deduplicated == 6 << 20
+    assert info.bytes_blob == 8 << 20  # the whole tensor, kept for the latest checkpoint only
+    loaded = store.load(info.checkpoint_id).flat()  # latest: one zero-copy map of the whole tensor
+    assert np.array_equal(loaded, w) and isinstance(loaded.base, np.memmap) and not loaded.flags.writeable
+    w[0] = 2.0
+    store.save("s1", 3, w)
+    blobs = list(tmp_path.glob("objects/*/*.blob"))
+    assert len(blobs) == 1  # round 2's blob was pruned once round 3 became latest
+    older = store.load(info.checkpoint_id).flat()  # assembled from its chunks with one copy
+    assert older[-1] == 1.0 and older[0] == 0.0 and not older.flags.writeable
+
+
+def test_files_and_directories_are_synced_before_latest_flips(tmp_path, monkeypatch):
+    from aegis import checkpoint
+
+    events = []
+    real_sync_dir, real_replace = checkpoint._fsync_dir, checkpoint.os.replace
+    monkeypatch.setattr(checkpoint, "_fsync_dir", lambda d: (events.append(("sync", d)), real_sync_dir(d)))
+    monkeypatch.setattr(checkpoint.os, "replace", lambda a, b: (events.append(("replace", b)), real_replace(a, b)))
+    store = CheckpointStore(str(tmp_path), chunk_bytes=800)
+    store.save("s1", 1, np.arange(300, dtype="float64"))
+    flip = events.index(("replace", str(tmp_path / "sessions" / "s1" / "LATEST")))
+    synced = {d for kind, d in events[:flip] if kind == "sync"}
+    objects = {str(p.parent) for p in tmp_path.glob("objects/*/*")}
+    assert objects and objects <= synced and str(tmp_path / "sessions" / "s1") in synced
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+
+from aegis.api import app
+from aegis.compliance.report import ReportCache
+from tests.utils import get_free_port
+
+
+def test_report_cache_is_lru_with_content_etags():
+    cache = ReportCache(max_entries=2)
+    e1 = cache.put((1, 10, "markdown"), "a")
+    cache.put((1, 10, "pdf"), b"b")
+    assert cache.get((1, 10, "markdown")) == ("a", e1)
+    cache.put((2, 10, "markdown"), "c")  # evicts the least recently used (pdf)
+    assert cache.get((1, 10, "pdf")) is None
+    assert cache.put((3, 10, "markdown"), "a") == e1  # same bytes, same ETag
+
+
+def test_report_endpoint_etag_304_and_invalidation(monkeypatch):
+    import uvicorn
+
+    monkeypatch.setenv("AEGIS_REQUIRE_MTLS_SIM", "0")
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    viewer = {"X-Role": "viewer"}
+    httpx.post(f"{base}/strategy", headers={"X-Role": "operator"}, json={"strategy": "trimmed_mean"})
+
+    r1 = httpx.get(f"{base}/compliance/report", headers=viewer, params={"steps": 500})
+    etag = r1.headers["etag"]
+    r2 = httpx.get(f"{base}/compliance/report", headers=viewer, params={"steps": 500})
+    assert r2.headers["etag"] == etag and r2.json()["markdown"] == r1.json()["markdown"]
+    assert r2.json()["audit"] != r1.json()["audit"]  # every download is still audited
+
+    r3 = httpx.get(f"{base}/compliance/report", headers={**viewer, "If-None-Match": etag}, params={"steps": 500})
+    assert r3.status_code == 304 and r3.content == b""
+
+    pdf = httpx.get(f"{base}/compliance/report", headers=viewer, params={"steps": 500, "format": "pdf"})
+    assert pdf.headers["etag"] != etag
+    assert httpx.get(f"{base}/compliance/report", headers={**viewer, "If-None-Match": pdf.headers["etag"]}, params={"steps": 500, "format": "pdf"}).status_code == 304
+
+    # A mutating call bumps the state version, so the conditional request misses
+    httpx.post(f"{base}/strategy", headers={"X-Role": "operator"}, json={"strategy": "krum"})
+    r4 = httpx.get(f"{base}/compliance/report", headers={**viewer, "If-None-Match": etag}, params={"steps": 500})
+    assert r4.status_code == 200 and r4.headers["etag"] != etag
+    assert "Strategy: krum" in r4.json()["markdown"]
+    server.should_exit = True
+
+
+def test_round_progress_keeps_the_cached_report(monkeypatch):
+    import uvicorn
+    from aegis.api import report_cache, sessions
+
+    monkeypatch.setenv("AEGIS_REQUIRE_MTLS_SIM", "0")
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    viewer = {"X-Role": "viewer"}
+    sessions["rpt-progress"] = {"status": "running", "total_rounds": 10, "current_round": 1}
+    r1 = httpx.get(f"{base}/compliance/report", headers=viewer, params={"steps": 700})
+    etag = r1.headers["etag"]
+    assert etag.startswith('W/"')  # the JSON body carries a per-request audit event
+    hits = report_cache.hits
+    sessions.update_key("rpt-progress", lambda m: dict(m, current_round=2, eta_seconds=3.0))
+    r2 = httpx.get(f"{base}/compliance/report", headers={**viewer, "If-None-Match": etag}, params={"steps": 700})
+    assert r2.status_code == 304 and report_cache.hits == hits + 1
+    sessions.update_key("rpt-progress", lambda m: dict(m, status="completed"))
+    r3 = httpx.get(f"{base}/compliance/report", headers={**viewer, "If-None-Match": etag}, params={"steps": 700})
+    assert r3.status_code == 200 and "rpt-progress: status=completed" in r3.json()["markdown"]
+    del sessions["rpt-progress"]
+    server.should_exit = True
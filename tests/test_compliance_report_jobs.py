@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import stat
+import threading
+import time
+
+import httpx
+import pytest
+
+from aegis import api
+from aegis.compliance.render_pool import RenderPoolBusy, ReportWorkerPool
+from tests.utils import get_free_port
+
+
+def test_render_pool_caps_pending_and_reports_depth():
+    depths = []
+    pool = ReportWorkerPool(workers=1, max_pending=2, on_depth=depths.append)
+    gate = threading.Event()
+    futs = [pool.submit(gate.wait, 5) for _ in range(2)]
+    with pytest.raises(RenderPoolBusy):
+        pool.submit(gate.wait, 5)
+    gate.set()
+    for f in futs:
+        f.result(5)
+    time.sleep(0.05)
+    assert pool.depth == 0 and max(depths) == 2 and depths[-1] == 0
+    pool.shutdown()
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    import uvicorn
+
+    monkeypatch.setenv("AEGIS_REQUIRE_MTLS_SIM", "0")
+    port = get_free_port()
+    srv = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=srv.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    yield base
+    srv.should_exit = True
+
+
+def test_slow_render_does_not_block_event_loop(server, monkeypatch):
+    real = api.generate_pdf
+
+    def slow_pdf(md: str) -> bytes:
+        time.sleep(1.0)  # stands in for a long fpdf layout
+        return real(md)
+
+    monkeypatch.setattr(api, "generate_pdf", slow_pdf)
+    t = threading.Thread(target=lambda: httpx.get(f"{server}/compliance/report", headers={"X-Role": "viewer"}, params={"format": "pdf", "steps": 4321}, timeout=10))
+    t.start()
+    time.sleep(0.2)
+    worst = 0.0
+    for _ in range(5):
+        t0 = time.perf_counter()
+        assert httpx.get(f"{server}/healthz").status_code == 200
+        worst = max(worst, time.perf_counter() - t0)
+    t.join(10)
+    assert worst < 0.5
+
+
+def test_report_job_lifecycle(server):
+    viewer = {"X-Role": "viewer"}
+    r = httpx.post(f"{server}/compliance/report/jobs", headers=viewer, json={"format": "pdf", "steps": 777})
+    assert r.status_code == 202
+    job = r.json()
+    assert r.headers["location"] == job["location"]
+    for _ in range(100):
+        st = httpx.get(f"{server}{job['location']}", headers=viewer).json()
+        if st["status"] in {"done", "failed"}:
+            break
+        time.sleep(0.05)
+    assert st["status"] == "done" and "result" not in st
+    dl = httpx.get(f"{server}{st['download']}", headers=viewer)
+    assert dl.status_code == 200 and dl.content.startswith(b"%PDF")
+    assert httpx.get(f"{server}{st['download']}", headers={**viewer, "If-None-Match": dl.headers["etag"]}).status_code == 304
+    assert httpx.get(f"{server}/compliance/report/jobs/nope", headers=viewer).status_code == 404
+    assert httpx.post(f"{server}/compliance/report/jobs", headers=viewer, json={"format": "docx"}).status_code == 422
+
+
+def test_job_body_is_a_file_and_reflects_the_state_at_render_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "_REPORT_JOB_DIR", str(tmp_path))
+    job_id = "job-render-time"
+    api.report_jobs[job_id] = {"status": "queued", "format": "markdown", "steps": 555, "created_at": time.time()}
+    monkeypatch.setattr(api.coordinator, "aggregator", "krum")  # changes after the job was queued
+    api._run_report_job(job_id, 555, "markdown")
+    meta = api.report_jobs[job_id]
+    assert meta["status"] == "done" and set(meta) >= {"etag"} and "result" not in meta
+    body = (tmp_path / f"{job_id}.md").read_text()
+    assert "Strategy: krum" in body
+    assert api.report_cache.get(api._report_key(555, "markdown")) == (body, meta["etag"])
+    monkeypatch.setattr(api, "_REPORT_JOB_TTL_S", -1.0)
+    api._prune_report_jobs()
+    assert job_id not in api.report_jobs and not (tmp_path / f"{job_id}.md").exists()
+
+
+def test_job_dir_is_private_and_writes_do_not_follow_symlinks(tmp_path, monkeypatch):
+    job_dir = tmp_path / "jobs"
+    monkeypatch.setattr(api, "_REPORT_JOB_DIR", str(job_dir))
+    api._write_report_job("job-private", "markdown", "# body")
+    assert stat.S_IMODE(job_dir.stat().st_mode) == 0o700
+    assert stat.S_IMODE((job_dir / "job-private.md").stat().st_mode) == 0o600
+    assert api._read_report_job("job-private", "markdown") == b"# body"
+    # A symlink planted at the report path is replaced, not written through
+    victim = tmp_path / "victim"
+    victim.write_text("keep")
+    os.symlink(victim, job_dir / "job-link.md")
+    api._write_report_job("job-link", "markdown", "# report")
+    assert victim.read_text() == "keep" and not (job_dir / "job-link.md").is_symlink()
+    # A directory other users can write into is refused
+    job_dir.chmod(0o777)
+    with pytest.raises(PermissionError):
+        api._write_report_job("job-shared", "markdown", "# body")
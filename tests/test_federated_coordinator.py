@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import numpy as np
+import pytest
+
 from aegis.federated_coordinator import (
     FederatedCoordinator,
     UpdateEnvelope,
@@ -33,6 +36,23 @@ def test_krum_picks_consensus_like_update():
     assert abs(agg[0] - 1.0) < 0.2
 
 
+def _exact_krum(rows, f=1):
+    n = len(rows)
+    scores = []
+    for i in range(n):
+        d = sorted(float(((rows[i] - rows[j]) ** 2).sum()) for j in range(n) if j != i)
+        scores.append(sum(d[: max(n - f - 2, 1)]))
+    return rows[int(np.argmin(scores))]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_krum_matches_direct_distances_for_close_large_updates(seed):
+    # Weights ~100 with spread ~1e-5: the |a|^2 + |b|^2 - 2ab form loses every digit here
+    rng = np.random.default_rng(seed)
+    rows = 100.0 + rng.normal(size=(1, 1000)) + rng.normal(scale=1e-5, size=(8, 1000))
+    assert aggregate_krum(rows.tolist(), f=1) == _exact_krum(rows).tolist()
+
+
 def test_envelope_auth_and_coordination():
     auth = {"c1": b"k1", "c2": b"k2", "c3": b"k3"}
     coord = FederatedCoordinator(aggregator="trimmed_mean", auth_keys=auth)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from aegis.federated_coordinator import FederatedCoordinator
+from aegis.secure_aggregation import (
+    MaskedUpdate,
+    SecureAggregationClient,
+    SecureAggregationServer,
+    decode_fixed,
+    encode_fixed,
+    expand_mask,
+    pair_seed,
+    shamir_reconstruct,
+    shamir_split,
+    simulate_secure_round,
+)
+
+
+def test_shamir_threshold_reconstruction():
+    secret = 2**255 + 12345
+    shares = shamir_split(secret, n=7, t=4)
+    assert shamir_reconstruct(shares[:4]) == secret
+    assert shamir_reconstruct(shares[3:]) == secret
+    assert shamir_reconstruct(shares[:3]) != secret
+
+
+def test_fixed_point_roundtrip():
+    x = np.array([-1.5, 0.0, 3.25, 1e-4])
+    assert np.allclose(decode_fixed(encode_fixed(x)), x, atol=1e-6)
+
+
+@pytest.mark.parametrize("kw", [{}, {"dropouts": 2}, {"dropouts": 2, "self_mask": True}, {"neighbors": 2, "dropouts": 1}])
+def test_masks_cancel_and_dropouts_recover(kw):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(8, 257))
+    res = simulate_secure_round(x, seed=3, **kw)
+    import random
+
+    dropped = set(random.Random(3).sample(range(8), kw.get("dropouts", 0))) if kw.get("dropouts") else set()
+    expected = x[[i for i in range(8) if i not in dropped]].mean(axis=0)
+    assert res.survivors == 8 - len(dropped)
+    assert np.allclose(res.mean, expected, atol=1e-6)
+
+
+def test_coordinator_secure_round_hides_individual_updates():
+    ids = ["a", "b", "c", "d"]
+    keys = {cid: cid.encode() * 4 for cid in ids}
+    coord = FederatedCoordinator(auth_keys=keys)
+    clients = {cid: SecureAggregationClient(cid) for cid in ids}
+    server = SecureAggregationServer(threshold=3)
+    graph = server.register({cid: c.public_key for cid, c in clients.items()}, 1)
+    for cid, c in clients.items():
+        for recipient, shares in c.setup(server.public_keys, graph, 3).items():
+            clients[recipient].receive_shares(cid, shares)
+    x = {cid: np.full(4, float(i)) for i, cid in enumerate(ids)}
+    updates = [MaskedUpdate.sign(cid, 1, clients[cid].mask(x[cid], 1), keys[cid]) for cid in ids[:3]]
+    # forged update and the masked vector itself reveal nothing useful
+    updates.append(MaskedUpdate.sign("d", 1, clients["d"].mask(x["d"], 1), b"wrong"))
+    assert not np.allclose(decode_fixed(updates[1].masked), x["b"])
+    masked = coord.verify_masked(updates, 1)
+    assert set(masked) == {"a", "b", "c"}
+    revealed = {cid: clients[cid].reveal(set(masked), {"d"}) for cid in masked}
+    out = coord.aggregate_secure(masked, server, revealed, 1)
+    assert out == pytest.approx([1.0] * 4)
+
+
+def test_replayed_round_is_rejected():
+    ids = ["a", "b", "c"]
+    keys = {cid: cid.encode() * 4 for cid in ids}
+    coord = FederatedCoordinator(auth_keys=keys)
+    clients = {cid: SecureAggregationClient(cid) for cid in ids}
+    server = SecureAggregationServer(threshold=2)
+    graph = server.register({cid: c.public_key for cid, c in clients.items()}, 2)
+    for cid, c in clients.items():
+        for recipient, shares in c.setup(server.public_keys, graph, 2).items():
+            clients[recipient].receive_shares(cid, shares)
+    x = {cid: np.full(4, float(i + 1)) for i, cid in enumerate(ids)}
+    old = MaskedUpdate.sign("c", 1, clients["c"].mask(x["c"], 1), keys["c"])
+    assert old.verify(keys["c"])  # a genuine round-1 update, captured
+    updates = [MaskedUpdate.sign(cid, 2, clients[cid].mask(x[cid], 2), keys[cid]) for cid in ("a", "b")] + [old]
+    masked = coord.verify_masked(updates, 2)
+    assert set(masked) == {"a", "b"}
+    revealed = {cid: clients[cid].reveal(set(masked), {"c"}) for cid in masked}
+    assert coord.aggregate_secure(masked, server, revealed, 2) == pytest.approx([1.5] * 4)
+
+
+def _setup_round(server, clients, round, t):
+    graph = server.register({cid: c.public_key for cid, c in clients.items()}, round)
+    for cid, c in clients.items():
+        for recipient, shares in c.setup(server.public_keys, graph, t).items():
+            clients[recipient].receive_shares(cid, shares)
+
+
+def test_revealed_secret_does_not_unmask_later_rounds():
+    ids = ["a", "b", "c", "d"]
+    clients = {cid: SecureAggregationClient(cid, self_mask=True) for cid in ids}
+    server = SecureAggregationServer(threshold=3)
+    _setup_round(server, clients, 1, 3)
+    x1 = {cid: np.full(3, float(i)) for i, cid in enumerate(ids)}
+    masked = {cid: clients[cid].mask(x1[cid], 1) for cid in ids[:3]}  # d drops out of round 1
+    revealed = {cid: clients[cid].reveal(set(masked), {"d"}) for cid in masked}
+    assert server.unmask_sum(masked, revealed, 1) == pytest.approx([3.0] * 3)
+    sk_d = shamir_reconstruct([r["d"]["sk"] for r in revealed.values()])
+    with pytest.raises(ValueError):
+        server.unmask_sum(masked, revealed, 1)  # one unmask per registration
+    with pytest.raises(ValueError):
+        clients["a"].mask(x1["a"], 2)  # round-1 keys are spent
+    with pytest.raises(ValueError):
+        clients["a"].reveal({"a", "b", "c"}, {"d"} | {"b"})  # inconsistent with what was revealed
+    with pytest.raises(ValueError):
+        server.register({cid: c.public_key for cid, c in clients.items()}, 2)  # d's revealed key
+
+    for c in clients.values():
+        c.rekey()
+    _setup_round(server, clients, 2, 3)
+    x2 = {"a": np.zeros(3), "b": np.zeros(3), "c": np.zeros(3), "d": np.array([3.14, -2.0, 7.5])}
+    masked = {cid: clients[cid].mask(x2[cid], 2) for cid in ids}
+    revealed = {cid: clients[cid].reveal(set(masked), set()) for cid in masked}
+    # The round-1 secret no longer strips d's pairwise masks
+    y = masked["d"].copy()
+    self_seed = shamir_reconstruct([r["d"]["self"] for r in revealed.values()][:3]).to_bytes(32, "big")
+    np.subtract(y, expand_mask(self_seed, 2, 3), out=y)
+    for u in "abc":
+        np.add(y, expand_mask(pair_seed(sk_d, server.public_keys[u], u, "d"), 2, 3), out=y)
+    assert not np.allclose(decode_fixed(y), x2["d"])
+    assert server.unmask_sum(masked, revealed, 2) == pytest.approx(x2["d"])
+
+
+def test_too_few_survivors_rejected():
+    with pytest.raises(ValueError):
+        simulate_secure_round(np.zeros((4, 3)), dropouts=2, threshold=3)
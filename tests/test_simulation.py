@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import numpy as np
+
+from aegis.simulation import SimulationConfig, run_simulation
+
+
+def test_inline_simulation_routes_through_coordinator():
+    rep = run_simulation(SimulationConfig(num_clients=20, rounds=2, dim=5, workers=0))
+    assert [r.round for r in rep.rounds] == [1, 2]
+    for r in rep.rounds:
+        assert r.received == 20
+        assert r.valid == 20  # every envelope passed HMAC verification
+        assert r.bytes_up > 0
+        assert r.latency_s >= r.aggregate_s
+    assert len(rep.final_params) == 5
+    assert any(abs(w) > 0 for w in rep.final_params)
+    assert rep.summary()["clients"] == 20
+
+
+def test_process_pool_matches_inline_and_uses_real_dataset(tmp_path):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(120, 4))
+    y = (X[:, 0] > 0).astype("float64")
+    path = tmp_path / "data.npz"
+    np.savez(path, X=X, y=y)
+    cfg = dict(num_clients=6, rounds=2, dim=4, dataset_path=str(path))
+    inline = run_simulation(SimulationConfig(workers=0, **cfg))
+    pooled = run_simulation(SimulationConfig(workers=2, **cfg))
+    assert np.allclose(inline.final_params, pooled.final_params)
+    assert pooled.rounds[-1].valid == 6
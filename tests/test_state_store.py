@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+
+import pytest
+
+from aegis.state_store import MemoryStateStore, SQLiteStateStore, StateStore, StoreMapping
+
+
+def _worker_write(path: str, n: int) -> None:
+    store = SQLiteStateStore(path)
+    sessions = StoreMapping(store, "sessions")
+    for i in range(n):
+        sessions.update_key("shared", lambda m: {"count": int((m or {}).get("count", 0)) + 1})
+    sessions[f"from-{mp.current_process().pid}"] = {"status": "running"}
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_mapping_roundtrip_and_version_invalidation(tmp_path, backend):
+    store = MemoryStateStore() if backend == "memory" else SQLiteStateStore(str(tmp_path / "state.db"))
+    a = StoreMapping(store, "participants", encode=bytes.hex, decode=bytes.fromhex)
+    b = StoreMapping(store, "participants", encode=bytes.hex, decode=bytes.fromhex)
+    a["c1"] = b"\x01\x02"
+    assert b["c1"] == b"\x01\x02"  # other "worker" sees the write
+    v = store.version("participants")
+    b.set_many({"c2": b"\x03", "c3": b"\x04"})
+    assert store.version("participants") == v + 1
+    assert sorted(a) == ["c1", "c2", "c3"]
+    del a["c2"]
+    assert "c2" not in b and len(b) == 2
+    assert store.version("sessions") == 0  # namespaces are independent
+
+
+def test_update_key_is_atomic_across_threads():
+    store = MemoryStateStore()
+    m = StoreMapping(store, "config")
+
+    def bump() -> None:
+        for _ in range(200):
+            m.update_key("n", lambda cur: (cur or 0) + 1)
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert m["n"] == 800
+
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_update_key_keeps_the_read_cache_warm(tmp_path, backend):
+    store = MemoryStateStore() if backend == "memory" else SQLiteStateStore(str(tmp_path / "state.db"))
+    m = StoreMapping(store, "sessions", ttl_s=60.0)
+    m["s1"] = {"round": 0}
+    assert m["s1"] == {"round": 0}  # warm the cache
+    reloads = []
+    items = store.items
+    store.items = lambda ns: reloads.append(ns) or items(ns)  # type: ignore[method-assign]
+    for rnd in range(1, 4):
+        assert m.update_key("s1", lambda cur: dict(cur or {}, round=rnd)) == {"round": rnd}
+        assert m["s1"] == {"round": rnd}
+    m.update_key("s1", lambda cur: None)
+    assert "s1" not in m and reloads == []
+    with pytest.raises(TypeError):
+        StateStore()  # type: ignore[abstract]
+
+def test_sqlite_store_is_consistent_across_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    sessions = StoreMapping(SQLiteStateStore(path), "sessions")
+    sessions["local"] = {"status": "queued"}
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_worker_write, args=(path, 50)) for _ in range(2)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    assert sessions["shared"] == {"count": 100}
+    assert sum(1 for k in sessions if k.startswith("from-")) == 2
+    assert sessions["local"]["status"] == "queued"
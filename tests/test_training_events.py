@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import httpx
+from click.testing import CliRunner
+
+from aegis.api import app
+from aegis.cli import aegis
+from aegis.events import EventBroker, iter_sse
+from tests.utils import get_free_port
+
+
+def test_broker_fans_out_cross_thread_publishes():
+    broker = EventBroker(max_queue=2)
+
+    async def main():
+        subs = [broker.subscribe("s") for _ in range(3)]
+        threading.Thread(target=lambda: [broker.publish("s", {"r": i}) for i in range(5)]).start()
+        got = []
+        for sub in subs:
+            seen = []
+            while True:
+                evt = await sub.get(timeout=1.0)
+                seen.append(evt["r"])
+                if evt["r"] == 4:
+                    break
+            got.append(seen)
+            sub.close()
+        return got
+
+    got = asyncio.run(main())
+    assert all(seen[-1] == 4 and len(seen) <= 5 for seen in got)
+    assert broker.last("s") == {"r": 4}
+    assert broker.subscriber_count() == 0
+
+
+def test_events_stream_pushes_round_progress_and_cli_watch(monkeypatch):
+    import uvicorn
+
+    monkeypatch.setenv("AEGIS_ROUND_DURATION_S", "0.05")
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+
+    r = httpx.post(f"{base}/training/start", headers={"X-Role": "operator"}, json={"session_id": "sse1", "rounds": 3, "resume": False})
+    assert r.status_code == 200
+    with httpx.stream("GET", f"{base}/training/events", headers={"X-Role": "viewer"}, params={"session_id": "sse1"}, timeout=10) as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = [e["data"] for e in iter_sse(resp.iter_lines())]
+    rounds = [e["current_round"] for e in events]
+    assert rounds == sorted(rounds) and rounds[-1] == 3
+    assert events[-1]["status"] == "completed"
+    assert "epsilon_estimate" in events[-1]
+
+    out = CliRunner().invoke(aegis, ["watch", "--session-id", "sse1", "--url", base])
+    assert out.exit_code == 0
+    assert '"status": "completed"' in out.output and '"rounds": 3' in out.output
+    server.should_exit = True
+
+
+def test_stream_opened_before_start_waits_for_the_session(monkeypatch):
+    import uvicorn
+    from aegis import api
+
+    monkeypatch.setenv("AEGIS_ROUND_DURATION_S", "0.05")
+    synced_on = []
+    sync_config = api._sync_config
+    monkeypatch.setattr(api, "_sync_config", lambda: synced_on.append(threading.current_thread().name) or sync_config())
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+
+    events = []
+
+    def _watch():
+        with httpx.stream("GET", f"{base}/training/events", headers={"X-Role": "viewer"}, params={"session_id": "sse-early"}, timeout=10) as resp:
+            events.extend(e["data"] for e in iter_sse(resp.iter_lines()))
+
+    t = threading.Thread(target=_watch)
+    t.start()
+    time.sleep(0.3)
+    assert t.is_alive()  # "unknown" is not terminal: the stream stays open
+    r = httpx.post(f"{base}/training/start", headers={"X-Role": "operator"}, json={"session_id": "sse-early", "rounds": 2, "resume": False})
+    assert r.status_code == 200
+    t.join(10)
+    assert events[0]["status"] == "unknown" and events[-1]["status"] == "completed"
+    assert synced_on and "aegis-session-supervisor" not in synced_on
+    server.should_exit = True
+
+
+def test_round_progress_does_not_invalidate_the_sessions_catalog():
+    from aegis import api
+    from aegis.training_executor import SessionState
+
+    st = SessionState(session_id="progress-ns", total_rounds=5, status="running", started_at=time.time())
+    api._sync_session(st)
+    version = api.state_store.version("sessions")
+    for r in (1, 2, 3):
+        st.current_round = r
+        api._sync_session(st)
+    assert api.state_store.version("sessions") == version
+    # Not on this worker's executor: the view reads the catalog plus the live progress
+    view = api._session_view("progress-ns")
+    assert view["status"] == "running" and view["current_round"] == 3
+    st.status, st.finished_at = "completed", time.time()
+    api._sync_session(st)
+    assert api.sessions["progress-ns"]["current_round"] == 3
+    assert api.state_store.get("session_progress", "progress-ns") is None
+    del api.sessions["progress-ns"]
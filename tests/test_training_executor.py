@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from aegis.checkpoint import CheckpointStore
+from aegis.training_executor import FederatedRoundRunner, RoundResult, SessionExecutor, simulated_updates
+
+
+def _wait(pred, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not pred():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_rounds_run_through_coordinator_and_checkpoint(tmp_path):
+    store = CheckpointStore(tmp_path)
+    keys = {f"c{i}": bytes([i + 1]) * 32 for i in range(5)}
+    runner = FederatedRoundRunner(keys=lambda: keys, aggregator=lambda: "trimmed_mean", source=simulated_updates(4), dim=4, checkpoints=store)
+    ex = SessionExecutor(runner, max_workers=2)
+    st = ex.submit("s1", 3)
+    _wait(lambda: st.status == "completed")
+    assert st.current_round == 3
+    assert [t.round for t in st.timings] == [1, 2, 3]
+    assert all(t.updates == 5 for t in st.timings)
+    assert st.checkpoint_id == store.latest("s1").checkpoint_id
+    assert any(abs(w) > 0 for w in store.load(st.checkpoint_id).flat())
+    ex.shutdown()
+
+
+def test_stop_is_cooperative_and_sessions_queue_over_cap():
+    gate = threading.Event()
+
+    def round_fn(session_id: str, rnd: int) -> RoundResult:
+        gate.wait(5)
+        return RoundResult(updates=1)
+
+    ex = SessionExecutor(round_fn, max_concurrent_sessions=1, max_workers=2)
+    a = ex.submit("a", 100)
+    b = ex.submit("b", 1)
+    assert (a.status, b.status) == ("running", "queued")
+    ex.stop("a")
+    assert a.status == "stopped"
+    gate.set()
+    _wait(lambda: b.status == "completed")
+    assert a.current_round < 100
+    assert ex.stats()["active"] == 0
+    ex.shutdown()
+
+
+def test_min_round_period_paces_rounds_and_failures_surface():
+    calls = []
+
+    def round_fn(session_id: str, rnd: int) -> RoundResult:
+        calls.append(rnd)
+        if session_id == "bad":
+            raise RuntimeError("boom")
+        return RoundResult()
+
+    ex = SessionExecutor(round_fn)
+    st = ex.submit("paced", 2, min_round_s=0.2)
+    time.sleep(0.1)
+    assert st.status == "running" and st.current_round == 0
+    _wait(lambda: st.status == "completed")
+    assert st.finished_at - st.started_at >= 0.4
+    bad = ex.submit("bad", 2)
+    _wait(lambda: bad.status == "failed")
+    assert bad.error == "boom"
+    ex.shutdown()
+
+
+def test_restart_without_resume_starts_from_zeros_and_finished_sessions_are_evicted(tmp_path):
+    store = CheckpointStore(tmp_path)
+    keys = {f"c{i}": bytes([i + 1]) * 32 for i in range(3)}
+    runner = FederatedRoundRunner(keys=lambda: keys, aggregator=lambda: "trimmed_mean", source=simulated_updates(4), dim=4, checkpoints=store)
+    ex = SessionExecutor(runner, on_start=runner.begin, on_finish=runner.finish)
+    first = ex.submit("s1", 2)
+    _wait(lambda: first.status == "completed")
+    after_one = store.at_round("s1", 1)
+    after_two = store.load(store.latest("s1").checkpoint_id).flat().tolist()
+    assert runner._coordinators == {} and runner._weights == {}
+    again = ex.submit("s1", 1)  # start_round 0: a fresh run, not a continuation of round 2
+    _wait(lambda: again.status == "completed")
+    redone = store.load(store.at_round("s1", 1).checkpoint_id).flat()
+    assert after_one is not None and redone.tolist() == store.load(after_one.checkpoint_id).flat().tolist()
+    resumed = ex.submit("s1", 3, start_round=1)  # continues from the round-1 checkpoint
+    _wait(lambda: resumed.status == "completed")
+    assert [t.round for t in resumed.timings] == [2, 3]
+    assert store.load(store.at_round("s1", 2).checkpoint_id).flat().tolist() == after_two
+    ex.shutdown()
+
+
+def test_resubmitted_session_waits_for_the_replaced_round():
+    gate = threading.Event()
+    running, overlaps = [], []
+
+    def round_fn(session_id: str, rnd: int) -> RoundResult:
+        running.append(rnd)
+        if len(running) > 1:
+            overlaps.append(rnd)
+        gate.wait(5)
+        running.remove(rnd)
+        return RoundResult(updates=1)
+
+    started = []
+    ex = SessionExecutor(round_fn, max_workers=2, on_start=lambda st: started.append(st))
+    old = ex.submit("s", 5)
+    _wait(lambda: running == [1])
+    new = ex.submit("s", 1)
+    time.sleep(0.2)
+    assert started == [old]  # the new run has not claimed the session yet
+    gate.set()
+    _wait(lambda: new.status == "completed")
+    assert old.status == "stopped" and started == [old, new] and overlaps == []
+    ex.shutdown()
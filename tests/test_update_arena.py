@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import gc
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from aegis.federated_coordinator import FederatedCoordinator, UpdateEnvelope
+from aegis.update_arena import ArenaFullError, UpdateArena
+from aegis.update_codec import encode_update
+
+
+def test_arena_slots_reset_and_release():
+    arena = UpdateArena(max_clients=3, dim=2)
+    arena.write("a", [1.0, 1.0])
+    arena.write("b", [2.0, 2.0])
+    arena.write("c", [3.0, 3.0])
+    with pytest.raises(ArenaFullError):
+        arena.claim("d")
+    arena.reset()
+    with pytest.raises(ValueError):
+        arena.write("a", [0.0, 0.0, 0.0])  # wrong size: slot is released again
+    assert len(arena) == 0
+    arena.write("a", [1.0, 1.0])
+    arena.write("b", [2.0, 2.0])
+    arena.write("c", [3.0, 3.0])
+    arena.release("a")
+    assert arena.rows().tolist() == [[3.0, 3.0], [2.0, 2.0]]
+    assert arena.clients() == {"c": 0, "b": 1}
+
+
+def test_coordinator_reuses_arena_and_grows_when_needed():
+    keys = {f"c{i}": b"k%d" % i for i in range(5)}
+    coord = FederatedCoordinator(auth_keys=keys, max_clients=2)
+    envs = [UpdateEnvelope.sign(cid, 1, [float(i), 1.0], k) for i, (cid, k) in enumerate(keys.items())]
+    assert coord.aggregate(envs) == pytest.approx([2.0, 1.0])
+    assert coord.arena is not None and coord.arena.max_clients >= 5
+    buf = coord.arena.buffer
+    assert coord.aggregate(envs[:3]) == pytest.approx([1.0, 1.0])
+    assert coord.arena.buffer is buf  # same allocation reused across rounds
+
+
+def _traced_growth(round_fn, rounds: int) -> int:
+    for _ in range(20):  # warm up caches/arena
+        round_fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        round_fn()
+        gc.collect()
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(rounds):
+            round_fn()
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return end - start
+
+
+@pytest.mark.parametrize("aggregator", ["trimmed_mean", "krum"])
+def test_memory_flat_across_1000_rounds(aggregator):
+    rng = np.random.default_rng(0)
+    keys = {f"c{i}": b"key%d" % i for i in range(16)}
+    coord = FederatedCoordinator(aggregator=aggregator, auth_keys=keys, max_clients=16)
+    payloads = [encode_update(cid, 1, rng.normal(size=512), k) for cid, k in keys.items()]
+
+    def one_round():
+        out = coord.aggregate_wire(payloads)
+        assert len(out) == 512
+
+    growth = _traced_growth(one_round, 1000)
+    # Nothing may accumulate per round; allow a little slack for interpreter noise.
+    assert growth < 64 * 1024
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from aegis.federated_coordinator import FederatedCoordinator, UpdateEnvelope
+from aegis.update_codec import MAGIC, PREFIX, WIRE_VERSION, UpdateAuthError, UpdateFormatError, decode_update, encode_update
+
+KEYS = {"c1": b"k1", "c2": b"k2", "c3": b"k3"}
+
+
+def _round_updates(base: np.ndarray):
+    rng = np.random.default_rng(0)
+    out = {}
+    for cid in KEYS:
+        upd = base.copy()
+        idx = rng.choice(base.size, size=base.size // 50, replace=False)  # sparse change
+        upd[idx] += rng.normal(scale=0.01, size=idx.size)
+        out[cid] = upd
+    return out
+
+
+def test_roundtrip_and_tamper_detection():
+    data = encode_update("c1", 3, [1.0, -2.5, 3.0], KEYS["c1"])
+    upd = decode_update(data, KEYS["c1"])
+    assert upd.client_id == "c1" and upd.round == 3 and not upd.is_delta
+    assert upd.values.tolist() == [1.0, -2.5, 3.0]
+    tampered = bytearray(data)
+    tampered[-40] ^= 0x01
+    with pytest.raises(UpdateAuthError):
+        decode_update(bytes(tampered), KEYS["c1"])
+    with pytest.raises(UpdateAuthError):
+        decode_update(data, KEYS["c2"])
+    with pytest.raises(UpdateFormatError):
+        decode_update(b"junk" * 20, KEYS["c1"])
+
+
+def _signed(header: dict, body: bytes, key: bytes) -> bytes:
+    raw = json.dumps(header, separators=(",", ":")).encode()
+    signed = PREFIX.pack(MAGIC, WIRE_VERSION, 0, 0, len(raw)) + raw + body
+    return signed + hmac.new(key, signed, hashlib.sha256).digest()
+
+
+def test_zstd_bomb_is_bounded_by_the_header_size():
+    zstd = pytest.importorskip("zstandard")
+    bomb = zstd.ZstdCompressor(level=19, write_content_size=True).compress(bytes(50 << 20))
+    assert len(bomb) < 4096
+    header = {"client_id": "c1", "round": 1, "n": 3, "dtype": "<f8", "encoding": "full",
+              "base_version": None, "compression": "zstd", "body_len": len(bomb)}
+    data = _signed(header, bomb, KEYS["c1"])
+    with pytest.raises(UpdateAuthError):  # a forged bomb is rejected before any decompression
+        decode_update(_signed(header, bomb, b"forged"), KEYS["c1"])
+    tracemalloc.start()
+    try:
+        with pytest.raises(UpdateFormatError):
+            decode_update(data, KEYS["c1"])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 1 << 20  # the declared 50 MiB content size is never allocated
+
+
+def _raw(header, body: bytes) -> bytes:
+    raw = json.dumps(header, separators=(",", ":")).encode()
+    return PREFIX.pack(MAGIC, WIRE_VERSION, 0, 0, len(raw)) + raw + body + bytes(32)
+
+
+def test_malformed_headers_raise_format_errors_and_are_skipped():
+    good = {"client_id": "c1", "round": 1, "n": 2, "dtype": "<f8", "encoding": "full",
+            "base_version": None, "compression": "none", "body_len": 16}
+    bad = [
+        _raw([1, 2], bytes(16)),
+        _raw({k: v for k, v in good.items() if k != "client_id"}, bytes(16)),
+        _raw({k: v for k, v in good.items() if k != "round"}, bytes(16)),
+        _raw({**good, "n": "2"}, bytes(16)),
+        _raw({**good, "base_version": "x"}, bytes(16)),
+        _raw({**good, "body_len": 15}, bytes(15)),  # not a whole number of floats
+    ]
+    for data in bad:
+        with pytest.raises(UpdateFormatError):
+            decode_update(data, KEYS["c1"])
+    coord = FederatedCoordinator(auth_keys=KEYS)
+    ok = [encode_update(cid, 1, [1.0, 1.0], KEYS[cid]) for cid in KEYS]
+    assert coord.aggregate_wire(bad + ok) == pytest.approx([1.0, 1.0])
+
+
+def test_delta_zstd_cuts_bytes_and_matches_full_aggregation():
+    base = np.random.default_rng(1).normal(size=10_000)
+    new = _round_updates(base)
+    full = [encode_update(cid, 2, w, KEYS[cid]) for cid, w in new.items()]
+    delta = [encode_update(cid, 2, w, KEYS[cid], base=base, base_version=1, compression="zstd") for cid, w in new.items()]
+    assert sum(map(len, delta)) < sum(map(len, full)) / 4
+
+    coord = FederatedCoordinator(auth_keys=KEYS)
+    coord.publish_global(1, base)
+    expected = coord.aggregate_wire(full)
+    got = coord.aggregate_wire(delta)
+    assert np.allclose(got, expected)
+
+
+def test_delta_envelopes_and_unknown_base():
+    base = [1.0, 2.0]
+    coord = FederatedCoordinator(auth_keys=KEYS, aggregator="krum")
+    envs = [UpdateEnvelope.sign(cid, 2, [0.1 * i, -0.1 * i], KEYS[cid], base_version=7) for i, cid in enumerate(KEYS)]
+    assert coord.aggregate(envs) == []  # base version 7 not cached
+    coord.publish_global(7, base)
+    out = coord.aggregate(envs)
+    assert out == pytest.approx([1.1, 1.9])
+    # base_version is covered by the signature
+    envs[0].base_version = 8
+    assert not coord.verify_envelope(envs[0])
+
+
+def test_version_cache_is_bounded():
+    coord = FederatedCoordinator(max_cached_versions=2)
+    for v in range(5):
+        coord.publish_global(v, [float(v)])
+    assert coord.global_version(2) is None
+    assert coord.global_version(4) is not None
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import numpy as np
+import pytest
+
+from aegis.training_executor import FederatedRoundRunner, SessionState, simulated_updates
+from aegis.update_codec import MAGIC, PREFIX, StreamingUpdateDecoder, UpdateAuthError, UpdateFormatError, encode_update
+from aegis.update_inbox import DuplicateUpdateError, InboxClosed, UpdateInbox, ingest_update
+from tests.utils import get_free_port
+
+KEYS = {"c1": b"k1", "c2": b"k2"}
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i: i + size]
+
+
+def _ingest(inbox: UpdateInbox, data: bytes, size: int = 7, **kw):
+    return asyncio.run(ingest_update(inbox, "s", _chunks(data, size), KEYS.get, **kw))
+
+
+@pytest.mark.parametrize("kw", [{}, {"dtype": "<f4"}, {"compression": "zstd"}])
+@pytest.mark.parametrize("size", [1, 13, 1 << 16])
+def test_streaming_decoder_matches_codec_for_any_chunking(kw, size):
+    values = np.random.default_rng(0).normal(size=1000)
+    data = encode_update("c1", 1, values, KEYS["c1"], **kw)
+    dec = StreamingUpdateDecoder(KEYS.get)
+    out = np.empty(1000)
+    for i in range(0, len(data), size):
+        dec.feed(data[i: i + size])
+        if dec.header is not None and dec._out is None:
+            dec.attach(out)
+    assert dec.finish()["client_id"] == "c1"
+    expected = values.astype(kw.get("dtype", "<f8")).astype("float64")
+    assert np.array_equal(out, expected)
+
+
+def test_inbox_rejects_bad_uploads_without_keeping_rows():
+    inbox = UpdateInbox(4, max_clients=4)
+    good = encode_update("c1", 1, [1.0, 2.0, 3.0, 4.0], KEYS["c1"])
+    tampered = bytearray(good)
+    tampered[-40] ^= 1
+    with pytest.raises(UpdateAuthError):
+        _ingest(inbox, bytes(tampered))
+    with pytest.raises(UpdateAuthError):
+        _ingest(inbox, encode_update("nobody", 1, [0.0] * 4, b"x"))
+    with pytest.raises(UpdateFormatError):
+        _ingest(inbox, good + b"extra")
+    with pytest.raises(UpdateFormatError):
+        _ingest(inbox, encode_update("c1", 1, [0.0] * 5, KEYS["c1"]))
+    with pytest.raises(InboxClosed):
+        _ingest(inbox, good, min_round=2)
+    assert inbox.pending("s") == 0
+    assert _ingest(inbox, good)["bytes"] == len(good)
+    with pytest.raises(DuplicateUpdateError):
+        _ingest(inbox, good)
+    arena = inbox.drain("s")
+    assert arena is not None and arena.rows().tolist() == [[1.0, 2.0, 3.0, 4.0]]
+
+
+def test_drain_cancels_in_flight_uploads_and_runner_aggregates_inbox():
+    inbox = UpdateInbox(2, max_clients=4)
+    runner = FederatedRoundRunner(keys=lambda: KEYS, aggregator=lambda: "trimmed_mean", source=simulated_updates(2), dim=2, inbox=inbox)
+    _ingest(inbox, encode_update("c1", 1, [1.0, 3.0], KEYS["c1"]))
+    slow = encode_update("c2", 1, [9.0, 9.0], KEYS["c2"])
+
+    async def _stalled():
+        yield slow[:-5]
+        await asyncio.sleep(0.3)  # the round closes meanwhile
+        yield slow[-5:]
+
+    errors = []
+
+    def _upload():
+        try:
+            asyncio.run(ingest_update(inbox, "s", _stalled(), KEYS.get))
+        except InboxClosed as e:
+            errors.append(e)
+
+    t = threading.Thread(target=_upload)
+    t.start()
+    time.sleep(0.1)
+    res = runner("s", 1)
+    t.join()
+    assert res.updates == 1 and errors
+    assert runner._weights["s"].tolist() == [1.0, 3.0]
+    # Empty inbox: the round is skipped, not trained on the simulated source
+    res = runner("s", 2)
+    assert res.updates == 0 and res.checkpoint_id is None
+    assert runner._weights["s"].tolist() == [1.0, 3.0]
+    # Only a session started as a simulation uses it
+    runner.begin(SessionState(session_id="sim", total_rounds=1, simulate=True))
+    assert runner("sim", 1).updates == len(KEYS)
+
+
+def test_update_endpoint_streams_into_the_next_round(monkeypatch):
+    import uvicorn
+    from aegis.api import app, executor, round_runner
+
+    monkeypatch.setenv("AEGIS_ROUND_DURATION_S", "0.5")
+    final = {}
+
+    def _finish(st):  # the runner evicts a finished session; keep its last weights for the check below
+        final[st.session_id] = round_runner._weights[st.session_id].tolist()
+        round_runner.finish(st)
+
+    monkeypatch.setattr(executor, "on_finish", _finish)
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/healthz")
+            break
+        except Exception:
+            time.sleep(0.05)
+    admin = {"X-Role": "admin"}
+    httpx.post(f"{base}/participants", headers=admin, json={"client_id": "up1", "key_hex": "ab" * 16}).raise_for_status()
+    from aegis.api import _MODEL_DIM
+
+    body = encode_update("up1", 2, np.full(_MODEL_DIM, 0.25), bytes.fromhex("ab" * 16), compression="zstd")
+    r = httpx.post(f"{base}/federated/nosuch/updates", headers=admin, content=body)
+    assert r.status_code == 404
+    httpx.post(f"{base}/training/start", headers=admin, json={"session_id": "upl", "rounds": 2, "resume": False}).raise_for_status()
+    r = httpx.post(f"{base}/federated/upl/updates", headers={"X-Role": "viewer"}, content=body)
+    assert r.status_code == 403
+    for header in ({"client_id": "up1", "n": _MODEL_DIM}, {"client_id": "up1", "round": "2", "n": _MODEL_DIM}, [1]):
+        raw = json.dumps(header).encode()
+        r = httpx.post(f"{base}/federated/upl/updates", headers=admin, content=PREFIX.pack(MAGIC, 1, 0, 0, len(raw)) + raw)
+        assert r.status_code == 422, r.text
+    r = httpx.post(f"{base}/federated/upl/updates", headers=admin, content=body)
+    assert r.status_code == 202, r.text
+    assert r.json()["client_id"] == "up1" and r.json()["bytes"] == len(body)
+
+    for _ in range(100):
+        st = httpx.get(f"{base}/training/status", headers=admin, params={"session_id": "upl"}).json()
+        if st["status"] == "completed":
+            break
+        time.sleep(0.05)
+    assert st["status"] == "completed" and st["last_round_updates"] == 1
+    assert final["upl"] == [0.25] * _MODEL_DIM and "upl" not in round_runner._weights
+    logs = httpx.get(f"{base}/audit/logs", headers={"X-Role": "viewer"}, params={"action": "federated:update"}).json()
+    assert len(logs["events"]) == 1
+
+
+def test_verified_upload_replaces_unverified_claims_and_claims_are_capped():
+    inbox = UpdateInbox(4, max_clients=8, max_uploads_per_client=2)
+    real = encode_update("c1", 1, [1.0, 2.0, 3.0, 4.0], KEYS["c1"])
+    forged = encode_update("c1", 1, [9.0] * 4, b"not-c1s-key")  # header claims c1; the MAC will not verify
+
+    async def _stalled(data: bytes, gate: asyncio.Event):
+        yield data[:-40]
+        await gate.wait()
+        yield data[-40:]
+
+    async def _run():
+        gate = asyncio.Event()
+        first = asyncio.create_task(ingest_update(inbox, "s", _stalled(forged, gate), KEYS.get))
+        second = asyncio.create_task(ingest_update(inbox, "s", _stalled(forged, gate), KEYS.get))
+        await asyncio.sleep(0.05)
+        assert inbox.pending("s") == 0  # two provisional rows, nothing accepted
+        # A third claim for c1 is over the cap: the oldest in-flight one is cancelled
+        accepted = await ingest_update(inbox, "s", _chunks(real, 7), KEYS.get)
+        gate.set()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        return accepted, results
+
+    accepted, results = asyncio.run(_run())
+    assert accepted["client_id"] == "c1"
+    assert all(isinstance(r, InboxClosed) for r in results)
+    assert inbox.pending("s") == 1
+    arena = inbox.drain("s")
+    assert arena is not None and arena.rows().tolist() == [[1.0, 2.0, 3.0, 4.0]]
+
+
+def test_rejected_and_evicted_uploads_free_their_rows():
+    inbox = UpdateInbox(4, max_clients=4, max_uploads_per_client=2)
+    forged = encode_update("c1", 1, [9.0] * 4, b"not-c1s-key")
+    for _ in range(8):  # twice the arena's size in failed uploads
+        with pytest.raises(UpdateAuthError):
+            _ingest(inbox, forged)
+
+    async def _run():
+        gate = asyncio.Event()
+
+        async def _stalled():
+            yield forged[:-40]
+            await gate.wait()
+            yield forged[-40:]
+
+        stalled = [asyncio.create_task(ingest_update(inbox, "s", _stalled(), KEYS.get)) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        honest = await ingest_update(inbox, "s", _chunks(encode_update("c2", 1, [1.0] * 4, KEYS["c2"]), 7), KEYS.get)
+        gate.set()
+        return honest, await asyncio.gather(*stalled, return_exceptions=True)
+
+    honest, stalled = asyncio.run(_run())  # at most two of c1's claims hold a row at any time
+    assert honest["client_id"] == "c2"
+    assert sum(isinstance(r, InboxClosed) for r in stalled) == 4 and sum(isinstance(r, UpdateAuthError) for r in stalled) == 2
+    assert inbox.pending("s") == 1
+    arena = inbox.drain("s")
+    assert arena is not None and arena.rows().tolist() == [[1.0] * 4]
+
+
+def test_upload_deadline_aborts_a_stalled_upload():
+    inbox = UpdateInbox(4, max_clients=4)
+    data = encode_update("c2", 1, [1.0] * 4, KEYS["c2"])
+
+    async def _slow():
+        yield data[:-8]
+        await asyncio.sleep(5)
+        yield data[-8:]
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ingest_update(inbox, "s", _slow(), KEYS.get, timeout_s=0.1))
+    # The abandoned row is freed: the client can retry within the round
+    assert _ingest(inbox, data)["client_id"] == "c2"
+    arena = inbox.drain("s")
+    assert arena is not None and arena.rows().tolist() == [[1.0] * 4]